@@ -4,8 +4,10 @@ API dependencies for authentication and database access.
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, get_read_db
 from ..models import User
+from ..core.cache import user_cache
 from ..core.security import decode_access_token
 from typing import Optional
 
@@ -46,13 +48,32 @@ async def get_current_user(
     return user
 
 
+async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+    """
+    Dependency for admin-only routes: the current user, if listed in ADMIN_EMAILS.
+    
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    if current_user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
 async def get_current_user_optional(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security_optional),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ) -> Optional[User]:
     """
     Optional auth: returns current user if valid token present, else None.
     Use for routes that work with or without authentication (e.g. property search).
+
+    Users found are cached by email (``users`` cache); a cache hit returns a
+    detached ``User`` with only ``id`` and ``email`` set, which is all the
+    read-only routes using this need.
     """
     if credentials is None:
         return None
@@ -60,5 +81,10 @@ async def get_current_user_optional(
     email = decode_access_token(token)
     if email is None:
         return None
+    found, cached = await user_cache.aget(email)
+    if found:
+        return User(id=cached["id"], email=cached["email"])
     user = db.query(User).filter(User.email == email).first()
+    if user is not None:
+        await user_cache.aset(email, {"id": user.id, "email": user.email})
     return user
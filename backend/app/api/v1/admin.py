@@ -0,0 +1,212 @@
+"""
+Admin diagnostics, request profiles and background job endpoints.
+"""
+import asyncio
+from typing import TYPE_CHECKING, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from ...core.request_metrics import route_stats
+from ...database import get_db
+from ...models import Job, User
+from ...schemas import JobCreate, JobResponse, ProfileDetail, ProfileSummary, RouteSQLStats
+from ..deps import get_current_admin
+
+# Profiling and jobs are imported by the endpoints that use them, keeping
+# them (and cProfile/tracemalloc) out of the app's cold start.
+if TYPE_CHECKING:
+    from ...core.profiling import RequestProfile
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(get_current_admin)])
+
+# Seconds between progress checks of a job event stream
+JOB_EVENTS_INTERVAL = 1.0
+
+
+@router.get("/sql-stats", response_model=List[RouteSQLStats])
+async def get_sql_stats():
+    """
+    Per-route SQL totals of this API process, heaviest total DB time first.
+    
+    A route whose avg_queries grows with the size of its result is issuing
+    one query per row (N+1).
+    """
+    return route_stats.snapshot()
+
+
+@router.delete("/sql-stats", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_sql_stats():
+    """Start the per-route SQL totals over."""
+    route_stats.reset()
+
+
+def _get_profile(profile_id: int) -> "RequestProfile":
+    from ...core.profiling import profile_store
+
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return profile
+
+
+@router.get("/profiles", response_model=List[ProfileSummary])
+async def list_profiles():
+    """
+    Profiled requests of this API process, newest first (PROFILING_ENABLED;
+    send ``X-Profile: 1`` as an admin to profile a request).
+    """
+    from ...core.profiling import profile_store
+
+    return [profile.summary() for profile in profile_store.snapshot()]
+
+
+@router.delete("/profiles", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_profiles():
+    """Drop the stored profiles."""
+    from ...core.profiling import profile_store
+
+    profile_store.clear()
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileDetail)
+async def get_profile(profile_id: int):
+    """A profile's breakdown, SQL and allocation stats and its heaviest functions."""
+    return _get_profile(profile_id).detail()
+
+
+@router.get("/profiles/{profile_id}/download")
+async def download_profile(profile_id: int, format: str = Query("pstats", pattern="^(pstats|speedscope)$")):
+    """
+    The profile as a pstats file (``python -m pstats``, snakeviz) or as
+    speedscope JSON (sampled profiles only).
+    """
+    profile = _get_profile(profile_id)
+    if format == "pstats":
+        content, media_type, suffix = profile.pstats(), "application/octet-stream", "pstats"
+    else:
+        content = profile.speedscope()
+        if content is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Only sampled profiles export to speedscope; download pstats instead"
+            )
+        media_type, suffix = "application/json", "speedscope.json"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.{suffix}"'},
+    )
+
+
+def _get_job(db: Session, job_id: int) -> Job:
+    job = db.get(Job, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_201_CREATED)
+async def create_job(
+    job_data: JobCreate,
+    admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a background job: ``load`` (params: path under JOB_IMPORT_DIR,
+    optional batch_size, geocoder_mode, start_row, max_rows, staged),
+    ``rescore`` (optional limit) or ``analyze``.
+    """
+    from ...jobs import job_runner, submit_job
+
+    try:
+        job = submit_job(db, job_data.kind, job_data.params, created_by=admin.email)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    job_runner.wake()
+    return job
+
+
+@router.get("/jobs", response_model=List[JobResponse])
+async def list_jobs(
+    job_status: Optional[str] = Query(None, alias="status"),
+    kind: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Jobs, newest first."""
+    query = db.query(Job)
+    if job_status:
+        query = query.filter(Job.status == job_status)
+    if kind:
+        query = query.filter(Job.kind == kind)
+    return query.order_by(Job.id.desc()).limit(limit).all()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    """A job with its latest progress counters."""
+    return _get_job(db, job_id)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: int, db: Session = Depends(get_db)):
+    """
+    Server-sent events: the job (as in ``GET /jobs/{job_id}``) whenever its
+    status or progress changes, until it finishes.
+    """
+    from ...jobs import FINISHED_STATUSES
+
+    _get_job(db, job_id)
+
+    async def events():
+        last = None
+        try:
+            while True:
+                job = db.get(Job, job_id, populate_existing=True)
+                payload = JobResponse.model_validate(job).model_dump_json(exclude={"heartbeat_at"})
+                finished = job.status in FINISHED_STATUSES
+                db.rollback()  # No transaction held open between checks
+                if payload != last:
+                    last = payload
+                    yield f"data: {payload}\n\n"
+                if finished:
+                    return
+                await asyncio.sleep(JOB_EVENTS_INTERVAL)
+        finally:
+            db.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel(job_id: int, db: Session = Depends(get_db)):
+    """Cancel a queued job, or stop a running one after its current batch (it stays resumable)."""
+    from ...jobs import cancel_job, job_runner
+
+    try:
+        job = cancel_job(db, _get_job(db, job_id))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    job_runner.cancel_running(job_id)
+    return job
+
+
+@router.post("/jobs/{job_id}/resume", response_model=JobResponse)
+async def resume(job_id: int, db: Session = Depends(get_db)):
+    """Queue a cancelled or failed job again; loads continue from their checkpoint."""
+    from ...jobs import job_runner, resume_job
+
+    try:
+        job = resume_job(db, _get_job(db, job_id))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    job_runner.wake()
+    return job
@@ -2,11 +2,11 @@
 Favorites management endpoints.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 from typing import List
 
-from ...database import get_db
+from ...database import get_write_db
 from ...schemas import FavoriteResponse, FavoriteCreate, PropertyResponse
 from ...models import Favorite, Property, User
 from ..deps import get_current_user
@@ -17,15 +17,17 @@ router = APIRouter(prefix="/favorites", tags=["favorites"])
 @router.get("", response_model=List[FavoriteResponse])
 async def get_favorites(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Get all properties favorited by the current user.
     
     Returns list with property details included.
     """
+    # Load each favorite's property in the same query instead of one query per favorite.
     favorites = (
         db.query(Favorite)
+        .options(joinedload(Favorite.property))
         .filter(Favorite.user_id == current_user.id)
         .order_by(Favorite.created_at.desc())
         .all()
@@ -52,7 +54,7 @@ async def get_favorites(
 async def add_favorite(
     favorite_data: FavoriteCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Add a property to the current user's favorites.
@@ -108,7 +110,7 @@ async def add_favorite(
 async def remove_favorite(
     property_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Remove a property from the current user's favorites using the property ID.
@@ -8,23 +8,24 @@ from typing import List, Optional
 from datetime import datetime
 import math
 
-# Image API
+# Image API (httpx is imported in the route, off the cold-start path)
 from fastapi import Response
-import httpx
 from ...config import settings
 
-from ...database import get_db
+from ...database import get_read_db
 from ...schemas import (
     PropertyResponse,
+    PriceHistoryEntry,
     PropertySearchParams,
     InvestmentAnalysisResponse,
     InvestmentAssumptionsSchema,
     InvestmentMetricsSchema,
     CashFlowBreakdownSchema,
 )
-from ...models import Property, Favorite, User
+from ...models import Property, Favorite, User, PropertyPriceHistory
 from ..deps import get_current_user_optional
 from ...core.investment import analyze_investment, InvestmentAssumptions
+from ...core.cache import analysis_cache, digest, dump_models, load_models, search_cache, streetview_cache
 
 router = APIRouter(prefix="/properties", tags=["properties"])
 
@@ -65,86 +66,113 @@ async def search_properties(
     sort_by: str = Query("profitability_score", pattern="^(profitability_score|price|size_sqft)$"),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
     current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Search for properties with various filters.
     
     Supports filtering by location, price range, size, bedrooms, bathrooms,
     property type, radius from zip code, and minimum profitability score.
+    Results are cached per filter set (``search`` cache); favorite flags
+    are added per user afterwards. With ``SEARCH_BACKEND=columnar`` the
+    page is picked from an in-memory snapshot instead of by SQL.
     """
-    query = db.query(Property)
-
-    if zip_code:
-        query = query.filter(Property.zip_code == zip_code)
-
-    if min_price is not None:
-        query = query.filter(Property.price >= min_price)
-
-    if max_price is not None:
-        query = query.filter(Property.price <= max_price)
-
-    if min_size is not None:
-        query = query.filter(Property.size_sqft >= min_size)
-
-    if max_size is not None:
-        query = query.filter(Property.size_sqft <= max_size)
-
-    if bedrooms is not None:
-        query = query.filter(Property.bedrooms == bedrooms)
-
-    if bathrooms is not None:
-        query = query.filter(Property.bathrooms >= bathrooms)
-
-    if property_type:
-        query = query.filter(Property.property_type.ilike(f"%{property_type}%"))
-
-    if min_score is not None:
-        query = query.filter(Property.profitability_score >= min_score)
-
-    # Apply sorting before pagination so ordering is correct across full result set.
-    sort_column_map = {
-        "profitability_score": Property.profitability_score,
-        "price": Property.price,
-        "size_sqft": Property.size_sqft,
-    }
-    sort_column = sort_column_map.get(sort_by, Property.profitability_score)
-    if sort_order == "asc":
-        query = query.order_by(sort_column.asc())
-    else:
-        query = query.order_by(sort_column.desc())
-
-    properties_db = query.offset(skip).limit(limit).all()
-
-    if radius_miles and zip_code and properties_db:
-        center_prop = db.query(Property).filter(
-            and_(Property.zip_code == zip_code, Property.lat.isnot(None))
-        ).first()
-
-        if center_prop and center_prop.lat and center_prop.lng:
-            filtered_props = []
-            for prop in properties_db:
-                if prop.lat and prop.lng:
-                    distance = calculate_distance(
-                        center_prop.lat, center_prop.lng,
-                        prop.lat, prop.lng
-                    )
-                    if distance <= radius_miles:
-                        filtered_props.append(prop)
-            properties_db = filtered_props
-
-    properties = []
-    for prop in properties_db:
-        response_obj = PropertyResponse.model_validate(prop)
-        analysis = analyze_investment(prop)
-        if analysis:
-            response_obj.cap_rate = analysis.cap_rate
-            response_obj.gross_yield = analysis.gross_yield
-            response_obj.net_yield = analysis.net_yield
-            response_obj.cash_on_cash_roi = analysis.cash_on_cash_roi
-            response_obj.deal_score = analysis.deal_score
-        properties.append(response_obj)
-    
+    def run_search():
+        page_ids = None
+        if settings.SEARCH_BACKEND == "columnar":
+            from ...core.search_index import search_index
+
+            page_ids = search_index.search(
+                zip_code=zip_code, min_price=min_price, max_price=max_price, min_size=min_size,
+                max_size=max_size, bedrooms=bedrooms, bathrooms=bathrooms, property_type=property_type,
+                min_score=min_score, skip=skip, limit=limit, sort_by=sort_by, sort_order=sort_order,
+            )
+
+        query = db.query(Property)
+
+        if zip_code:
+            query = query.filter(Property.zip_code == zip_code)
+
+        if min_price is not None:
+            query = query.filter(Property.price >= min_price)
+
+        if max_price is not None:
+            query = query.filter(Property.price <= max_price)
+
+        if min_size is not None:
+            query = query.filter(Property.size_sqft >= min_size)
+
+        if max_size is not None:
+            query = query.filter(Property.size_sqft <= max_size)
+
+        if bedrooms is not None:
+            query = query.filter(Property.bedrooms == bedrooms)
+
+        if bathrooms is not None:
+            query = query.filter(Property.bathrooms >= bathrooms)
+
+        if property_type:
+            query = query.filter(Property.property_type.ilike(f"%{property_type}%"))
+
+        if min_score is not None:
+            query = query.filter(Property.profitability_score >= min_score)
+
+        # Apply sorting before pagination so ordering is correct across full result set;
+        # ties in id order, so pages are stable.
+        sort_column_map = {
+            "profitability_score": Property.profitability_score,
+            "price": Property.price,
+            "size_sqft": Property.size_sqft,
+        }
+        sort_column = sort_column_map.get(sort_by, Property.profitability_score)
+        if sort_order == "asc":
+            query = query.order_by(sort_column.asc(), Property.id)
+        else:
+            query = query.order_by(sort_column.desc(), Property.id)
+
+        if page_ids is None:
+            properties_db = query.offset(skip).limit(limit).all()
+        else:
+            properties_db = search_index.hydrate(db, page_ids)
+
+        if radius_miles and zip_code and properties_db:
+            center_prop = db.query(Property).filter(
+                and_(Property.zip_code == zip_code, Property.lat.isnot(None))
+            ).order_by(Property.id).first()
+
+            if center_prop and center_prop.lat and center_prop.lng:
+                filtered_props = []
+                for prop in properties_db:
+                    if prop.lat and prop.lng:
+                        distance = calculate_distance(
+                            center_prop.lat, center_prop.lng,
+                            prop.lat, prop.lng
+                        )
+                        if distance <= radius_miles:
+                            filtered_props.append(prop)
+                properties_db = filtered_props
+
+        properties = []
+        for prop in properties_db:
+            response_obj = PropertyResponse.model_validate(prop)
+            analysis = analyze_investment(prop)
+            if analysis:
+                response_obj.cap_rate = analysis.cap_rate
+                response_obj.gross_yield = analysis.gross_yield
+                response_obj.net_yield = analysis.net_yield
+                response_obj.cash_on_cash_roi = analysis.cash_on_cash_roi
+                response_obj.deal_score = analysis.deal_score
+            properties.append(response_obj)
+        return properties
+
+    key = digest(
+        zip_code, min_price, max_price, min_size, max_size, bedrooms, bathrooms,
+        property_type, radius_miles, min_score, skip, limit, sort_by, sort_order,
+    )
+    properties = await search_cache.get_or_compute(
+        key, run_search, encode=dump_models, decode=lambda data: load_models(PropertyResponse, data)
+    )
+
     # Add favorite status if user is authenticated
     if current_user:
         favorite_property_ids = {
@@ -162,7 +190,7 @@ async def search_properties(
 async def get_property(
     property_id: int,
     current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get detailed information about a specific property.
@@ -195,6 +223,28 @@ async def get_property(
     
     return property_response
 
+@router.get("/{property_id}/price-history", response_model=List[PriceHistoryEntry])
+async def get_property_price_history(
+    property_id: int,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get the observed prices of a property, oldest first.
+    """
+    if not db.query(Property.id).filter(Property.id == property_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property not found"
+        )
+    
+    return (
+        db.query(PropertyPriceHistory)
+        .filter(PropertyPriceHistory.property_id == property_id)
+        .order_by(PropertyPriceHistory.observed_at, PropertyPriceHistory.id)
+        .all()
+    )
+
+
 @router.get("/{property_id}/streetview.jpg")
 async def get_property_streetview(
     property_id: int,
@@ -203,11 +253,12 @@ async def get_property_streetview(
     fov: int = Query(80, ge=10, le=120, description="Field of view"),
     width: int = Query(900, ge=100, le=2048, description="Image width"),
     height: int = Query(500, ge=100, le=2048, description="Image height"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Fetches and return a Google Street View image for a property using its lat/lng.
-    The Google API key stays on the backend.
+    The Google API key stays on the backend. Images are cached by location
+    and camera settings (``streetview`` cache).
     """
     property_obj = db.query(Property).filter(Property.id == property_id).first()
 
@@ -231,42 +282,49 @@ async def get_property_streetview(
 
     location = f"{property_obj.lat},{property_obj.lng}"
 
-    metadata_params = {
-        "location": location,
-        "key": settings.GOOGLE_MAPS_API_KEY,
-    }
-
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        metadata_response = await client.get(
-            "https://maps.googleapis.com/maps/api/streetview/metadata",
-            params=metadata_params,
-        )
-        metadata_response.raise_for_status()
-        metadata = metadata_response.json()
-
-        if metadata.get("status") != "OK":
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Street View not available: {metadata.get('status', 'UNKNOWN')}"
-            )
+    async def fetch_image():
+        import httpx
 
-        image_params = {
-            "size": f"{width}x{height}",
+        metadata_params = {
             "location": location,
-            "heading": heading,
-            "pitch": pitch,
-            "fov": fov,
             "key": settings.GOOGLE_MAPS_API_KEY,
         }
 
-        image_response = await client.get(
-            "https://maps.googleapis.com/maps/api/streetview",
-            params=image_params,
-        )
-        image_response.raise_for_status()
+        async with httpx.AsyncClient(timeout=15.0) as client:
+            metadata_response = await client.get(
+                "https://maps.googleapis.com/maps/api/streetview/metadata",
+                params=metadata_params,
+            )
+            metadata_response.raise_for_status()
+            metadata = metadata_response.json()
+
+            if metadata.get("status") != "OK":
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Street View not available: {metadata.get('status', 'UNKNOWN')}"
+                )
+
+            image_params = {
+                "size": f"{width}x{height}",
+                "location": location,
+                "heading": heading,
+                "pitch": pitch,
+                "fov": fov,
+                "key": settings.GOOGLE_MAPS_API_KEY,
+            }
+
+            image_response = await client.get(
+                "https://maps.googleapis.com/maps/api/streetview",
+                params=image_params,
+            )
+            image_response.raise_for_status()
+        return image_response.content
+
+    key = digest(location, heading, pitch, fov, width, height)
+    image = await streetview_cache.get_or_compute(key, fetch_image)
 
     return Response(
-        content=image_response.content,
+        content=image,
         media_type="image/jpeg",
         headers={"Cache-Control": "public, max-age=86400"},
     )
@@ -296,83 +354,96 @@ async def get_property_investment_analysis(
     analysis_horizon_years: Optional[int] = Query(
         None, ge=1, le=40, description="Horizon (years) for ROI/IRR"
     ),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """
     Return a detailed investment analysis for a single property, including
     cash flow breakdown, cap rate, yields, cash-on-cash ROI, IRR and a
-    high-level "deal score".
+    high-level "deal score". Analyses are cached per property and set of
+    overrides (``analysis`` cache).
     """
-    property_obj = db.query(Property).filter(Property.id == property_id).first()
+    def run_analysis():
+        property_obj = db.query(Property).filter(Property.id == property_id).first()
 
-    if not property_obj:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Property not found",
+        if not property_obj:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Property not found",
+            )
+
+        assumptions = InvestmentAssumptions()
+        if down_payment_pct is not None:
+            assumptions.down_payment_pct = InvestmentAssumptions.down_payment_pct.__class__(str(down_payment_pct))
+        if interest_rate_annual is not None:
+            assumptions.interest_rate_annual = InvestmentAssumptions.interest_rate_annual.__class__(str(interest_rate_annual))
+        if loan_term_years is not None:
+            assumptions.loan_term_years = loan_term_years
+        if closing_costs_pct is not None:
+            assumptions.closing_costs_pct = InvestmentAssumptions.closing_costs_pct.__class__(str(closing_costs_pct))
+        if vacancy_rate is not None:
+            assumptions.vacancy_rate = InvestmentAssumptions.vacancy_rate.__class__(str(vacancy_rate))
+        if appreciation_rate_annual is not None:
+            assumptions.appreciation_rate_annual = InvestmentAssumptions.appreciation_rate_annual.__class__(str(appreciation_rate_annual))
+        if analysis_horizon_years is not None:
+            assumptions.analysis_horizon_years = analysis_horizon_years
+
+        analysis = analyze_investment(property_obj, assumptions=assumptions)
+        if analysis is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cannot compute investment analysis for this property (missing data)",
+            )
+
+        assumptions_schema = InvestmentAssumptionsSchema(
+            down_payment_pct=analysis.assumptions.down_payment_pct,
+            interest_rate_annual=analysis.assumptions.interest_rate_annual,
+            loan_term_years=analysis.assumptions.loan_term_years,
+            closing_costs_pct=analysis.assumptions.closing_costs_pct,
+            property_tax_pct=analysis.assumptions.property_tax_pct,
+            insurance_pct=analysis.assumptions.insurance_pct,
+            maintenance_pct_rent=analysis.assumptions.maintenance_pct_rent,
+            management_pct_rent=analysis.assumptions.management_pct_rent,
+            hoa_annual=analysis.assumptions.hoa_annual,
+            utilities_annual=analysis.assumptions.utilities_annual,
+            vacancy_rate=analysis.assumptions.vacancy_rate,
+            appreciation_rate_annual=analysis.assumptions.appreciation_rate_annual,
+            analysis_horizon_years=analysis.assumptions.analysis_horizon_years,
         )
 
-    assumptions = InvestmentAssumptions()
-    if down_payment_pct is not None:
-        assumptions.down_payment_pct = InvestmentAssumptions.down_payment_pct.__class__(str(down_payment_pct))
-    if interest_rate_annual is not None:
-        assumptions.interest_rate_annual = InvestmentAssumptions.interest_rate_annual.__class__(str(interest_rate_annual))
-    if loan_term_years is not None:
-        assumptions.loan_term_years = loan_term_years
-    if closing_costs_pct is not None:
-        assumptions.closing_costs_pct = InvestmentAssumptions.closing_costs_pct.__class__(str(closing_costs_pct))
-    if vacancy_rate is not None:
-        assumptions.vacancy_rate = InvestmentAssumptions.vacancy_rate.__class__(str(vacancy_rate))
-    if appreciation_rate_annual is not None:
-        assumptions.appreciation_rate_annual = InvestmentAssumptions.appreciation_rate_annual.__class__(str(appreciation_rate_annual))
-    if analysis_horizon_years is not None:
-        assumptions.analysis_horizon_years = analysis_horizon_years
-
-    analysis = analyze_investment(property_obj, assumptions=assumptions)
-    if analysis is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cannot compute investment analysis for this property (missing data)",
+        cash_flow_schema = CashFlowBreakdownSchema(
+            gross_rent_annual=analysis.cash_flow.gross_rent_annual,
+            vacancy_loss_annual=analysis.cash_flow.vacancy_loss_annual,
+            effective_gross_income_annual=analysis.cash_flow.effective_gross_income_annual,
+            operating_expenses_annual=analysis.cash_flow.operating_expenses_annual,
+            noi_annual=analysis.cash_flow.noi_annual,
+            debt_service_annual=analysis.cash_flow.debt_service_annual,
+            cash_flow_annual=analysis.cash_flow.cash_flow_annual,
         )
 
-    assumptions_schema = InvestmentAssumptionsSchema(
-        down_payment_pct=analysis.assumptions.down_payment_pct,
-        interest_rate_annual=analysis.assumptions.interest_rate_annual,
-        loan_term_years=analysis.assumptions.loan_term_years,
-        closing_costs_pct=analysis.assumptions.closing_costs_pct,
-        property_tax_pct=analysis.assumptions.property_tax_pct,
-        insurance_pct=analysis.assumptions.insurance_pct,
-        maintenance_pct_rent=analysis.assumptions.maintenance_pct_rent,
-        management_pct_rent=analysis.assumptions.management_pct_rent,
-        hoa_annual=analysis.assumptions.hoa_annual,
-        utilities_annual=analysis.assumptions.utilities_annual,
-        vacancy_rate=analysis.assumptions.vacancy_rate,
-        appreciation_rate_annual=analysis.assumptions.appreciation_rate_annual,
-        analysis_horizon_years=analysis.assumptions.analysis_horizon_years,
-    )
+        return InvestmentMetricsSchema(
+            cap_rate=analysis.cap_rate,
+            gross_yield=analysis.gross_yield,
+            net_yield=analysis.net_yield,
+            cash_on_cash_roi=analysis.cash_on_cash_roi,
+            break_even_years=analysis.break_even_years,
+            total_roi_horizon=analysis.total_roi_horizon,
+            irr=analysis.irr,
+            deal_score=analysis.deal_score,
+            assumptions=assumptions_schema,
+            cash_flow=cash_flow_schema,
+        )
 
-    cash_flow_schema = CashFlowBreakdownSchema(
-        gross_rent_annual=analysis.cash_flow.gross_rent_annual,
-        vacancy_loss_annual=analysis.cash_flow.vacancy_loss_annual,
-        effective_gross_income_annual=analysis.cash_flow.effective_gross_income_annual,
-        operating_expenses_annual=analysis.cash_flow.operating_expenses_annual,
-        noi_annual=analysis.cash_flow.noi_annual,
-        debt_service_annual=analysis.cash_flow.debt_service_annual,
-        cash_flow_annual=analysis.cash_flow.cash_flow_annual,
+    key = digest(
+        property_id, down_payment_pct, interest_rate_annual, loan_term_years, closing_costs_pct,
+        vacancy_rate, appreciation_rate_annual, analysis_horizon_years,
     )
-
-    metrics_schema = InvestmentMetricsSchema(
-        cap_rate=analysis.cap_rate,
-        gross_yield=analysis.gross_yield,
-        net_yield=analysis.net_yield,
-        cash_on_cash_roi=analysis.cash_on_cash_roi,
-        break_even_years=analysis.break_even_years,
-        total_roi_horizon=analysis.total_roi_horizon,
-        irr=analysis.irr,
-        deal_score=analysis.deal_score,
-        assumptions=assumptions_schema,
-        cash_flow=cash_flow_schema,
+    # Only the metrics are cached; generated_at is the time of this response
+    metrics_schema = await analysis_cache.get_or_compute(
+        key,
+        run_analysis,
+        encode=lambda metrics: metrics.model_dump(mode="json"),
+        decode=InvestmentMetricsSchema.model_validate,
     )
-
     return InvestmentAnalysisResponse(
         property_id=property_id,
         generated_at=datetime.utcnow(),
@@ -4,7 +4,8 @@ User profile management endpoints.
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from ...database import get_db
+from ...core.cache import user_cache
+from ...database import get_write_db
 from ...schemas import UserProfileResponse, UserProfileUpdate, UserProfileCreate
 from ...models import User, UserProfile
 from ..deps import get_current_user
@@ -15,7 +16,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 @router.get("/profile", response_model=UserProfileResponse)
 async def get_profile(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Get current user's profile information.
@@ -41,7 +42,7 @@ async def get_profile(
 async def update_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_write_db)
 ):
     """
     Update current user's profile information.
@@ -57,6 +58,7 @@ async def update_profile(
     
     # Update fields
     update_data = profile_data.model_dump(exclude_unset=True)
+    old_email = current_user.email
     
     # Handle email update separately on the User model
     if 'email' in update_data:
@@ -78,6 +80,8 @@ async def update_profile(
     
     db.commit()
     db.refresh(profile)
+    if current_user.email != old_email:
+        await user_cache.adelete(old_email)
     
     # Inject email back for the response
     profile.email = current_user.email
@@ -0,0 +1,548 @@
+"""
+Shared cache for search pages, investment analyses, signed-in users and
+Street View images.
+
+``CACHE_BACKEND`` picks where entries live:
+
+- ``"memory"``: an LRU in each process, bounded by ``CACHE_MAX_BYTES``.
+  Nothing is shared, so every uvicorn worker and Lambda instance warms
+  its own copy, and ``invalidate`` only reaches the process that calls it:
+  a CLI load or ``--recalculate`` cannot drop the API's cached pages, which
+  then age out by TTL. Use ``"redis"`` when loads run in another process
+  than the API (the CLI, several workers, Lambda).
+- ``"redis"``: one cache at ``CACHE_URL`` (``redis://[:password@]host:port/db``)
+  for all workers and instances, spoken to over plain RESP, so any
+  Redis-protocol server works (Redis, Valkey, KeyDB, a test fake).
+- ``"off"`` (default): every lookup misses and nothing is stored.
+
+Keys are ``{CACHE_PREFIX}:{namespace}:{generations}:{key}``. A namespace
+can depend on generation counters kept in the backend (search and analysis
+depend on ``listings``); ``invalidate`` bumps a counter, so every key
+built on the old value is unreachable at once and ages out by TTL. Values
+are msgpack; lists of pydantic models are stored as field names plus one
+row of values per model (``dump_models`` / ``load_models``).
+
+``get_or_compute`` protects against stampedes: concurrent misses on one key
+in a process wait for the first one, and across processes the first miss
+takes a short lock in the backend while the others poll for its result
+(computing it themselves if the lock holder takes longer than
+``CACHE_LOCK_SECONDS``). The cache never fails a request: a backend error
+is logged, counts as a miss and pauses that backend for a few seconds.
+
+The Redis backend does blocking socket I/O. Async code uses
+``get_or_compute`` and the ``aget`` / ``aset`` / ``adelete`` variants,
+which run its calls in a worker thread so the event loop never waits on
+the network; the plain methods are for sync code (the loader, jobs).
+"""
+import asyncio
+import hashlib
+import inspect
+import logging
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from queue import Empty, Full, LifoQueue
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from urllib.parse import unquote, urlparse
+
+import msgpack
+from pydantic import BaseModel
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+Model = TypeVar("Model", bound=BaseModel)
+
+LISTINGS = "listings"  # Generation of every cached value derived from listings
+DEFAULT_TTL_SECONDS = 300.0
+LOCK_POLL_SECONDS = 0.05
+BACKOFF_SECONDS = 5.0
+
+
+def _record_lookup(name: str, hit: bool) -> None:
+    # Imported here: without metrics, prometheus_client stays out of the cold start.
+    if settings.METRICS_ENABLED:
+        from .telemetry import record_cache_lookup
+
+        record_cache_lookup(name, hit)
+
+
+class CacheError(Exception):
+    """The cache backend could not be reached or answered with an error."""
+
+
+class ReplyError(CacheError):
+    """The cache server answered a command with an error."""
+
+
+# --- Serialization ---
+
+def pack(value: Any) -> bytes:
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def unpack(data: bytes) -> Any:
+    return msgpack.unpackb(data, raw=False)
+
+
+def dump_models(models: Sequence[BaseModel]) -> Dict[str, Any]:
+    """Models as ``{"fields": [...], "rows": [[...], ...]}``, so field names are stored once."""
+    if not models:
+        return {"fields": [], "rows": []}
+    fields = list(type(models[0]).model_fields)
+    rows = []
+    for model in models:
+        values = model.model_dump(mode="json")
+        rows.append([values[field] for field in fields])
+    return {"fields": fields, "rows": rows}
+
+
+def load_models(model: Type[Model], data: Dict[str, Any]) -> List[Model]:
+    fields = data["fields"]
+    return [model.model_validate(dict(zip(fields, row))) for row in data["rows"]]
+
+
+def digest(*parts: Any) -> str:
+    """Short stable key for a set of parameters (e.g. a search's filters)."""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+async def _call_maybe_async(compute: Callable[[], Union[Any, Awaitable[Any]]]) -> Any:
+    result = compute()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+# --- Backends ---
+
+class NullBackend:
+    """``CACHE_BACKEND=off``: remembers nothing."""
+
+    blocking = False
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [None] * len(keys)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        pass
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return True
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def incr(self, key: str) -> int:
+        return 0
+
+    def clear(self) -> None:
+        pass
+
+
+class MemoryBackend:
+    """Thread-safe LRU of byte strings, bounded by their total size, with per-entry TTLs."""
+
+    blocking = False
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= self.clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(key) + len(value)
+
+    def _set(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        if key in self._entries:
+            self._remove(key)
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, None if ttl is None else self.clock() + ttl)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            current = self._get(key)
+            value = (int(current) if current is not None else 0) + 1
+            self._set(key, str(value).encode(), None)
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class RedisBackend:
+    """
+    Minimal blocking Redis client (RESP2 over TCP) with a small connection pool.
+
+    Calls come from request handlers and job threads alike; each checks a
+    connection out of the pool for one command and returns it, and a
+    connection that failed is dropped.
+    """
+
+    blocking = True  # Network round trips: async callers go through Cache.run
+
+    def __init__(self, url: str, timeout: float = 0.25, pool_size: int = 8):
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL scheme {parsed.scheme!r} (expected redis://)")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._pool: "LifoQueue[Tuple[socket.socket, Any]]" = LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> Tuple[socket.socket, Any]:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = (sock, sock.makefile("rb"))
+        if self.password:
+            self._roundtrip(connection, ("AUTH", self.password))
+        if self.db:
+            self._roundtrip(connection, ("SELECT", self.db))
+        return connection
+
+    @staticmethod
+    def _encode(args: Iterable[Union[str, bytes, int]]) -> bytes:
+        parts = []
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"*%d\r\n" % len(parts) + b"".join(parts)
+
+    @classmethod
+    def _read_reply(cls, reader) -> Any:
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise CacheError("Connection closed by the cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise ReplyError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            return None if length < 0 else reader.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [cls._read_reply(reader) for _ in range(length)]
+        raise CacheError(f"Unexpected reply from the cache server: {line!r}")
+
+    def _roundtrip(self, connection, args) -> Any:
+        sock, reader = connection
+        sock.sendall(self._encode(args))
+        return self._read_reply(reader)
+
+    def execute(self, *args: Union[str, bytes, int]) -> Any:
+        """Send one command and return its reply."""
+        try:
+            connection = self._pool.get_nowait()
+        except Empty:
+            connection = None
+        try:
+            if connection is None:
+                connection = self._connect()
+            reply = self._roundtrip(connection, args)
+        except ReplyError:
+            self._release(connection)  # The server answered; the connection is fine
+            raise
+        except (CacheError, OSError) as exc:
+            if connection is not None:
+                connection[0].close()
+            if isinstance(exc, CacheError):
+                raise
+            raise CacheError(f"Cache server {self.host}:{self.port}: {exc}") from exc
+        self._release(connection)
+        return reply
+
+    def _release(self, connection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except Full:
+            connection[0].close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait()[0].close()
+            except Empty:
+                return
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return self.execute("MGET", *keys) if keys else []
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            self.execute("SET", key, value)
+        else:
+            self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        args = ["SET", key, value, "NX"]
+        if ttl is not None:
+            args += ["PX", max(1, int(ttl * 1000))]
+        return self.execute(*args) is not None
+
+    def delete(self, key: str) -> None:
+        self.execute("DEL", key)
+
+    def incr(self, key: str) -> int:
+        return self.execute("INCR", key)
+
+    def clear(self) -> None:
+        self.execute("FLUSHDB")
+
+
+def backend_from_settings():
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.CACHE_MAX_BYTES)
+    if settings.CACHE_BACKEND == "redis":
+        if not settings.CACHE_URL:
+            raise ValueError("CACHE_BACKEND=redis needs CACHE_URL")
+        return RedisBackend(settings.CACHE_URL, timeout=settings.CACHE_TIMEOUT_SECONDS)
+    if settings.CACHE_BACKEND != "off":
+        raise ValueError(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r} (expected off, memory or redis)")
+    return NullBackend()
+
+
+# --- Cache and namespaces ---
+
+class Cache:
+    """Key namespacing, generations and error handling over one backend."""
+
+    def __init__(self, backend, prefix: str = "rentiq"):
+        self.backend = backend
+        self.prefix = prefix
+        self._paused_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return not isinstance(self.backend, NullBackend)
+
+    def _call(self, method: str, *args, default=None):
+        """Run a backend call; on failure log it, pause the backend and return ``default``."""
+        if self._paused_until > time.monotonic():
+            return default
+        try:
+            return getattr(self.backend, method)(*args)
+        except (CacheError, OSError) as exc:
+            logger.warning("Cache %s failed, bypassing the cache for %.0fs: %s", method, BACKOFF_SECONDS, exc)
+            self._paused_until = time.monotonic() + BACKOFF_SECONDS
+            return default
+
+    async def run(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """``function(*args, **kwargs)`` from async code, in a worker thread if the backend blocks."""
+        if getattr(self.backend, "blocking", False) and self._paused_until <= time.monotonic():
+            return await asyncio.to_thread(function, *args, **kwargs)
+        return function(*args, **kwargs)
+
+    def generation_key(self, name: str) -> str:
+        return f"{self.prefix}:gen:{name}"
+
+    def invalidate(self, generation: str) -> None:
+        """Make every value built on ``generation`` unreachable."""
+        self._call("incr", self.generation_key(generation))
+
+    def namespace(self, name: str, generations: Tuple[str, ...] = ()) -> "CacheNamespace":
+        return CacheNamespace(self, name, generations)
+
+
+class CacheNamespace:
+    """
+    One kind of cached value. The TTL comes from ``CACHE_TTLS[name]`` at
+    call time; values must be msgpack-able (dicts, lists, str, bytes, numbers).
+    """
+
+    def __init__(self, cache: Cache, name: str, generations: Tuple[str, ...] = ()):
+        self.cache = cache
+        self.name = name
+        self.generations = generations
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    @property
+    def ttl(self) -> float:
+        return float(settings.CACHE_TTLS.get(self.name, DEFAULT_TTL_SECONDS))
+
+    def full_key(self, key: str) -> str:
+        """The backend key: prefix, namespace, current generations and ``key``."""
+        prefix = f"{self.cache.prefix}:{self.name}"
+        if not self.generations:
+            return f"{prefix}:{key}"
+        values = self.cache._call(
+            "get_many", [self.cache.generation_key(name) for name in self.generations],
+            default=[None] * len(self.generations),
+        )
+        stamp = ".".join((value or b"0").decode() for value in values)
+        return f"{prefix}:g{stamp}:{key}"
+
+    def _lookup(self, full_key: str) -> Tuple[bool, Any]:
+        [data] = self.cache._call("get_many", [full_key], default=[None])
+        if data is None:
+            return False, None
+        return True, unpack(data)
+
+    def _resolve(self, key: str) -> Tuple[str, Tuple[bool, Any]]:
+        full_key = self.full_key(key)
+        return full_key, self._lookup(full_key)
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """``(found, value)``."""
+        if not self.cache.enabled:
+            return False, None
+        found, value = self._lookup(self.full_key(key))
+        _record_lookup(self.name, found)
+        return found, value
+
+    def set(self, key: str, value: Any) -> None:
+        if not self.cache.enabled:
+            return
+        self.cache._call("set", self.full_key(key), pack(value), self.ttl)
+
+    def delete(self, key: str) -> None:
+        self.cache._call("delete", self.full_key(key))
+
+    async def aget(self, key: str) -> Tuple[bool, Any]:
+        """``get`` for async code."""
+        return await self.cache.run(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """``set`` for async code."""
+        await self.cache.run(self.set, key, value)
+
+    async def adelete(self, key: str) -> None:
+        """``delete`` for async code."""
+        await self.cache.run(self.delete, key)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Union[Any, Awaitable[Any]]],
+        encode: Callable[[Any], Any] = _identity,
+        decode: Callable[[Any], Any] = _identity,
+    ) -> Any:
+        """
+        The cached value of ``key``, computing and storing it on a miss.
+
+        ``compute`` may be sync or async. ``encode`` turns its result into
+        something msgpack can store and ``decode`` turns that back, so the
+        caller gets a fresh object of the same kind on a hit or a miss. An
+        exception from ``compute`` is raised and nothing is stored.
+        """
+        if not self.cache.enabled:
+            return await _call_maybe_async(compute)
+        full_key, (found, value) = await self.cache.run(self._resolve, key)
+        _record_lookup(self.name, found)
+        if found:
+            return decode(value)
+
+        pending = self._in_flight.get(full_key)
+        if pending is not None:
+            return decode(unpack(await asyncio.shield(pending)))
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[full_key] = future
+        try:
+            result, data = await self._compute_once(full_key, compute, encode, decode)
+            future.set_result(data)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # Retrieved here so a future nobody waited on does not warn
+            raise
+        finally:
+            del self._in_flight[full_key]
+
+    async def _compute_once(self, full_key: str, compute, encode, decode) -> Tuple[Any, bytes]:
+        """``compute`` under the backend lock; the result and its packed form."""
+        lock_key = f"{full_key}:lock"
+        token = uuid.uuid4().bytes
+        locked = await self.cache.run(self.cache._call, "add", lock_key, token, settings.CACHE_LOCK_SECONDS, default=True)
+        if not locked:
+            # Another process is computing it: wait for its result, up to the lock timeout.
+            deadline = time.monotonic() + settings.CACHE_LOCK_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                [data] = await self.cache.run(self.cache._call, "get_many", [full_key], default=[None])
+                if data is not None:
+                    return decode(unpack(data)), data
+            token = None
+        try:
+            result = await _call_maybe_async(compute)
+            data = pack(encode(result))
+            await self.cache.run(self.cache._call, "set", full_key, data, self.ttl)
+            return result, data
+        finally:
+            if token is not None:
+                await self.cache.run(self._release_lock, lock_key, token)
+
+    def _release_lock(self, lock_key: str, token: bytes) -> None:
+        [held] = self.cache._call("get_many", [lock_key], default=[None])
+        if held == token:
+            self.cache._call("delete", lock_key)
+
+
+cache = Cache(backend_from_settings(), settings.CACHE_PREFIX)
+
+search_cache = cache.namespace("search", generations=(LISTINGS,))
+analysis_cache = cache.namespace("analysis", generations=(LISTINGS,))
+user_cache = cache.namespace("users")
+streetview_cache = cache.namespace("streetview")
+
+
+def invalidate_listings() -> None:
+    """
+    Drop cached search pages and analyses, e.g. after a load or a rescore.
+
+    With the memory backend this only reaches the calling process (see the
+    module docstring); other processes keep their pages until the TTL.
+    """
+    cache.invalidate(LISTINGS)
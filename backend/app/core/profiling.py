@@ -0,0 +1,402 @@
+"""
+Opt-in request profiling, for finding where the time of a slow request went.
+
+``ProfilingMiddleware`` is only added when ``PROFILING_ENABLED``; it then
+profiles a request when an admin sends ``X-Profile: 1`` (or ``sampling`` /
+``deterministic``), and a random ``PROFILE_SAMPLE_RATE`` share of all
+requests. Profiled responses carry ``X-Profile-Id``, and the last
+``PROFILE_BUFFER_SIZE`` profiles of the process are kept in
+``profile_store`` (served under ``/api/admin/profiles``).
+
+- ``sampling`` (default): a thread samples the event loop thread's stack
+  every ``PROFILE_INTERVAL_MS`` and keeps the stacks of this request's code.
+  Time the request spent awaiting (sync dependencies in the threadpool,
+  other requests' turns) is recorded as ``<awaiting>``.
+- ``deterministic``: cProfile on the event loop thread while the request
+  runs, with exact call counts. Code of concurrent requests that runs in
+  between is included, and only one such profile runs at a time per process
+  (others fall back to sampling).
+
+Each profile splits its time into sql, validation (pydantic), analysis
+(``app/core/investment.py``), serialization (JSON encoding, response
+rendering), app (everything else) and await, keeps the request's SQL stats
+and, with ``PROFILE_TRACEMALLOC``, what the request allocated and where.
+Profiles download as pstats or speedscope JSON.
+"""
+import cProfile
+import itertools
+import json
+import marshal
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+from ..database import request_sql_stats
+
+PROFILE_MODES = ("sampling", "deterministic")
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# pstats function key: (file, first line, name); C functions have file "~"
+FunctionKey = Tuple[str, int, str]
+AWAITING: FunctionKey = ("~", 0, "<awaiting>")
+
+# First match from the innermost frame outwards decides a sample's category.
+BREAKDOWN_RULES = (
+    ("sql", ("/sqlalchemy/", "/psycopg", "sqlite3")),
+    ("validation", ("/pydantic", "pydantic_core")),
+    ("analysis", ("/app/core/investment.py",)),
+    ("serialization", ("/json/", "_json", "/fastapi/encoders.py", "/starlette/responses.py")),
+)
+BREAKDOWN_CATEGORIES = tuple(name for name, _ in BREAKDOWN_RULES) + ("app", "await")
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 10
+
+_deterministic_lock = threading.Lock()
+
+
+def _category(function: FunctionKey) -> Optional[str]:
+    if function == AWAITING:
+        return "await"
+    file, _, name = function
+    where = f"{file}:{name}".replace("\\", "/")
+    for category, patterns in BREAKDOWN_RULES:
+        if any(pattern in where for pattern in patterns):
+            return category
+    return None
+
+
+def _label(function: FunctionKey) -> str:
+    file, line, name = function
+    return name if file == "~" else f"{file}:{line}({name})"
+
+
+class _Sampler(threading.Thread):
+    """Samples one thread's stack below ``marker`` (the profiled request's frame).
+
+    ``enable``/``disable`` like ``cProfile.Profile``.
+    """
+
+    def __init__(self, thread_id: int, marker, interval: float):
+        super().__init__(name="rentiq-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.marker = marker
+        self.interval = interval
+        # Stack (outermost first) -> seconds
+        self.samples: Dict[Tuple[FunctionKey, ...], float] = {}
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        last = time.perf_counter()
+        while not self._done.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def enable(self) -> None:
+        self.start()
+
+    def disable(self) -> None:
+        self._done.set()
+        self.join()
+
+    def _sample(self, seconds: float) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None and frame is not self.marker:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        # The marker is only on the stack while the loop runs this request.
+        key = tuple(reversed(stack)) if frame is not None else (AWAITING,)
+        self.samples[key] = self.samples.get(key, 0.0) + seconds
+
+
+def _sampled_stats(samples: Dict[Tuple[FunctionKey, ...], float]) -> Dict[FunctionKey, tuple]:
+    """pstats-style stats from samples; call counts are sample counts."""
+    counts: Dict[FunctionKey, List[float]] = {}  # function -> [samples, self, cumulative]
+    callers: Dict[FunctionKey, Dict[FunctionKey, List[float]]] = {}
+    for stack, seconds in samples.items():
+        if not stack:
+            continue
+        for function in set(stack):
+            entry = counts.setdefault(function, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[2] += seconds
+        counts[stack[-1]][1] += seconds
+        for caller, callee in set(zip(stack, stack[1:])):
+            edge = callers.setdefault(callee, {}).setdefault(caller, [0, 0.0, 0.0])
+            edge[0] += 1
+            edge[2] += seconds
+            if callee == stack[-1]:
+                edge[1] += seconds
+    return {
+        function: (
+            n, n, self_seconds, cumulative,
+            {caller: (e[0], e[0], e[1], e[2]) for caller, e in callers.get(function, {}).items()},
+        )
+        for function, (n, self_seconds, cumulative) in counts.items()
+    }
+
+
+class _Allocations:
+    """tracemalloc over one request; tracing runs while any profiled request needs it."""
+
+    _lock = threading.Lock()
+    _active = 0
+    _started = False
+    _filters = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    )
+
+    def __init__(self):
+        with _Allocations._lock:
+            if _Allocations._active == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _Allocations._started = True
+            _Allocations._active += 1
+        tracemalloc.reset_peak()
+        self.before = tracemalloc.take_snapshot().filter_traces(self._filters)
+        self.current = tracemalloc.get_traced_memory()[0]
+
+    def stop(self) -> Dict[str, Any]:
+        after = tracemalloc.take_snapshot().filter_traces(self._filters)
+        peak = tracemalloc.get_traced_memory()[1]
+        with _Allocations._lock:
+            _Allocations._active -= 1
+            if _Allocations._active == 0 and _Allocations._started:
+                tracemalloc.stop()
+                _Allocations._started = False
+        grown = [diff for diff in after.compare_to(self.before, "lineno") if diff.size_diff > 0]
+        return {
+            "allocated_kb": round(sum(diff.size_diff for diff in grown) / 1024, 1),
+            "peak_kb": round(max(0, peak - self.current) / 1024, 1),
+            "top": [
+                {
+                    "site": f"{diff.traceback[0].filename}:{diff.traceback[0].lineno}",
+                    "size_kb": round(diff.size_diff / 1024, 1),
+                    "count": diff.count_diff,
+                }
+                for diff in grown[:TOP_ALLOCATIONS]
+            ],
+        }
+
+
+class RequestProfile:
+    """One profiled request: summary figures, pstats-style stats and, if sampled, its stacks."""
+
+    def __init__(self, profile_id: int, method: str, path: str, mode: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.mode = mode
+        self.route: Optional[str] = None
+        self.status_code = 500
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.breakdown: Dict[str, float] = {}
+        self.sql: Optional[Dict[str, Any]] = None
+        self.memory: Optional[Dict[str, Any]] = None
+        self.stats: Dict[FunctionKey, tuple] = {}
+        self.samples: Optional[Dict[Tuple[FunctionKey, ...], float]] = None
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "breakdown": self.breakdown,
+            "sql": self.sql,
+            "memory": self.memory,
+        }
+
+    def detail(self) -> Dict[str, Any]:
+        """The summary plus the functions with the most cumulative time."""
+        heaviest = sorted(self.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        functions = [
+            {
+                "function": _label(function),
+                "calls": nc,
+                "self_ms": round(tt * 1000, 3),
+                "cumulative_ms": round(ct * 1000, 3),
+            }
+            for function, (_, nc, tt, ct, _) in heaviest
+        ]
+        return {**self.summary(), "functions": functions}
+
+    def pstats(self) -> bytes:
+        """The stats in the format ``pstats.Stats`` (and snakeviz) load from a file."""
+        return marshal.dumps(self.stats)
+
+    def speedscope(self) -> Optional[str]:
+        """speedscope JSON (https://www.speedscope.app); sampled profiles only."""
+        if self.samples is None:
+            return None
+        frames: Dict[FunctionKey, int] = {}
+        stacks, weights = [], []
+        for stack, seconds in self.samples.items():
+            stacks.append([frames.setdefault(function, len(frames)) for function in stack])
+            weights.append(round(seconds * 1000, 3))
+        name = f"{self.method} {self.path}"
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "rentiq",
+            "shared": {"frames": [
+                {"name": function[2]} if function[0] == "~"
+                else {"name": function[2], "file": function[0], "line": function[1]}
+                for function in frames
+            ]},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 3),
+                "samples": stacks,
+                "weights": weights,
+            }],
+        })
+
+    def _finish_sampled(self, samples: Dict[Tuple[FunctionKey, ...], float]) -> None:
+        self.samples = samples
+        self.stats = _sampled_stats(samples)
+        breakdown = dict.fromkeys(BREAKDOWN_CATEGORIES, 0.0)
+        for stack, seconds in samples.items():
+            category = next(filter(None, map(_category, reversed(stack))), "app")
+            breakdown[category] += seconds
+        self.breakdown = {name: round(seconds * 1000, 3) for name, seconds in breakdown.items()}
+
+    def _finish_deterministic(self, profiler: cProfile.Profile) -> None:
+        profiler.create_stats()
+        self.stats = profiler.stats
+        breakdown = dict.fromkeys(BREAKDOWN_CATEGORIES, 0.0)
+        for function, (_, _, tt, _, _) in self.stats.items():
+            breakdown[_category(function) or "app"] += tt
+        # cProfile sees no awaiting; it is the wall time the functions do not account for
+        breakdown["await"] = max(0.0, self.duration_ms / 1000 - sum(breakdown.values()))
+        self.breakdown = {name: round(seconds * 1000, 3) for name, seconds in breakdown.items()}
+
+
+class ProfileStore:
+    """The last ``size`` profiles of this process, newest first."""
+
+    def __init__(self, size: int):
+        self._profiles: deque = deque(maxlen=size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.appendleft(profile)
+
+    def get(self, profile_id: int) -> Optional[RequestProfile]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile.id == profile_id), None)
+
+    def snapshot(self) -> List[RequestProfile]:
+        with self._lock:
+            return list(self._profiles)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore(settings.PROFILE_BUFFER_SIZE)
+
+
+def _is_admin(authorization: Optional[bytes]) -> bool:
+    if not authorization or not authorization.startswith(b"Bearer "):
+        return False
+    from .security import decode_access_token
+
+    return decode_access_token(authorization[len(b"Bearer "):].decode("latin-1")) in settings.ADMIN_EMAILS
+
+
+def requested_mode(scope) -> Optional[str]:
+    """The profiler to run for this request, or None to just serve it."""
+    requested = authorization = None
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            requested = value
+        elif name == b"authorization":
+            authorization = value
+    if requested is not None and _is_admin(authorization):
+        mode = requested.decode("latin-1").strip().lower()
+        return mode if mode in PROFILE_MODES else settings.PROFILE_MODE
+    if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return settings.PROFILE_MODE
+    return None
+
+
+class ProfilingMiddleware:
+    """Profile admin-requested and randomly sampled requests into ``profile_store``."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        if mode == "deterministic" and not _deterministic_lock.acquire(blocking=False):
+            mode = "sampling"
+        query = scope.get("query_string", b"").decode("latin-1")
+        profile = RequestProfile(
+            profile_store.next_id(), scope["method"], scope["path"] + (f"?{query}" if query else ""), mode
+        )
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (PROFILE_ID_HEADER, str(profile.id).encode())],
+                }
+            await send(message)
+
+        allocations = _Allocations() if settings.PROFILE_TRACEMALLOC else None
+        if mode == "deterministic":
+            profiler = cProfile.Profile()
+        else:
+            profiler = _Sampler(threading.get_ident(), sys._getframe(), settings.PROFILE_INTERVAL_MS / 1000)
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            profile.duration_ms = round((time.perf_counter() - started) * 1000, 3)
+            if mode == "deterministic":
+                _deterministic_lock.release()
+                profile._finish_deterministic(profiler)
+            else:
+                profile._finish_sampled(profiler.samples)
+            if allocations is not None:
+                profile.memory = allocations.stop()
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None)
+            stats = request_sql_stats.get()
+            if stats is not None:
+                profile.sql = {"queries": stats.queries, "db_ms": round(stats.db_seconds * 1000, 3)}
+            profile_store.add(profile)
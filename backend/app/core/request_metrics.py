@@ -0,0 +1,88 @@
+"""
+Per-route aggregation of request SQL stats.
+
+The request middleware in ``app.main`` hands each finished request's
+``QueryStats`` to ``route_stats``, keyed by method and route template
+(``GET /api/properties/{property_id}``), and renders the same figures as
+a ``Server-Timing`` header. Stats are kept per process since start-up or
+the last reset.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from ..database import QueryStats
+
+
+def server_timing(stats: QueryStats, seconds: float) -> str:
+    """``Server-Timing`` header value: DB time and query count, pool wait and total time."""
+    return (
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries", '
+        f"pool;dur={stats.pool_wait_seconds * 1000:.2f}, "
+        f"total;dur={seconds * 1000:.2f}"
+    )
+
+
+class _RouteTotals:
+    __slots__ = ("requests", "seconds", "db_seconds", "pool_wait_seconds", "queries", "max_queries", "slow_queries")
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.queries = 0
+        self.max_queries = 0
+        self.slow_queries = 0
+
+
+class RouteStatsRegistry:
+    """Running totals per route; ``snapshot`` lists routes by total DB time, heaviest first."""
+
+    def __init__(self):
+        self._routes: Dict[str, _RouteTotals] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: QueryStats, seconds: float) -> None:
+        with self._lock:
+            totals = self._routes.get(route)
+            if totals is None:
+                totals = self._routes[route] = _RouteTotals()
+            totals.requests += 1
+            totals.seconds += seconds
+            totals.db_seconds += stats.db_seconds
+            totals.pool_wait_seconds += stats.pool_wait_seconds
+            totals.queries += stats.queries
+            totals.max_queries = max(totals.max_queries, stats.queries)
+            totals.slow_queries += stats.slow_queries
+
+    def get(self, route: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            totals = self._routes.get(route)
+            return None if totals is None else self._row(route, totals)
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        with self._lock:
+            rows = [self._row(route, totals) for route, totals in self._routes.items()]
+        return sorted(rows, key=lambda row: row["db_ms_total"], reverse=True)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+    @staticmethod
+    def _row(route: str, totals: _RouteTotals) -> Dict[str, object]:
+        requests = totals.requests
+        return {
+            "route": route,
+            "requests": requests,
+            "avg_ms": round(totals.seconds * 1000 / requests, 2),
+            "db_ms_total": round(totals.db_seconds * 1000, 2),
+            "avg_db_ms": round(totals.db_seconds * 1000 / requests, 2),
+            "avg_queries": round(totals.queries / requests, 2),
+            "max_queries": totals.max_queries,
+            "pool_wait_ms_total": round(totals.pool_wait_seconds * 1000, 2),
+            "slow_queries": totals.slow_queries,
+        }
+
+
+route_stats = RouteStatsRegistry()
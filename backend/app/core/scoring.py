@@ -118,7 +118,7 @@ def _property_type_points(property_type: str) -> float:
     return weights.get(normalized, weights["default"])
 
 
-def _derive_crime_risk(
+def derive_crime_risk(
     crime_rate: Optional[float],
     violent_crime: Optional[float],
     property_crime: Optional[float],
@@ -153,34 +153,26 @@ def _derive_crime_risk(
     return _clamp(rate)
 
 
-def calculate_profitability_score(
+def calculate_base_score(
     price: Decimal,
     size_sqft: int,
     estimated_rent: Optional[Decimal],
     year_built: Optional[int],
     property_type: str,
-    crime_rate: Optional[float] = None,
-    violent_crime: Optional[float] = None,
-    property_crime: Optional[float] = None,
     days_on_market: Optional[float] = None,
     is_hot: Optional[bool] = None,
     is_new_listing: Optional[bool] = None,
     search_status: Optional[str] = None,
-    lagged_cpi: Optional[float] = None,
-    fed_rate: Optional[float] = None,
-    lagged_unemployment: Optional[float] = None,
-    volatility_value: Optional[float] = None,
-    nr_weeks: Optional[float] = None,
     bathrooms: Optional[float] = None,
     lot_area: Optional[float] = None,
     is_virtual_tour: Optional[bool] = None,
-) -> float:
-    """Calculate a 0-100 profitability score using only persisted property fields.
+) -> Optional[float]:
+    """Everything in the profitability score except the crime and macro components, unclamped.
 
-    Inputs come from DB fields plus optional CSV market features when available.
+    Returns None when price or size is missing (the score is then 0).
     """
     if not price or price <= 0 or not size_sqft or size_sqft <= 0:
-        return 0.0
+        return None
 
     score = 0.0
 
@@ -296,7 +288,84 @@ def calculate_profitability_score(
         elif status_norm in {"PENDING", "CONTINGENT"}:
             score += market_cfg["status_pending"]
 
-    # 8) Macro and city-level risk controls (-30 to +2)
+    return score
+
+
+def calculate_profitability_score(
+    price: Decimal,
+    size_sqft: int,
+    estimated_rent: Optional[Decimal],
+    year_built: Optional[int],
+    property_type: str,
+    crime_rate: Optional[float] = None,
+    violent_crime: Optional[float] = None,
+    property_crime: Optional[float] = None,
+    days_on_market: Optional[float] = None,
+    is_hot: Optional[bool] = None,
+    is_new_listing: Optional[bool] = None,
+    search_status: Optional[str] = None,
+    lagged_cpi: Optional[float] = None,
+    fed_rate: Optional[float] = None,
+    lagged_unemployment: Optional[float] = None,
+    volatility_value: Optional[float] = None,
+    nr_weeks: Optional[float] = None,
+    bathrooms: Optional[float] = None,
+    lot_area: Optional[float] = None,
+    is_virtual_tour: Optional[bool] = None,
+) -> float:
+    """Calculate a 0-100 profitability score using only persisted property fields.
+
+    Inputs come from DB fields plus optional CSV market features when available.
+    """
+    base = calculate_base_score(
+        price=price,
+        size_sqft=size_sqft,
+        estimated_rent=estimated_rent,
+        year_built=year_built,
+        property_type=property_type,
+        days_on_market=days_on_market,
+        is_hot=is_hot,
+        is_new_listing=is_new_listing,
+        search_status=search_status,
+        bathrooms=bathrooms,
+        lot_area=lot_area,
+        is_virtual_tour=is_virtual_tour,
+    )
+    if base is None:
+        return 0.0
+    crime = calculate_crime_points(derive_crime_risk(crime_rate, violent_crime, property_crime))
+    macro = calculate_macro_points(lagged_cpi, fed_rate, lagged_unemployment, volatility_value, nr_weeks)
+    return combine_score(base, crime, macro)
+
+
+def combine_score(base: float, *components: float) -> float:
+    """Final 0-100 score from the stored base score and its shared components (crime, macro points)."""
+    score = base
+    for points in components:
+        score += points
+    return round(_clamp(score), 2)
+
+
+def calculate_crime_points(crime_risk: Optional[float]) -> float:
+    """Crime component of the score: a penalty of up to 20 points for a 0-100 city crime risk."""
+    if crime_risk is None:
+        return 0.0
+    return -(crime_risk / 100.0) * SCORE_CONFIG["crime"]["max_penalty"]
+
+
+def calculate_macro_points(
+    lagged_cpi: Optional[float] = None,
+    fed_rate: Optional[float] = None,
+    lagged_unemployment: Optional[float] = None,
+    volatility_value: Optional[float] = None,
+    nr_weeks: Optional[float] = None,
+) -> float:
+    """Macro component of the score (-20 to +4).
+
+    Kept separate so a change in rates or unemployment can rescore homes
+    from their stored ``score_base`` without recomputing anything else.
+    """
+    score = 0.0
     macro_cfg = SCORE_CONFIG["macro_points"]
     if lagged_unemployment is not None:
         u = float(lagged_unemployment)
@@ -341,12 +410,7 @@ def calculate_profitability_score(
     if nr_weeks is not None and float(nr_weeks) > 8:
         score += macro_cfg["nr_weeks_gt8"]
 
-    # 9) Crime risk penalty (subtract up to 20 points)
-    crime_risk = _derive_crime_risk(crime_rate, violent_crime, property_crime)
-    if crime_risk is not None:
-        score -= (crime_risk / 100.0) * SCORE_CONFIG["crime"]["max_penalty"]
-
-    return round(_clamp(score), 2)
+    return score
 
 
 def estimate_monthly_rent(price: Decimal, size_sqft: int, bedrooms: int) -> Decimal:
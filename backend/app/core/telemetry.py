@@ -0,0 +1,244 @@
+"""
+Prometheus metrics for the API, served at ``/metrics``.
+
+- ``PrometheusMiddleware`` (plain ASGI, so no extra task or request object
+  per request) counts requests and observes their latency per method and
+  route template, and tracks requests in flight.
+- ``observe_pool`` keeps connection pool gauges (configured size, open,
+  checked out, overflow) from pool events, so a scrape never touches the pool.
+- ``record_cache_lookup`` counts hits and misses per cache; the hit ratio is
+  ``rate(..{result="hit"}) / rate(..)`` in PromQL.
+- ``JobGaugeCollector`` reads background jobs, loader checkpoints/manifest
+  and score component tables at scrape time.
+
+Several uvicorn workers: start them with ``PROMETHEUS_MULTIPROC_DIR`` set to
+an empty directory shared by the workers. Each worker then writes its
+values to memory-mapped files there, and ``render_metrics`` merges all of
+them, whichever worker answers the scrape. Gauges are summed over live
+workers; a worker that shuts down removes its gauge files.
+"""
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import Session
+
+from ..models import CityRisk, Job, LoadCheckpoint, LoadManifest, MacroIndicator
+
+logger = logging.getLogger(__name__)
+
+# Requests that matched no route share one label, so scanners cannot blow up the series count.
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUESTS = Counter(
+    "rentiq_http_requests_total", "HTTP requests served.", ["method", "route", "status"]
+)
+REQUEST_SECONDS = Histogram(
+    "rentiq_http_request_duration_seconds",
+    "Time to serve an HTTP request, including streaming the body.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+IN_FLIGHT = Gauge(
+    "rentiq_http_requests_in_flight", "HTTP requests being served.", multiprocess_mode="livesum"
+)
+
+POOL_SIZE = Gauge(
+    "rentiq_db_pool_size", "Configured connection pool size.", ["engine"], multiprocess_mode="livesum"
+)
+POOL_CONNECTIONS = Gauge(
+    "rentiq_db_pool_connections", "Open pooled connections.", ["engine"], multiprocess_mode="livesum"
+)
+POOL_CHECKED_OUT = Gauge(
+    "rentiq_db_pool_checked_out", "Connections checked out of the pool.", ["engine"], multiprocess_mode="livesum"
+)
+POOL_OVERFLOW = Gauge(
+    "rentiq_db_pool_overflow", "Open connections beyond the pool size.", ["engine"], multiprocess_mode="livesum"
+)
+
+CACHE_LOOKUPS = Counter(
+    "rentiq_cache_lookups_total", "Cache lookups by outcome (hit or miss).", ["cache", "result"]
+)
+
+
+def multiprocess_dir() -> Optional[str]:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class PrometheusMiddleware:
+    """Count and time every HTTP request by method, route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500  # If the app raises before starting a response
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            # The router records the matched route in the (shared) scope.
+            route = scope.get("route")
+            path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            REQUESTS.labels(method, path, str(status_code)).inc()
+            REQUEST_SECONDS.labels(method, path).observe(elapsed)
+
+
+def observe_pool(engine: Engine, name: str) -> None:
+    """Keep the pool gauges of ``engine`` current, labelled ``engine=name``."""
+    pool = engine.pool
+    queued = isinstance(pool, QueuePool)
+    size = pool.size() if queued else 0
+    POOL_SIZE.labels(name).set(size)
+    connections = POOL_CONNECTIONS.labels(name)
+    checked_out = POOL_CHECKED_OUT.labels(name)
+    overflow = POOL_OVERFLOW.labels(name)
+    # Connections opened before the listeners exist (e.g. by create_all)
+    opened = [pool.checkedin() + pool.checkedout() if queued else 0]
+    checked_out.set(pool.checkedout() if queued else 0)
+
+    def set_open(delta: int) -> None:
+        opened[0] += delta
+        connections.set(opened[0])
+        overflow.set(max(0, opened[0] - size))
+
+    set_open(0)
+
+    event.listen(pool, "connect", lambda *args: set_open(1))
+    event.listen(pool, "close", lambda *args: set_open(-1))
+    event.listen(pool, "close_detached", lambda *args: set_open(-1))
+    event.listen(pool, "checkout", lambda *args: checked_out.inc())
+    event.listen(pool, "checkin", lambda *args: checked_out.dec())
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:  # SQLite returns naive UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class JobGaugeCollector:
+    """Loader and rescoring state, read from the database when scraped."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def collect(self):
+        try:
+            families = list(self._families())
+        except SQLAlchemyError as e:
+            logger.warning("Job metrics unavailable: %s", e)
+            self.db.rollback()
+            return
+        yield from families
+
+    def _families(self):
+        jobs = Job.__table__
+        background = GaugeMetricFamily("rentiq_jobs", "Background jobs by kind and status.", labels=["kind", "status"])
+        for kind, status, count in self.db.execute(
+            select(jobs.c.kind, jobs.c.status, func.count()).group_by(jobs.c.kind, jobs.c.status)
+        ):
+            background.add_metric([kind, status], count)
+        yield background
+
+        checkpoints = LoadCheckpoint.__table__
+        jobs = GaugeMetricFamily("rentiq_load_jobs", "Loads (checkpoints) by status.", labels=["status"])
+        rows = GaugeMetricFamily("rentiq_load_rows", "Rows loaded by loads in each status.", labels=["status"])
+        for status, count, loaded in self.db.execute(
+            select(checkpoints.c.status, func.count(), func.coalesce(func.sum(checkpoints.c.loaded_count), 0))
+            .group_by(checkpoints.c.status)
+        ):
+            jobs.add_metric([status], count)
+            rows.add_metric([status], loaded)
+        yield jobs
+        yield rows
+
+        last_progress = self.db.execute(
+            select(func.max(checkpoints.c.updated_at)).where(checkpoints.c.status == "running")
+        ).scalar()
+        progress = GaugeMetricFamily(
+            "rentiq_load_last_progress_timestamp_seconds",
+            "Last committed batch of any running load (absent when none is running).",
+        )
+        if last_progress is not None:
+            progress.add_metric([], _timestamp(last_progress))
+        yield progress
+
+        manifest = LoadManifest.__table__
+        files = GaugeMetricFamily("rentiq_load_files", "Loaded files (manifest entries) by status.", labels=["status"])
+        for status, count in self.db.execute(
+            select(manifest.c.status, func.count()).group_by(manifest.c.status)
+        ):
+            files.add_metric([status], count)
+        yield files
+
+        rows = GaugeMetricFamily(
+            "rentiq_score_component_rows", "Stored score component rows.", labels=["component"]
+        )
+        updated = GaugeMetricFamily(
+            "rentiq_score_component_updated_timestamp_seconds",
+            "Last change to a score component, after which its homes were rescored.",
+            labels=["component"],
+        )
+        for component, model in (("city_risk", CityRisk), ("macro", MacroIndicator)):
+            count, last = self.db.execute(select(func.count(), func.max(model.__table__.c.updated_at))).one()
+            rows.add_metric([component], count)
+            if last is not None:
+                updated.add_metric([component], _timestamp(last))
+        yield rows
+        yield updated
+
+
+def render_metrics(db: Session) -> Tuple[bytes, str]:
+    """Exposition of every worker's metrics plus the job gauges, and its content type."""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    jobs = CollectorRegistry(auto_describe=False)
+    jobs.register(JobGaugeCollector(db))
+    return generate_latest(registry) + generate_latest(jobs), CONTENT_TYPE_LATEST
+
+
+def mark_worker_stopped() -> None:
+    """Drop this worker's live gauges (in flight, pool) from the merged view."""
+    if multiprocess_dir():
+        multiprocess.mark_process_dead(os.getpid())
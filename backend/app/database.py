@@ -1,19 +1,207 @@
 """
 Database connection and session management.
 Uses SQLAlchemy for ORM and connection pooling.
+
+Writes (and anything a user must see right after writing it) go to the
+primary ``engine``. Read-heavy routes (search, property detail, analysis)
+can be served by read replicas listed in ``DATABASE_READ_URLS``; see
+``get_read_db``.
+
+How engines pool connections depends on ``DB_DEPLOYMENT_MODE``: long-running
+servers keep a pool per worker, serverless instances (Lambda) keep a tiny one
+across warm invocations; see ``engine_options``.
+
+All engines are instrumented: while a request is being served (the
+middleware in ``app.main`` sets ``request_sql_stats``), each statement
+adds to that request's query count and DB time, pool checkouts add their
+wait, and statements slower than ``SLOW_QUERY_MS`` are logged.
 """
-from sqlalchemy import create_engine
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from fastapi import Depends, Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """SQL activity of one request."""
+
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds", "slow_queries")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.slow_queries = 0
+
+
+# Set by the request middleware; None outside requests (loader, scripts), which are not instrumented.
+request_sql_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_sql_stats", default=None)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that charges the time spent getting a connection (waiting, reconnecting) to the current request."""
+
+    def connect(self):
+        stats = request_sql_stats.get()
+        if stats is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            stats.pool_wait_seconds += time.perf_counter() - started
+
+
+def _explain(connection, statement: str, parameters: Any) -> Optional[str]:
+    """Plan of a slow SELECT, fetched on a separate DBAPI cursor so the pending result is untouched.
+
+    On PostgreSQL it runs inside a savepoint: a failed EXPLAIN (e.g. parameters
+    it cannot bind) would otherwise abort the request's transaction.
+    """
+    prefix = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}.get(connection.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    savepoint = connection.dialect.name == "postgresql"
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(prefix + statement, parameters)
+            plan = "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+        except Exception:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            raise
+        if savepoint:
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        return plan
+    except Exception as e:
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        cursor.close()
+
+
+# Registered on the Engine class, so every engine (replicas and test engines included) is covered.
+# The start time lives on the statement's execution context, so a statement that raises leaves nothing behind.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    if context is not None and request_sql_stats.get() is not None:
+        context.query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    stats = request_sql_stats.get()
+    started = getattr(context, "query_started", None)
+    if stats is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    stats.queries += 1
+    stats.db_seconds += elapsed
+    if elapsed * 1000 < settings.SLOW_QUERY_MS:
+        return
+    stats.slow_queries += 1
+    plan = _explain(connection, statement, parameters) if settings.SLOW_QUERY_EXPLAIN and not executemany else None
+    logger.warning(
+        "Slow query (%.1f ms): %s | parameters: %.500r%s",
+        elapsed * 1000,
+        " ".join(statement.split()),
+        parameters,
+        f"\n{plan}" if plan else "",
+    )
+
+
+# (pool_size, max_overflow) per DB_DEPLOYMENT_MODE
+DEPLOYMENT_POOL_SIZES = {
+    "server": (10, 20),
+    "serverless": (1, 2),  # One request at a time per instance; overflow closes on return
+}
+
+
+def pgbouncer_connect_args(url: str) -> Dict[str, Any]:
+    """Driver arguments for PgBouncer's transaction mode: no server-side prepared statements.
+
+    psycopg2 never prepares server-side; psycopg 3 does after a few executions.
+    """
+    if make_url(url).get_driver_name() == "psycopg":
+        return {"prepare_threshold": None}
+    return {}
+
+
+def engine_options(url: str, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Pool (and driver) arguments for ``create_engine`` in a deployment mode."""
+    mode = mode or settings.DB_DEPLOYMENT_MODE
+    if mode not in DEPLOYMENT_POOL_SIZES:
+        raise ValueError(f"Unknown DB_DEPLOYMENT_MODE {mode!r}; expected one of {', '.join(DEPLOYMENT_POOL_SIZES)}")
+    pool_size, max_overflow = DEPLOYMENT_POOL_SIZES[mode]
+    if settings.DB_POOL_SIZE is not None:
+        pool_size = settings.DB_POOL_SIZE
+    if settings.DB_MAX_OVERFLOW is not None:
+        max_overflow = settings.DB_MAX_OVERFLOW
+
+    if pool_size == 0:
+        # A connection per session, closed when it ends (or when PgBouncer does the pooling)
+        options: Dict[str, Any] = {"poolclass": NullPool}
+    else:
+        options = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_pre_ping": True,  # Verify connections before using
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+        }
+        if mode == "serverless":
+            options["pool_recycle"] = settings.DB_POOL_RECYCLE_SECONDS
+    if settings.DB_PGBOUNCER:
+        options["connect_args"] = pgbouncer_connect_args(url)
+    return options
+
+
+def replace_idle_connections(engine, idle_seconds: float) -> None:
+    """Reconnect instead of reusing a pooled connection idle for ``idle_seconds`` or more.
+
+    A frozen Lambda instance keeps its connection for as long as it sleeps;
+    by then the server or a proxy has often dropped it.
+    """
+    @event.listens_for(engine.pool, "checkin")
+    def _checked_in(dbapi_connection, connection_record):
+        if connection_record is not None:
+            connection_record.info["idle_since"] = time.monotonic()
+
+    @event.listens_for(engine.pool, "checkout")
+    def _checking_out(dbapi_connection, connection_record, connection_proxy):
+        idle_since = connection_record.info.pop("idle_since", None)
+        if idle_since is not None and time.monotonic() - idle_since >= idle_seconds:
+            # The pool closes this connection and checks out a fresh one.
+            raise DisconnectionError("connection idle too long")
+
+
+def create_pooled_engine(url: str, mode: Optional[str] = None, **kwargs):
+    """Engine with the app's pool settings; pool waits are charged to the current request."""
+    options = engine_options(url, mode)
+    connect_args = {**options.pop("connect_args", {}), **kwargs.pop("connect_args", {})}
+    if connect_args:
+        options["connect_args"] = connect_args
+    pooled_engine = create_engine(url, **options, **kwargs)
+    if (mode or settings.DB_DEPLOYMENT_MODE) == "serverless" and isinstance(pooled_engine.pool, QueuePool):
+        replace_idle_connections(pooled_engine, settings.DB_POOL_IDLE_SECONDS)
+    return pooled_engine
+
+
 # Create database engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using
-    pool_size=10,
-    max_overflow=20
-)
+engine = create_pooled_engine(settings.DATABASE_URL)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -22,6 +210,70 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def create_read_engine(url: str):
+    """Engine for a read replica; PostgreSQL replicas also open read-only transactions."""
+    read_engine = create_pooled_engine(url)
+    if read_engine.dialect.name == "postgresql":
+        read_engine = read_engine.execution_options(postgresql_readonly=True)
+    return read_engine
+
+
+read_engines = [create_read_engine(url) for url in settings.DATABASE_READ_URLS]
+
+
+# Response header carrying the time (Unix seconds) of the caller's last write.
+# Clients send it back on later requests, so read-your-writes holds whichever
+# worker or instance serves them.
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+class ReadReplicaRouter:
+    """
+    Hands out replica sessions round-robin, with read-your-writes stickiness.
+
+    A client that committed a write within the last ``sticky_seconds``
+    (e.g. added a favorite) is served by the primary instead, so it never
+    reads a replica that has not caught up with its own change yet. The
+    write time comes from the client (``LAST_WRITE_HEADER``), so the router
+    keeps no state: any process can route any request.
+    """
+
+    def __init__(self, replicas: List[sessionmaker], sticky_seconds: float):
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self._turn = itertools.count()
+
+    def is_sticky(self, last_write: Optional[str]) -> bool:
+        """Whether a client whose last write was at ``last_write`` (Unix seconds) must read the primary."""
+        try:
+            written = float(last_write)
+        except (TypeError, ValueError):
+            return False
+        return time.time() - written < self.sticky_seconds
+
+    def replica_session(self, last_write: Optional[str] = None) -> Optional[Session]:
+        """A session on the next replica, or None when the primary should serve this client."""
+        if not self.replicas or self.is_sticky(last_write):
+            return None
+        return self.replicas[next(self._turn) % len(self.replicas)]()
+
+
+read_router = ReadReplicaRouter(
+    [sessionmaker(autocommit=False, autoflush=False, bind=read_engine) for read_engine in read_engines],
+    settings.READ_YOUR_WRITES_SECONDS,
+)
+
+# Session.info key holding the response of the request a write session works for.
+_WRITE_RESPONSE = "read_your_writes_response"
+
+
+@event.listens_for(Session, "after_commit")
+def _report_client_write(session: Session) -> None:
+    response = session.info.get(_WRITE_RESPONSE)
+    if response is not None:
+        response.headers[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+
+
 def get_db():
     """
     Dependency that provides a database session.
@@ -32,3 +284,35 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_write_db(response: Response, db: Session = Depends(get_db)):
+    """
+    Primary session for routes that write on behalf of the caller.
+
+    Once it commits, the response carries ``LAST_WRITE_HEADER``; while the
+    client sends it back, its reads stay on the primary for
+    ``READ_YOUR_WRITES_SECONDS``.
+    """
+    db.info[_WRITE_RESPONSE] = response
+    try:
+        yield db
+    finally:
+        db.info.pop(_WRITE_RESPONSE, None)
+
+
+def get_read_db(request: Request, primary: Session = Depends(get_db)):
+    """
+    Session for read-only routes: a replica when configured, else the primary.
+
+    The primary session is only created lazily, so it costs no connection
+    when a replica serves the request.
+    """
+    replica = read_router.replica_session(request.headers.get(LAST_WRITE_HEADER))
+    if replica is None:
+        yield primary
+        return
+    try:
+        yield replica
+    finally:
+        replica.close()
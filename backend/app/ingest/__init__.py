@@ -0,0 +1,12 @@
+from .geocoding import GeocodeCache, TokenBucket, ReverseGeocoder, BlockingGeocoder
+from .zip_index import ZipCentroidIndex
+from .bulk import PROPERTY_INSERT_COLUMNS, bulk_insert_properties
+from .parsing import parse_listing, parse_chunk
+from .pipeline import parse_chunks
+
+__all__ = [
+    "GeocodeCache", "TokenBucket", "ReverseGeocoder", "BlockingGeocoder",
+    "ZipCentroidIndex",
+    "PROPERTY_INSERT_COLUMNS", "bulk_insert_properties",
+    "parse_listing", "parse_chunk", "parse_chunks",
+]
@@ -0,0 +1,112 @@
+"""
+Bulk insert path for the CSV loader.
+
+PostgreSQL rows are streamed through ``COPY ... FROM STDIN`` on the raw
+psycopg2 connection. Other dialects (SQLite in tests) fall back to a single
+executemany ``INSERT``. Both skip ORM object construction and the
+unit-of-work entirely, and both let the unique ``dedupe_hash`` index drop
+listings that are already stored.
+"""
+import io
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Table, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+
+from ..models import Property
+
+
+# Columns the loader supplies; ``id`` and ``created_at`` come from the database.
+PROPERTY_INSERT_COLUMNS = [
+    column.name for column in Property.__table__.columns if column.name not in ("id", "created_at")
+]
+
+
+def _copy_text(value: Any) -> str:
+    """Encode one value for COPY's text format."""
+    if value is None:
+        return r"\N"
+    text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def encode_copy_rows(rows: Sequence[Dict[str, Any]], columns: Sequence[str]) -> io.StringIO:
+    """Render rows as a tab-separated COPY text stream."""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_text(row.get(column)) for column in columns))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(connection: Connection, table_name: str, rows: Sequence[Dict[str, Any]], columns: Sequence[str]) -> int:
+    """Stream rows into ``table_name`` with PostgreSQL ``COPY FROM STDIN``."""
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    raw_connection = connection.connection.driver_connection
+    with raw_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY "{table_name}" ({column_list}) FROM STDIN',
+            encode_copy_rows(rows, columns),
+        )
+    return len(rows)
+
+
+def copy_rows_skipping_conflicts(
+    connection: Connection,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    columns: Sequence[str],
+    conflict_column: str,
+) -> int:
+    """COPY into a session temp table, then ``INSERT ... ON CONFLICT DO NOTHING`` into ``table``.
+
+    Returns the number of rows actually inserted.
+    """
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    load_table = f"_{table.name}_load"
+    connection.exec_driver_sql(
+        f'CREATE TEMP TABLE IF NOT EXISTS "{load_table}" AS '
+        f'SELECT {column_list} FROM "{table.name}" WITH NO DATA'
+    )
+    copy_rows(connection, load_table, rows, columns)
+    result = connection.exec_driver_sql(
+        f'INSERT INTO "{table.name}" ({column_list}) SELECT {column_list} FROM "{load_table}" '
+        f'ON CONFLICT ("{conflict_column}") DO NOTHING'
+    )
+    connection.exec_driver_sql(f'TRUNCATE "{load_table}"')
+    return result.rowcount
+
+
+def bulk_insert_properties(
+    connection: Connection,
+    rows: List[Dict[str, Any]],
+    table: Optional[Table] = None,
+) -> int:
+    """Insert parsed property dicts in one round trip and return how many were inserted.
+
+    Rows whose ``dedupe_hash`` already exists are skipped by the database
+    (``ON CONFLICT DO NOTHING``), so concurrent loaders cannot double-insert.
+    Keys that are not ``properties`` columns are ignored, so rows can carry
+    extra loader metadata.
+    """
+    if not rows:
+        return 0
+    table = table if table is not None else Property.__table__
+    values = [{column: row.get(column) for column in PROPERTY_INSERT_COLUMNS} for row in rows]
+
+    if connection.dialect.name == "postgresql":
+        return copy_rows_skipping_conflicts(connection, table, values, PROPERTY_INSERT_COLUMNS, "dedupe_hash")
+
+    if connection.dialect.name == "sqlite":
+        statement = sqlite_insert(table).on_conflict_do_nothing(index_elements=["dedupe_hash"])
+    else:
+        statement = insert(table)
+    result = connection.execute(statement, values)
+    return result.rowcount if result.rowcount is not None and result.rowcount >= 0 else len(values)
@@ -0,0 +1,70 @@
+"""
+Checkpoint and row-offset bookkeeping for resumable CSV loads.
+
+The loader writes its checkpoint in the same transaction as each batch, so
+the stored byte offset never runs ahead of (or behind) what is committed.
+Sparse ``row -> byte offset`` marks collected while reading are stored
+alongside and let a later ``start_row`` seek close to its target instead
+of re-reading the file from the top.
+
+Both are keyed by the resolved file path and a size/mtime fingerprint;
+when the file changes, its old checkpoint and offsets are ignored and
+replaced.
+"""
+import bisect
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models import LoadCheckpoint, LoadRowOffset
+
+
+# Duplicates are detected against the unique properties.dedupe_hash index,
+# so a checkpoint needs no in-memory dedupe state to be restored.
+DEDUPE_STATE = "properties.dedupe_hash"
+
+
+def source_key(path: str) -> str:
+    return str(Path(path).resolve())
+
+
+def source_fingerprint(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_checkpoint(db: Session, source: str) -> Optional[LoadCheckpoint]:
+    return db.query(LoadCheckpoint).filter(LoadCheckpoint.source == source).first()
+
+
+def load_row_offsets(db: Session, source: str, fingerprint: str) -> Dict[int, int]:
+    """Return stored ``{row_num: byte_offset}`` marks, dropping any from an older version of the file."""
+    stale = db.query(LoadRowOffset).filter(
+        LoadRowOffset.source == source, LoadRowOffset.source_fingerprint != fingerprint
+    )
+    if stale.delete(synchronize_session=False):
+        db.commit()
+    rows = db.query(LoadRowOffset.row_num, LoadRowOffset.byte_offset).filter(LoadRowOffset.source == source)
+    return {row_num: byte_offset for row_num, byte_offset in rows}
+
+
+def nearest_row_offset(offsets: Dict[int, int], row_num: int) -> Optional[Tuple[int, int]]:
+    """Return the closest stored ``(row_num, byte_offset)`` at or before ``row_num``."""
+    rows = sorted(offsets)
+    position = bisect.bisect_right(rows, row_num)
+    if position == 0:
+        return None
+    return rows[position - 1], offsets[rows[position - 1]]
+
+
+def add_row_offsets(db: Session, source: str, fingerprint: str, known: Dict[int, int], found: Dict[int, int]) -> int:
+    """Stage marks in ``found`` that are not in ``known`` (updated in place); the caller commits."""
+    new = {row_num: byte_offset for row_num, byte_offset in found.items() if row_num not in known}
+    db.add_all(
+        LoadRowOffset(source=source, source_fingerprint=fingerprint, row_num=row_num, byte_offset=byte_offset)
+        for row_num, byte_offset in new.items()
+    )
+    known.update(new)
+    return len(new)
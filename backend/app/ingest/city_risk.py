@@ -0,0 +1,73 @@
+"""
+City crime risk for the CSV loader and per-city rescoring.
+
+Crime metrics in the feed are city-level and repeat on every listing of a
+city. The loader stores them once per (city, state) in ``city_risk`` with
+the 0-100 risk they give and the score points of that risk, and links
+homes to the row via ``properties.city_risk_id``. Updating one city's
+figures rescores just that city's homes in one set-based ``UPDATE``
+(see ``rescoring``).
+"""
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.engine import Connection
+
+from ..core.scoring import calculate_crime_points, derive_crime_risk
+from ..models import CityRisk, CityRiskStaging, Property
+from .rescoring import SharedComponentCache, rescore_homes
+
+
+CRIME_FIELDS = ("crime_rate", "violent_crime", "property_crime")
+
+
+def city_risk_values(figures: Dict[str, Optional[float]]) -> Dict[str, Any]:
+    """Risk and score points stored with a city's crime figures."""
+    risk = derive_crime_risk(**figures)
+    return {"risk": risk, "crime_points": calculate_crime_points(risk)}
+
+
+def update_city_risk(connection: Connection, city: str, state: str, changes: Dict[str, Optional[float]]) -> Dict[str, int]:
+    """
+    Set a city's crime figures (e.g. ``{"violent_crime": 410.0}``) and rescore its homes.
+
+    Returns the number of ``city_risk`` rows updated (0 if the city was
+    never loaded) and of homes whose score changed.
+    """
+    unknown = set(changes) - set(CRIME_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown crime metric(s): {', '.join(sorted(unknown))}")
+    table = CityRisk.__table__
+    row = connection.execute(
+        select(table).where(func.lower(table.c.city) == city.strip().lower(), table.c.state == state.strip().upper())
+    ).mappings().first()
+    if row is None:
+        return {"cities": 0, "rescored": 0}
+
+    figures = {field: changes.get(field, row[field]) for field in CRIME_FIELDS}
+    derived = city_risk_values(figures)
+    connection.execute(update(table).where(table.c.id == row["id"]).values(**figures, **derived))
+    rescored = 0
+    if derived["crime_points"] != row["crime_points"]:
+        rescored = rescore_homes(connection, Property.__table__.c.city_risk_id == row["id"])
+    return {"cities": 1, "rescored": rescored}
+
+
+class CityRiskCache(SharedComponentCache):
+    """(city, state) -> ``city_risk`` row for one load."""
+
+    table = CityRisk.__table__
+    staging_table = CityRiskStaging.__table__
+    group_columns = ("city", "state")
+    fields = CRIME_FIELDS
+    listing_key = "crime"
+    link_column = "city_risk_id"
+    points_column = "crime_points"
+
+    def group(self, listing: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not listing.get("city"):
+            return None
+        return {"city": listing["city"], "state": listing["state"]}
+
+    def component_values(self, figures: Dict[str, Optional[float]]) -> Dict[str, Any]:
+        return city_risk_values(figures)
@@ -0,0 +1,104 @@
+"""
+Database-side duplicate detection for the CSV loader.
+
+Every loaded listing stores two digests on ``properties``:
+
+- ``dedupe_hash``: ``build_property_dedupe_key`` (unique index; inserts use
+  ``ON CONFLICT DO NOTHING`` against it)
+- ``location_hash``: the home's coordinates or address (plain index; used
+  for the "these coordinates are already loaded" check)
+
+Lookups are one indexed ``IN (...)`` query per chunk, so the loader never
+holds the whole table in memory.
+"""
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import Table, bindparam, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from ..models import Property
+from .parsing import build_location_hash, build_property_dedupe_hash
+
+
+def find_existing_location_hashes(
+    connection: Connection, location_hashes: Iterable[str], table: Optional[Table] = None
+) -> Set[str]:
+    """Return which of ``location_hashes`` are already stored (in ``properties`` unless ``table`` is given)."""
+    return _find_existing(connection, "location_hash", location_hashes, table)
+
+
+def find_existing_dedupe_hashes(
+    connection: Connection, dedupe_hashes: Iterable[str], table: Optional[Table] = None
+) -> Set[str]:
+    """Return which of ``dedupe_hashes`` are already stored (in ``properties`` unless ``table`` is given)."""
+    return _find_existing(connection, "dedupe_hash", dedupe_hashes, table)
+
+
+def _find_existing(connection: Connection, column_name: str, hashes: Iterable[str], table: Optional[Table]) -> Set[str]:
+    hashes = list(set(hashes))
+    if not hashes:
+        return set()
+    column = (table if table is not None else Property.__table__).c[column_name]
+    rows = connection.execute(select(column).where(column.in_(hashes)))
+    return {row[0] for row in rows}
+
+
+def backfill_hashes(engine: Engine, batch_size: int = 5000) -> int:
+    """Fill both hashes for rows that lack them (rows from before the columns existed), oldest first.
+
+    Listings that duplicate an already-hashed row keep a NULL ``dedupe_hash``
+    so the unique index still holds; they can be cleaned up separately.
+    Returns the number of rows updated. On an up-to-date table this is one
+    indexed ``IS NULL`` probe.
+    """
+    updated = 0
+    last_id = 0
+    with engine.connect() as connection:
+        if connection.execute(select(Property.id).where(Property.location_hash.is_(None)).limit(1)).first() is None:
+            return 0
+        while True:
+            # Keyset pagination keeps each read short and works on SQLite too.
+            partition = connection.execute(
+                select(
+                    Property.id,
+                    Property.address,
+                    Property.city,
+                    Property.state,
+                    Property.zip_code,
+                    Property.price,
+                    Property.size_sqft,
+                    Property.bedrooms,
+                    Property.lat,
+                    Property.lng,
+                )
+                .where(Property.location_hash.is_(None), Property.id > last_id)
+                .order_by(Property.id)
+                .limit(batch_size)
+            ).mappings().all()
+            if not partition:
+                break
+
+            dedupe_hashes = [build_property_dedupe_hash(row) for row in partition]
+            taken = set(
+                connection.scalars(
+                    select(Property.dedupe_hash).where(Property.dedupe_hash.in_(set(dedupe_hashes)))
+                )
+            )
+            values = []
+            for row, dedupe_hash in zip(partition, dedupe_hashes):
+                values.append({
+                    "row_id": row["id"],
+                    "new_dedupe_hash": None if dedupe_hash in taken else dedupe_hash,
+                    "new_location_hash": build_location_hash(row),
+                })
+                taken.add(dedupe_hash)
+            connection.execute(
+                update(Property.__table__)
+                .where(Property.__table__.c.id == bindparam("row_id"))
+                .values(dedupe_hash=bindparam("new_dedupe_hash"), location_hash=bindparam("new_location_hash")),
+                values,
+            )
+            connection.commit()
+            updated += len(values)
+            last_id = partition[-1]["id"]
+    return updated
@@ -0,0 +1,261 @@
+"""
+Reverse geocoding for the CSV loader.
+
+Lookups run concurrently on one asyncio loop behind a token-bucket rate
+limiter, share a single HTTP connection pool, retry transient failures with
+exponential backoff and persist results in a small SQLite cache keyed by
+rounded coordinates so reruns never hit the network for a known location.
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from ..config import settings
+from ..core.telemetry import record_cache_lookup
+
+
+GeocodeResult = Optional[Dict[str, Optional[str]]]
+Coordinate = Tuple[float, float]
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class GeocodeCache:
+    """Persistent reverse-geocode cache backed by a local SQLite file.
+
+    Keys are coordinates rounded to ``precision`` decimals (5 decimals is
+    roughly one meter), so nearby reruns of the same listing share an entry.
+    Negative answers ("no address here") are cached too; transport errors are not.
+    """
+
+    def __init__(self, path: Optional[str] = None, precision: Optional[int] = None):
+        self.path = path or settings.GEOCODE_CACHE_PATH
+        self.precision = settings.GEOCODE_CACHE_PRECISION if precision is None else precision
+        self._scale = 10 ** self.precision
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                precision INTEGER NOT NULL,
+                lat_key INTEGER NOT NULL,
+                lng_key INTEGER NOT NULL,
+                address TEXT,
+                zip_code TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (precision, lat_key, lng_key)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def key(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (round(float(lat) * self._scale), round(float(lng) * self._scale))
+
+    def get(self, lat: float, lng: float) -> Tuple[bool, GeocodeResult]:
+        """Return ``(found, result)`` so cached misses can be told apart from unknown keys."""
+        lat_key, lng_key = self.key(lat, lng)
+        row = self._conn.execute(
+            "SELECT address, zip_code FROM geocode_cache WHERE precision = ? AND lat_key = ? AND lng_key = ?",
+            (self.precision, lat_key, lng_key),
+        ).fetchone()
+        record_cache_lookup("geocode", row is not None)
+        if row is None:
+            return False, None
+        if row[0] is None and row[1] is None:
+            return True, None
+        return True, {"address": row[0], "zip_code": row[1]}
+
+    def set(self, lat: float, lng: float, result: GeocodeResult) -> None:
+        lat_key, lng_key = self.key(lat, lng)
+        address = result.get("address") if result else None
+        zip_code = result.get("zip_code") if result else None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?, ?, ?, ?)",
+            (self.precision, lat_key, lng_key, address, zip_code, time.time()),
+        )
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ReverseGeocoder:
+    """Async Nominatim-compatible reverse geocoder with caching, rate limiting and retries.
+
+    Use as an async context manager so the HTTP client (and its keep-alive
+    connections) lives for the whole import rather than one request.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        cache: Optional[GeocodeCache] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        timeout: Optional[float] = None,
+        backoff_seconds: float = 1.0,
+    ):
+        self.base_url = base_url or settings.GEOCODER_URL
+        self.cache = cache
+        self.rate_limiter = TokenBucket(
+            settings.GEOCODER_RATE_LIMIT_PER_SEC if rate_limit is None else rate_limit,
+            settings.GEOCODER_BURST if burst is None else burst,
+        )
+        self.concurrency = concurrency or settings.GEOCODER_CONCURRENCY
+        self.max_retries = settings.GEOCODER_MAX_RETRIES if max_retries is None else max_retries
+        self.timeout = timeout or settings.GEOCODER_TIMEOUT_SECONDS
+        self.backoff_seconds = backoff_seconds
+        self.stats = {"cache_hits": 0, "requests": 0, "retries": 0, "errors": 0}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def __aenter__(self) -> "ReverseGeocoder":
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            headers={"User-Agent": settings.GEOCODER_USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.cache is not None:
+            self.cache.commit()
+
+    async def _fetch(self, lat: float, lng: float) -> Tuple[bool, GeocodeResult]:
+        """Query the endpoint. Returns ``(cacheable, result)``."""
+        params = {"format": "json", "lat": lat, "lon": lng, "zoom": 18, "addressdetails": 1}
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            self.stats["requests"] += 1
+            retry_after = None
+            try:
+                res = await self._client.get(self.base_url, params=params)
+                if res.status_code not in RETRYABLE_STATUS_CODES:
+                    res.raise_for_status()
+                    data = res.json()
+                    if data.get("error"):
+                        return True, None
+                    return True, {
+                        "address": data.get("display_name"),
+                        "zip_code": data.get("address", {}).get("postcode"),
+                    }
+                retry_after = res.headers.get("Retry-After")
+            except httpx.TransportError:
+                pass
+            except (httpx.HTTPStatusError, ValueError) as e:
+                print(f"❌ Geocoding error for ({lat}, {lng}): {str(e)}")
+                self.stats["errors"] += 1
+                return False, None
+
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                delay = self.backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.25)
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+
+        print(f"❌ Geocoding gave up for ({lat}, {lng}) after {self.max_retries + 1} attempts")
+        self.stats["errors"] += 1
+        return False, None
+
+    async def reverse(self, lat: float, lng: float) -> GeocodeResult:
+        """Return ``{"address", "zip_code"}`` (raw postcode) for a coordinate, or None."""
+        if not lat or not lng:
+            return None
+        if self.cache is not None:
+            found, cached = self.cache.get(lat, lng)
+            if found:
+                self.stats["cache_hits"] += 1
+                return cached
+
+        async with self._semaphore:
+            cacheable, result = await self._fetch(lat, lng)
+        if cacheable and self.cache is not None:
+            self.cache.set(lat, lng, result)
+        return result
+
+    async def reverse_many(self, coordinates: Iterable[Coordinate]) -> Dict[Coordinate, GeocodeResult]:
+        """Resolve many coordinates concurrently; duplicates are looked up once."""
+        unique = list(dict.fromkeys(coordinates))
+        results = await asyncio.gather(*(self.reverse(lat, lng) for lat, lng in unique))
+        if self.cache is not None:
+            self.cache.commit()
+        return dict(zip(unique, results))
+
+
+class BlockingGeocoder:
+    """Synchronous facade over :class:`ReverseGeocoder` for the CLI loader.
+
+    Keeps one event loop (and therefore one connection pool) open across all
+    batches of an import.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, **geocoder_kwargs):
+        self._runner = asyncio.Runner()
+        self.cache = GeocodeCache(cache_path)
+        self.geocoder = ReverseGeocoder(cache=self.cache, **geocoder_kwargs)
+        self._runner.run(self.geocoder.__aenter__())
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return self.geocoder.stats
+
+    def reverse(self, lat: float, lng: float) -> GeocodeResult:
+        return self._runner.run(self.geocoder.reverse(lat, lng))
+
+    def reverse_many(self, coordinates: Iterable[Coordinate]) -> Dict[Coordinate, GeocodeResult]:
+        return self._runner.run(self.geocoder.reverse_many(coordinates))
+
+    def close(self) -> None:
+        self._runner.run(self.geocoder.__aexit__(None, None, None))
+        self._runner.close()
+        self.cache.close()
+
+    def __enter__(self) -> "BlockingGeocoder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
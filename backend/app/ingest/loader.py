@@ -0,0 +1,592 @@
+"""
+The CSV loader's core: ``load_csv_into_db`` and ``recalculate_scores_in_db``.
+
+Used by the ``load_csv_data.py`` CLI and by background jobs
+(``app/jobs/tasks.py``). Problems with the input raise ``LoadError``, and
+database errors are raised after rolling back; progress goes to
+``on_progress`` and to this module's logger (the CLI prints it).
+"""
+import logging
+import time
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from ..config import settings
+from ..core.cache import invalidate_listings
+from ..core.scoring import calculate_base_score
+from ..database import SessionLocal, engine
+from ..models import LoadCheckpoint, PriceHistoryStaging, Property, PropertyStaging
+from ..schema import upgrade_schema
+from .bulk import bulk_insert_properties
+from .checkpoints import (
+    DEDUPE_STATE,
+    add_row_offsets,
+    get_checkpoint,
+    load_row_offsets,
+    nearest_row_offset,
+    source_fingerprint,
+    source_key,
+)
+from .city_risk import CityRiskCache
+from .dedupe import find_existing_dedupe_hashes, find_existing_location_hashes
+from .geocoding import BlockingGeocoder
+from .macro import MacroIndicatorCache
+from .metrics import LoadMetrics
+from .parsing import (
+    coordinate_location_hash,
+    normalize_us_zip_code,
+    parse_coordinate_key_from_row,
+    parse_geocode_coordinates,
+)
+from .pipeline import parse_chunks
+from .price_tracking import track_prices
+from .reader import OffsetCSVReader
+from .rescoring import link_components, rescore_homes
+from .sources import detect_compression, open_csv_source
+from .spatial import NearDuplicateIndex
+from .staging import STAGED_STATUS, publish_staged, reset_staging_tables, stage_known_homes
+from .zip_index import ZipCentroidIndex
+
+logger = logging.getLogger(__name__)
+
+
+# Rows are geocoded concurrently in chunks of this many before parsing.
+GEOCODE_CHUNK_SIZE = 200
+
+# Rows per COPY/INSERT statement and per committed transaction.
+DEFAULT_BATCH_SIZE = 5000
+
+# Homes per committed batch of --recalculate.
+RESCORE_BATCH_SIZE = 500
+
+# Every Nth row's byte offset is stored so later start_row jumps can seek.
+ROW_INDEX_INTERVAL = 10000
+
+
+class LoadError(Exception):
+    """The input cannot be loaded: a missing, empty or unsupported file, or no ZIP centroids."""
+
+
+def session_and_engine(session_factory: Optional[sessionmaker] = None) -> Tuple[sessionmaker, Engine]:
+    """The session factory to write through (default: the app's) and the engine its sessions use."""
+    session_factory = session_factory or SessionLocal
+    return session_factory, session_factory.kw.get("bind") or engine
+
+
+def iter_row_range(reader: OffsetCSVReader, end_row_num: Optional[int]) -> Iterator[tuple]:
+    """Yield ``(row_num, row, end_offset)`` from the reader's position up to ``end_row_num``."""
+    for row_num, row, end_offset in reader:
+        if end_row_num and row_num > end_row_num:
+            break  # Stop after reaching end
+        yield row_num, row, end_offset
+
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_offline_geocoder(zip_centroids_path: Optional[str] = None) -> ZipCentroidIndex:
+    """Load the ZIP centroid index used by ``--geocoder offline``."""
+    path = zip_centroids_path or settings.ZIP_CENTROIDS_PATH
+    index = ZipCentroidIndex.from_csv(path, max_distance_km=settings.OFFLINE_GEOCODE_MAX_KM)
+    logger.info(f"🗺️  Offline geocoder loaded {len(index)} ZIP centroids from {path}")
+    return index
+
+
+def needs_offline_geocode(row: Dict[str, str]) -> bool:
+    """Centroids only supply ZIP/city/state, so skip rows that already have them."""
+    return not normalize_us_zip_code(row.get("zip_code", "")) or not (row.get("city") or "").strip()
+
+
+def load_csv_into_db(
+    csv_file_path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    start_row: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    geocoder_mode: Optional[str] = None,
+    zip_centroids_path: Optional[str] = None,
+    workers: int = 1,
+    resume: bool = False,
+    near_duplicate_meters: Optional[float] = None,
+    metrics_jsonl: Optional[str] = None,
+    metrics_interval: float = 10.0,
+    staged: bool = False,
+    publish: bool = True,
+    on_progress: Optional[Callable[[Dict[str, int]], bool]] = None,
+    session_factory: Optional[sessionmaker] = None,
+):
+    """
+    Load property data from CSV file into database.
+    
+    Args:
+        csv_file_path: Path to CSV file (plain, or gzip/bzip2/xz/zstd compressed)
+        batch_size: Number of records to insert per batch
+        start_row: Starting row number (1-indexed, after header). None = start at beginning
+        max_rows: Maximum rows to load (None = load all)
+        geocoder_mode: "online" (Nominatim), "offline" (ZIP centroids) or "off"
+        zip_centroids_path: Centroid CSV for offline mode (defaults to ZIP_CENTROIDS_PATH)
+        workers: Processes used to parse and score rows (1 = parse inline)
+        resume: Continue from this file's last committed checkpoint, if it has one
+        near_duplicate_meters: Radius for near-duplicate matching (defaults to
+            NEAR_DUPLICATE_RADIUS_METERS; 0 = exact coordinates only)
+        metrics_jsonl: Append stage timings here as JSON lines: a ``progress``
+            record every ``metrics_interval`` seconds and a final ``summary``
+        staged: Write to the staging tables instead of the live ones (see app/ingest/staging.py)
+        publish: With ``staged``, publish everything staged once this file is done
+        on_progress: Called with the counts and checkpoint row after each
+            committed batch; returning False stops the load there (it can be
+            resumed from its checkpoint)
+        session_factory: Sessions to write through (defaults to the app's SessionLocal)
+
+    Returns:
+        ``{"loaded", "updated", "duplicate", "skipped"}`` counts (plus
+        ``"stopped": True`` if ``on_progress`` stopped it)
+
+    Raises:
+        LoadError: The file is missing, empty or unsupported, or the ZIP
+            centroids cannot be read. Database errors are raised as they are,
+            after rolling back the current batch.
+    """
+    csv_file = Path(csv_file_path)
+    
+    if not csv_file.exists():
+        raise LoadError(f"CSV file not found: {csv_file_path}")
+
+    try:
+        compression = detect_compression(csv_file_path)
+    except ValueError as e:
+        raise LoadError(str(e)) from e
+
+    geocoder_mode = geocoder_mode or settings.GEOCODER_MODE
+    if geocoder_mode == "offline":
+        try:
+            geocoder = get_offline_geocoder(zip_centroids_path)
+        except (FileNotFoundError, ValueError) as e:
+            raise LoadError(str(e)) from e
+    else:
+        geocoder = None
+    
+    logger.info(f"📁 Loading data from: {csv_file_path}")
+    if compression:
+        logger.info(f"🗜️  Streaming {compression}-compressed input")
+    
+    # Create or upgrade tables without dropping unrelated data
+    logger.info("📋 Ensuring database tables exist...")
+    session_factory, db_engine = session_and_engine(session_factory)
+    upgraded = upgrade_schema(db_engine)
+    if upgraded["hashed"]:
+        logger.info(f"🧠 Backfilled dedupe hashes for {upgraded['hashed']} existing homes")
+    if upgraded["celled"]:
+        logger.info(f"🧠 Assigned grid cells to {upgraded['celled']} existing homes")
+    logger.info("✅ Database tables ready!")
+    
+    if geocoder_mode == "online":
+        # One per load: its SQLite cache and event loop belong to the thread running the load (e.g. a job).
+        geocoder = BlockingGeocoder()
+    db = session_factory()
+    metrics_file = open(metrics_jsonl, "a", encoding="utf-8") if metrics_jsonl else None
+    metrics = LoadMetrics(source=str(csv_file), jsonl=metrics_file, interval=metrics_interval)
+    geocoder_stats_before = dict(geocoder.stats) if geocoder is not None else {}
+    
+    try:
+        # Dedupe runs against indexed hash columns, so nothing is preloaded here.
+        near_duplicates = NearDuplicateIndex(
+            settings.NEAR_DUPLICATE_RADIUS_METERS if near_duplicate_meters is None else near_duplicate_meters,
+            settings.GEO_CELL_METERS,
+            settings.NEAR_DUPLICATE_ADDRESS_SIMILARITY,
+        )
+        city_risk = CityRiskCache(staged=staged)
+        macro_indicators = MacroIndicatorCache(staged=staged)
+        if staged:
+            # Multi-file loads reset the staging tables once in the parent, before any worker starts.
+            if publish and not reset_staging_tables(db_engine):
+                logger.info("🎭 Staging tables hold an unpublished import; it is published together with this one")
+            logger.info("🎭 Staged load: live tables are untouched until the import is published")
+            staging_table = PropertyStaging.__table__
+            near_duplicates.tables = [Property.__table__, staging_table]
+
+        def existing_locations(location_hashes):
+            """Location hashes already stored live (or staged by this import)."""
+            hashes = set(location_hashes)
+            found = find_existing_location_hashes(db.connection(), hashes)
+            if staged:
+                found |= find_existing_location_hashes(db.connection(), hashes - found, staging_table)
+            return found
+        
+        source = source_key(csv_file_path)
+        fingerprint = source_fingerprint(csv_file_path)
+        known_offsets = load_row_offsets(db, source, fingerprint)
+        checkpoint = get_checkpoint(db, source)
+        resumable = (
+            checkpoint is not None
+            and checkpoint.status != "complete"
+            and checkpoint.source_fingerprint == fingerprint
+        )
+        if resume and not resumable:
+            logger.info("ℹ️  No unfinished checkpoint for this file; starting normally")
+        elif resumable and not resume:
+            logger.info(f"ℹ️  A previous load of this file stopped after row {checkpoint.row_num}; pass --resume to continue it")
+        resume = resume and resumable
+        if checkpoint is None:
+            checkpoint = LoadCheckpoint(source=source)
+            db.add(checkpoint)
+        
+        # Load CSV
+        loaded_count = checkpoint.loaded_count if resume else 0
+        updated_count = checkpoint.updated_count if resume else 0
+        skipped_count = checkpoint.skipped_count if resume else 0
+        duplicate_count = checkpoint.duplicate_count if resume else 0
+        # Rates below only count this run's rows, not ones restored from a checkpoint.
+        resumed_loaded = loaded_count
+        resumed_processed = loaded_count + updated_count + duplicate_count + skipped_count
+        batch = []
+        batch_hashes = set()
+        batch_locations = set()
+        # Known homes seen again; applied as price changes after the batch is inserted
+        batch_observations = []
+        load_started = time.perf_counter()
+
+        def counts():
+            return {"loaded": loaded_count, "updated": updated_count, "duplicate": duplicate_count, "skipped": skipped_count}
+
+        def update_metrics():
+            metrics.counters.update(
+                loaded=loaded_count - resumed_loaded,
+                updated=updated_count,
+                duplicate=duplicate_count,
+                skipped=skipped_count,
+                processed=loaded_count + updated_count + duplicate_count + skipped_count - resumed_processed,
+                near_duplicates=near_duplicates.stats["matched"],
+            )
+            if geocoder is not None:
+                metrics.geocoder_stats = {
+                    name: value - geocoder_stats_before.get(name, 0) for name, value in geocoder.stats.items()
+                }
+
+        def flush_batch(status="running"):
+            """Insert the pending batch and commit it together with the checkpoint."""
+            nonlocal loaded_count, updated_count, duplicate_count
+            if staged:
+                # ON CONFLICT only sees the staging table, so drop listings that are already live here.
+                live_duplicates = find_existing_dedupe_hashes(db.connection(), (row["dedupe_hash"] for row in batch))
+                if live_duplicates:
+                    staged_rows = len(batch)
+                    batch[:] = [row for row in batch if row["dedupe_hash"] not in live_duplicates]
+                    duplicate_count += staged_rows - len(batch)
+                stage_known_homes(db.connection(), (row["location_hash"] for row in batch_observations))
+            with metrics.stage("insert", len(batch)):
+                inserted = bulk_insert_properties(db.connection(), batch, table=staging_table if staged else None)
+            tracked = [row for row in batch if row.get("lat") is not None]
+            with metrics.stage("price_tracking", len(tracked) + len(batch_observations)):
+                price_changes, unchanged = track_prices(
+                    db.connection(),
+                    tracked,
+                    batch_observations,
+                    table=staging_table if staged else None,
+                    history_table=PriceHistoryStaging.__table__ if staged else None,
+                )
+            loaded_count += inserted
+            updated_count += price_changes
+            duplicate_count += len(batch) - inserted  # lost an ON CONFLICT race with another loader
+            duplicate_count += unchanged
+            checkpoint.source_fingerprint = fingerprint
+            checkpoint.row_num = checkpoint_row
+            checkpoint.byte_offset = checkpoint_offset
+            checkpoint.end_row = end_row_num
+            checkpoint.loaded_count = loaded_count
+            checkpoint.updated_count = updated_count
+            checkpoint.duplicate_count = duplicate_count
+            checkpoint.skipped_count = skipped_count
+            checkpoint.dedupe_state = DEDUPE_STATE
+            checkpoint.status = status
+            with metrics.stage("commit"):
+                add_row_offsets(db, source, fingerprint, known_offsets, reader.row_offsets)
+                db.commit()
+            batch.clear()
+            batch_hashes.clear()
+            batch_locations.clear()
+            batch_observations.clear()
+            near_duplicates.clear()
+            update_metrics()
+            metrics.maybe_emit()
+        
+        with open_csv_source(csv_file_path) as f:
+            reader = OffsetCSVReader(f, index_interval=ROW_INDEX_INTERVAL)
+            
+            if reader.fieldnames is None:
+                raise LoadError(f"CSV file is empty or has no headers: {csv_file_path}")
+            
+            logger.info(f"📊 CSV columns: {', '.join(reader.fieldnames[:5])}...")
+            logger.info(f"📊 Total columns: {len(reader.fieldnames)}")
+            
+            if resume:
+                end_row_num = checkpoint.end_row
+                reader.seek(checkpoint.byte_offset, checkpoint.row_num + 1)
+                logger.info(f"↪️  Resuming at row {checkpoint.row_num + 1} (byte {checkpoint.byte_offset:,}), {loaded_count} already loaded")
+            else:
+                start_row_num = (start_row + 1) if start_row else 2  # Convert to actual row number (row 1 = header)
+                end_row_num = (start_row_num + max_rows - 1) if max_rows else None
+                if start_row_num > 2:
+                    # Jump to the nearest indexed row, then skip the rest without CSV parsing.
+                    mark = nearest_row_offset(known_offsets, start_row_num)
+                    if mark:
+                        reader.seek(mark[1], mark[0])
+                    reader.skip_to(start_row_num)
+            checkpoint_row, checkpoint_offset = reader.next_row_num - 1, reader.offset
+            
+            selected_rows = iter_row_range(reader, end_row_num)
+            # (last row number, end offset) of each chunk in flight
+            chunk_ends = deque()
+
+            def prepare_chunks():
+                """Reader + geocode stage: resolve each chunk's new coordinates in one batch."""
+                for chunk in metrics.timed("read", iter_chunks(selected_rows, min(GEOCODE_CHUNK_SIZE, batch_size))):
+                    # Fast path: homes already stored only need their price compared, not geocoding.
+                    with metrics.stage("dedupe", len(chunk)):
+                        coordinate_hashes = {}
+                        for row_num, row, _ in chunk:
+                            coordinate_key = parse_coordinate_key_from_row(row)
+                            if coordinate_key:
+                                coordinate_hashes[row_num] = coordinate_location_hash(coordinate_key)
+                        known_locations = existing_locations(coordinate_hashes.values())
+
+                        candidates = []
+                        for row_num, row, _ in chunk:
+                            known = coordinate_hashes.get(row_num) in known_locations
+                            candidates.append((row_num, row, None if known else parse_geocode_coordinates(row)))
+                    last_row_num, _, end_offset = chunk[-1]
+                    chunk_ends.append((last_row_num, end_offset))
+
+                    # Resolve the whole chunk's coordinates in one batch (cache first when online).
+                    geocodes = {}
+                    if geocoder is not None:
+                        lookups = [
+                            coords
+                            for _, row, coords in candidates
+                            if coords and (geocoder_mode != "offline" or needs_offline_geocode(row))
+                        ]
+                        with metrics.stage("geocode", len(lookups)):
+                            geocodes = geocoder.reverse_many(lookups)
+                    yield [(row_num, row, geocodes.get(coords) if coords else None) for row_num, row, coords in candidates]
+
+            # Parse/score fans out to worker processes; results arrive in file order.
+            # With --workers, "parse" is the time spent waiting on the pool.
+            for parsed_chunk in metrics.timed("parse", parse_chunks(prepare_chunks(), workers=workers)):
+                # Rows read before earlier chunks were written need one more indexed check.
+                with metrics.stage("dedupe", len(parsed_chunk)):
+                    known_locations = existing_locations(
+                        data["location_hash"] for _, data in parsed_chunk if data and data.get("lat") is not None
+                    )
+                # Stored homes near this chunk's new locations, for near-duplicate matching.
+                with metrics.stage("near_duplicates", len(parsed_chunk)):
+                    near_duplicates.load(db.connection(), (
+                        data for _, data in parsed_chunk
+                        if data and data.get("lat") is not None and data["location_hash"] not in known_locations
+                    ))
+                # Writer stage: route each row to the insert batch or the known-home observations.
+                routing_started = time.perf_counter()
+                for row_num, property_data in parsed_chunk:
+                    if property_data:
+                        location_hash = property_data["location_hash"] if property_data.get("lat") is not None else None
+                        if property_data["dedupe_hash"] in batch_hashes:
+                            duplicate_count += 1
+                            continue
+                        batch_hashes.add(property_data["dedupe_hash"])
+                        link_components(db.connection(), property_data, (city_risk, macro_indicators))
+
+                        if location_hash in known_locations or location_hash in batch_locations:
+                            # Same home seen again: compared and price-tracked at flush time.
+                            batch_observations.append(property_data)
+                            continue
+
+                        near_home = near_duplicates.find(property_data) if location_hash else None
+                        if near_home:
+                            # A few meters off a known home (another vendor's coordinates) is still that home.
+                            property_data["location_hash"] = near_home
+                            batch_observations.append(property_data)
+                            continue
+
+                        batch.append(property_data)
+                        if location_hash:
+                            property_data["geo_cell"] = near_duplicates.grid.key(property_data["lat"], property_data["lng"])
+                            batch_locations.add(location_hash)
+                            near_duplicates.add(property_data)
+                    else:
+                        skipped_count += 1
+                    
+                    # Progress indicator
+                    if row_num % 1000 == 0:
+                        logger.info(f"📈 Processed {row_num} rows ({loaded_count} loaded, {updated_count} price changes, {duplicate_count} duplicate, {skipped_count} invalid)...")
+                metrics.record("route", time.perf_counter() - routing_started, len(parsed_chunk))
+
+                # Batches close on chunk boundaries so the checkpoint covers whole chunks.
+                checkpoint_row, checkpoint_offset = chunk_ends.popleft()
+                
+                # Insert batch (one COPY / executemany and one transaction per batch)
+                if len(batch) + len(batch_observations) >= batch_size:
+                    flush_batch()
+                    elapsed = time.perf_counter() - load_started
+                    logger.info(f"✅ Inserted {loaded_count} properties ({(loaded_count - resumed_loaded) / elapsed:,.0f} rows/s)...")
+                    if on_progress is not None and not on_progress({**counts(), "row": checkpoint_row}):
+                        logger.info(f"⏸️  Load stopped after row {checkpoint_row}; resume to continue")
+                        return {**counts(), "stopped": True}
+        
+        # Insert remaining batch and mark the file done
+        flush_batch(status=STAGED_STATUS if staged else "complete")
+        if staged and publish:
+            with metrics.stage("publish"):
+                published = publish_staged(db.connection())
+                db.commit()
+            logger.info(
+                f"🚀 Published staged import: {published['inserted']} new homes, "
+                f"{published['updated']} price changes, {published['rescored']} homes rescored"
+            )
+        elapsed = time.perf_counter() - load_started
+        
+        logger.info(f"\n✅ Data load complete!")
+        logger.info(f"   ✓ Loaded: {loaded_count} properties")
+        logger.info(f"   ↻ Price changes: {updated_count} known homes updated")
+        logger.info(f"   ↺ Duplicate skipped: {duplicate_count}")
+        logger.info(f"   ⚠️  Skipped: {skipped_count} invalid rows")
+        logger.info(f"   📊 Total processed: {loaded_count + updated_count + duplicate_count + skipped_count}")
+        logger.info(
+            f"   ⚡ Throughput: {(loaded_count - resumed_loaded) / elapsed:,.0f} inserted rows/s, "
+            f"{(loaded_count + updated_count + duplicate_count + skipped_count - resumed_processed) / elapsed:,.0f} processed rows/s ({elapsed:.1f}s)"
+        )
+        if geocoder is not None:
+            geocode_summary = ", ".join(f"{value} {name.replace('_', ' ')}" for name, value in geocoder.stats.items())
+            logger.info(f"   🌍 Geocoding ({geocoder_mode}): {geocode_summary}")
+        if near_duplicates.enabled:
+            logger.info(f"   📍 Near-duplicate listings matched to known homes: {near_duplicates.stats['matched']}")
+        for label, component in (("City crime risk", city_risk), ("Macro indicators", macro_indicators)):
+            if component.stats["refreshed"]:
+                logger.info(
+                    f"   📉 {label} refreshed: {component.stats['refreshed']} rows "
+                    f"({component.stats['rescored']} homes rescored)"
+                )
+            if component.stats["disagreed"]:
+                logger.info(f"   📉 {label}: {component.stats['disagreed']} listings disagreed with their stored row (scored with the row)")
+        log_stage_summary(metrics.emit_summary())
+        return counts()
+        
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        invalidate_listings()
+        if metrics_file is not None:
+            metrics_file.close()
+        if geocoder_mode == "online":
+            geocoder.close()
+
+
+def log_stage_summary(summary: Dict[str, Any]) -> None:
+    """Log where a load spent its time, largest stage first."""
+    stages = sorted(summary["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+    logger.info("   ⏱️  Stage timings:")
+    for name, stage in stages:
+        line = f"      {name:<15} {stage['seconds']:8.2f}s {stage['share']:6.1%}"
+        if "rows" in stage:
+            line += f"  {stage['row_us_p50']:>9,.1f} µs/row p50  {stage['row_us_p95']:>9,.1f} µs/row p95"
+        else:
+            line += f"  {stage['call_ms_p50']:>9,.1f} ms p50  {stage['call_ms_p95']:>9,.1f} ms p95 ({stage['calls']} calls)"
+        logger.info(line)
+    hit_rate = summary["geocode_cache_hit_rate"]
+    if hit_rate is not None:
+        logger.info(f"   🌍 Geocode cache hit rate: {hit_rate:.1%}")
+
+
+def recalculate_scores_in_db(
+    limit: Optional[int] = None,
+    on_progress: Optional[Callable[[Dict[str, int]], bool]] = None,
+    session_factory: Optional[sessionmaker] = None,
+) -> Optional[Dict[str, int]]:
+    """Recalculate profitability scores for existing properties in-place.
+
+    Scores are recombined from each home's stored ``score_base`` and the
+    points of its linked city risk and macro indicator rows (``rescore_homes``).
+    ``score_base`` is kept: it also covers CSV fields that are not stored
+    (days on market, listing status, ...), and the loader rewrites it
+    whenever a listing's inputs change. Only homes without one (loaded before
+    it existed) get a base computed from their stored fields.
+
+    Does not require a CSV reload and does not delete any rows. ``on_progress``
+    gets ``{"rescored", "total"}`` after each committed batch; returning False
+    stops there. Returns the counts, with ``"changed"`` homes whose score
+    moved (``"stopped": True`` if stopped). ``session_factory`` defaults to
+    the app's SessionLocal.
+    """
+    logger.info("🔁 Recalculating profitability scores for existing properties...")
+    session_factory, db_engine = session_and_engine(session_factory)
+    upgrade_schema(db_engine)
+    live = Property.__table__
+
+    try:
+        with db_engine.connect() as connection:
+            total = connection.scalar(select(func.count()).select_from(live))
+            total = min(total, limit) if limit and limit > 0 else total
+            if not total:
+                logger.info("ℹ️  No properties found to recalculate.")
+                return {"rescored": 0, "total": 0, "changed": 0}
+
+            processed = changed = based = 0
+            last_id = 0
+            while processed < total:
+                ids = connection.scalars(
+                    select(live.c.id).where(live.c.id > last_id).order_by(live.c.id)
+                    .limit(min(RESCORE_BATCH_SIZE, total - processed))
+                ).all()
+                if not ids:
+                    break
+                in_batch = live.c.id.between(ids[0], ids[-1])
+                without_base = connection.execute(
+                    select(
+                        live.c.id, live.c.price, live.c.size_sqft, live.c.estimated_rent,
+                        live.c.year_built, live.c.property_type,
+                    ).where(in_batch, live.c.score_base.is_(None))
+                ).all()
+                if without_base:
+                    bases = [
+                        {
+                            "home_id": row.id,
+                            "new_score_base": calculate_base_score(
+                                row.price, row.size_sqft, row.estimated_rent, row.year_built, row.property_type
+                            ),
+                        }
+                        for row in without_base
+                    ]
+                    connection.execute(
+                        update(live).where(live.c.id == bindparam("home_id")).values(score_base=bindparam("new_score_base")),
+                        bases,
+                    )
+                    based += sum(1 for row in bases if row["new_score_base"] is not None)
+                changed += rescore_homes(connection, in_batch)
+                connection.commit()
+                processed += len(ids)
+                last_id = ids[-1]
+                logger.info(f"✅ Recalculated {processed} properties...")
+                if on_progress is not None and not on_progress({"rescored": processed, "total": total}):
+                    logger.info(f"⏸️  Recalculation stopped after {processed} properties")
+                    return {"rescored": processed, "total": total, "changed": changed, "stopped": True}
+
+        logger.info(f"✅ Recalculation complete! {changed} of {processed} scores changed.")
+        if based:
+            logger.info(f"ℹ️  Computed a base score for {based} homes loaded before score_base was stored.")
+        logger.info("ℹ️  Crime and macro points come from each home's stored city risk and macro indicator rows.")
+        return {"rescored": processed, "total": total, "changed": changed}
+
+    finally:
+        invalidate_listings()
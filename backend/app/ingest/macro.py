@@ -0,0 +1,94 @@
+"""
+Macro indicators for the CSV loader and targeted macro rescoring.
+
+Each listing row repeats CPI, Fed rate, unemployment, volatility and
+``nr_weeks``. The loader stores those once per (state, load date) in
+``macro_indicators`` and links homes to the row via
+``properties.macro_indicator_id``. When indicator values change (a rate
+move, a revised unemployment figure), only the macro component needs
+recomputing: ``rescore_macro`` does that for the affected homes in one
+set-based ``UPDATE`` (see ``rescoring``).
+"""
+from datetime import date
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.engine import Connection
+
+from ..core.scoring import calculate_macro_points
+from ..models import MacroIndicator, MacroIndicatorStaging, Property
+from .rescoring import SharedComponentCache, rescore_homes
+
+
+MACRO_FIELDS = ("lagged_cpi", "fed_rate", "lagged_unemployment", "volatility_value", "nr_weeks")
+
+
+def rescore_macro(connection: Connection, indicator_ids: Optional[Iterable[int]] = None) -> int:
+    """Rescore homes linked to these indicators (all linked homes if None).
+
+    Returns the number of homes whose score changed.
+    """
+    link = Property.__table__.c.macro_indicator_id
+    if indicator_ids is None:
+        return rescore_homes(connection, link.is_not(None))
+    indicator_ids = list(indicator_ids)
+    if not indicator_ids:
+        return 0
+    return rescore_homes(connection, link.in_(indicator_ids))
+
+
+def update_macro_indicators(
+    connection: Connection,
+    changes: Dict[str, float],
+    region: Optional[str] = None,
+    as_of: Optional[date] = None,
+) -> Dict[str, int]:
+    """
+    Set indicator values (e.g. ``{"fed_rate": 5.5}``) and rescore the homes they affect.
+
+    Applies to every stored indicator row unless ``region`` or ``as_of``
+    narrows it down. Homes are only rescored where the macro points of
+    their indicator row actually move.
+    """
+    unknown = set(changes) - set(MACRO_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown macro indicator(s): {', '.join(sorted(unknown))}")
+    table = MacroIndicator.__table__
+    query = select(table)
+    if region:
+        query = query.where(table.c.region == region.upper())
+    if as_of:
+        query = query.where(table.c.as_of == as_of)
+
+    updated_rows = 0
+    moved = []
+    for row in connection.execute(query).mappings().all():
+        values = {field: changes.get(field, row[field]) for field in MACRO_FIELDS}
+        points = calculate_macro_points(**values)
+        connection.execute(update(table).where(table.c.id == row["id"]).values(macro_points=points, **values))
+        updated_rows += 1
+        if points != row["macro_points"]:
+            moved.append(row["id"])
+    return {"indicators": updated_rows, "rescored": rescore_macro(connection, moved)}
+
+
+class MacroIndicatorCache(SharedComponentCache):
+    """(state, load date) -> ``macro_indicators`` row for one load."""
+
+    table = MacroIndicator.__table__
+    staging_table = MacroIndicatorStaging.__table__
+    group_columns = ("region", "as_of")
+    fields = MACRO_FIELDS
+    listing_key = "macro"
+    link_column = "macro_indicator_id"
+    points_column = "macro_points"
+
+    def __init__(self, as_of: Optional[date] = None, staged: bool = False):
+        super().__init__(staged=staged)
+        self.as_of = as_of or date.today()
+
+    def group(self, listing: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return {"region": listing["state"], "as_of": self.as_of}
+
+    def component_values(self, figures: Dict[str, Optional[float]]) -> Dict[str, Any]:
+        return {"macro_points": calculate_macro_points(**figures)}
@@ -0,0 +1,77 @@
+"""
+Content-addressed manifest of loaded CSV files.
+
+Files are identified by the SHA-256 of their bytes (compressed bytes for
+compressed feeds), so a re-delivered or renamed copy of a file that has
+already loaded is skipped without reading a row.
+"""
+import hashlib
+import os
+from typing import Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from ..models import LoadManifest
+
+
+HASH_READ_SIZE = 1 << 20
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_manifest_entry(db: Session, content_sha256: str) -> Optional[LoadManifest]:
+    return db.query(LoadManifest).filter(LoadManifest.content_sha256 == content_sha256).first()
+
+
+def start_manifest_entry(db: Session, path: str, content_sha256: str) -> Optional[LoadManifest]:
+    """Mark a file as loading and return its entry, or None if another loader claimed it first."""
+    entry = get_manifest_entry(db, content_sha256)
+    if entry is None:
+        entry = LoadManifest(content_sha256=content_sha256)
+        db.add(entry)
+    entry.source = path
+    entry.size_bytes = os.path.getsize(path)
+    entry.status = "loading"
+    entry.loaded_count = entry.updated_count = entry.duplicate_count = entry.skipped_count = None
+    entry.error = None
+    entry.started_at = func.now()
+    entry.finished_at = None
+    try:
+        db.commit()
+    except IntegrityError:
+        # The same bytes under another name in this drop; whoever inserted first loads it.
+        db.rollback()
+        return None
+    return entry
+
+
+def finish_manifest_entry(
+    db: Session,
+    entry: LoadManifest,
+    counts: Optional[Dict[str, int]],
+    error: Optional[str] = None,
+    status: str = "complete",
+) -> None:
+    """Record the outcome of a load; a missing ``counts`` marks it failed.
+
+    Staged loads pass ``status="staged"``; publishing flips them to complete.
+    """
+    if counts is None:
+        entry.status = "failed"
+        entry.error = error or "Load did not complete"
+    else:
+        entry.status = status
+        entry.loaded_count = counts["loaded"]
+        entry.updated_count = counts["updated"]
+        entry.duplicate_count = counts["duplicate"]
+        entry.skipped_count = counts["skipped"]
+    entry.finished_at = func.now()
+    db.commit()
@@ -0,0 +1,189 @@
+"""
+Stage timers and counters for the CSV loader.
+
+The loader brackets each stage of a chunk (read, geocode, parse, dedupe,
+insert, price tracking, commit) with ``LoadMetrics.stage``. Stages nest:
+time spent in an inner stage is not charged to the outer one, so stage
+totals add up to the wall time they cover. Timing is per chunk or batch,
+never per row, which keeps the overhead to a few clock reads per couple
+of hundred rows. Per-row costs are each call's time divided by its rows,
+and p50/p95 come from a fixed-size reservoir sample of those calls.
+"""
+import json
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+
+# Calls sampled per stage for percentiles.
+RESERVOIR_SIZE = 1024
+
+
+class Reservoir:
+    """Uniform sample of at most ``size`` values from a stream (Algorithm R)."""
+
+    def __init__(self, size: int = RESERVOIR_SIZE, seed: int = 0):
+        self.size = size
+        self.count = 0
+        self.values: List[float] = []
+        self._random = random.Random(seed)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if len(self.values) < self.size:
+            self.values.append(value)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.size:
+                self.values[slot] = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.values:
+            return None
+        ordered = sorted(self.values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+_DONE = object()
+
+
+class StageCall:
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: int = 0):
+        self.rows = rows
+
+
+class _Stage:
+    __slots__ = ("seconds", "calls", "rows", "per_call", "per_row")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows = 0
+        self.per_call = Reservoir()
+        self.per_row = Reservoir()
+
+
+class LoadMetrics:
+    """
+    Collects stage timings and counters for one load.
+
+    ``jsonl`` (an open text file) receives a ``progress`` record from
+    ``maybe_emit`` at most every ``interval`` seconds and a ``summary``
+    record from ``emit_summary``.
+    """
+
+    def __init__(self, source: Optional[str] = None, jsonl: Optional[TextIO] = None, interval: float = 10.0):
+        self.source = source
+        self.jsonl = jsonl
+        self.interval = interval
+        self.counters: Dict[str, int] = {}
+        self.geocoder_stats: Dict[str, int] = {}
+        self._stages: Dict[str, _Stage] = {}
+        # Per active stage: time spent in stages nested inside it so far.
+        self._nested: List[float] = []
+        self.started = time.perf_counter()
+        self._last_emit = self.started
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0) -> Iterator["StageCall"]:
+        """Time a block as ``name``; set ``rows`` on the yielded call if not known up front."""
+        call = StageCall(rows)
+        self._nested.append(0.0)
+        started = time.perf_counter()
+        try:
+            yield call
+        finally:
+            elapsed = time.perf_counter() - started
+            own = elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.record(name, own, call.rows)
+
+    def timed(self, name: str, chunks: Iterable[List[Any]]) -> Iterator[List[Any]]:
+        """Yield from an iterable of chunks, timing each ``next`` as ``name``."""
+        iterator = iter(chunks)
+        while True:
+            with self.stage(name) as call:
+                chunk = next(iterator, _DONE)
+                if chunk is not _DONE:
+                    call.rows = len(chunk)
+            if chunk is _DONE:
+                return
+            yield chunk
+
+    def record(self, name: str, seconds: float, rows: int = 0) -> None:
+        """Add one timed call of a stage."""
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage()
+        stage.seconds += seconds
+        stage.calls += 1
+        stage.per_call.add(seconds)
+        if rows:
+            stage.rows += rows
+            stage.per_row.add(seconds / rows)
+
+    def geocode_hit_rate(self) -> Optional[float]:
+        hits = self.geocoder_stats.get("cache_hits", 0)
+        lookups = hits + self.geocoder_stats.get("requests", 0)
+        return hits / lookups if lookups else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current stage timings and counters as a JSON-ready dict."""
+        elapsed = time.perf_counter() - self.started
+        stages = {}
+        for name, stage in self._stages.items():
+            entry = {
+                "seconds": round(stage.seconds, 6),
+                "share": round(stage.seconds / elapsed, 4) if elapsed else None,
+                "calls": stage.calls,
+                "call_ms_p50": _ms(stage.per_call.quantile(0.5)),
+                "call_ms_p95": _ms(stage.per_call.quantile(0.95)),
+            }
+            if stage.rows:
+                entry.update(
+                    rows=stage.rows,
+                    rows_per_sec=round(stage.rows / stage.seconds, 1) if stage.seconds else None,
+                    row_us_p50=_us(stage.per_row.quantile(0.5)),
+                    row_us_p95=_us(stage.per_row.quantile(0.95)),
+                )
+            stages[name] = entry
+        processed = self.counters.get("processed", 0)
+        return {
+            "source": self.source,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(processed / elapsed, 1) if elapsed else None,
+            "counters": dict(self.counters),
+            "stages": stages,
+            "geocoder": dict(self.geocoder_stats),
+            "geocode_cache_hit_rate": self.geocode_hit_rate(),
+        }
+
+    def maybe_emit(self) -> None:
+        """Write a progress record if ``interval`` seconds have passed since the last one."""
+        now = time.perf_counter()
+        if self.jsonl is not None and now - self._last_emit >= self.interval:
+            self._last_emit = now
+            self._write({"event": "progress", **self.snapshot()})
+
+    def emit_summary(self) -> Dict[str, Any]:
+        summary = self.snapshot()
+        if self.jsonl is not None:
+            self._write({"event": "summary", **summary})
+        return summary
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        # One write per line so parallel file loads can share an append-mode file.
+        self.jsonl.write(json.dumps(record) + "\n")
+        self.jsonl.flush()
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1e3, 3)
+
+
+def _us(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1e6, 2)
@@ -0,0 +1,381 @@
+"""
+Pure CSV row parsing, validation and scoring for the loader.
+
+Nothing here touches the network or the database, so these functions can
+run in worker processes (see ``app.ingest.pipeline``).
+"""
+import hashlib
+import re
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.scoring import (
+    calculate_base_score,
+    calculate_crime_points,
+    calculate_macro_points,
+    combine_score,
+    derive_crime_risk,
+    estimate_monthly_rent,
+)
+
+
+def parse_bool(value: Any) -> Optional[bool]:
+    """Parse common CSV truthy/falsey strings into booleans."""
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if text in {"true", "1", "yes", "y", "t"}:
+        return True
+    if text in {"false", "0", "no", "n", "f"}:
+        return False
+    return None
+
+
+def parse_float(value: Any) -> Optional[float]:
+    """Parse optional float values from CSV safely."""
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def normalize_us_zip_code(value: Any) -> Optional[str]:
+    """Return a US 5-digit ZIP code when possible."""
+    if value in (None, ""):
+        return None
+
+    text = str(value).strip()
+    if not text:
+        return None
+
+    # Match standard ZIP or ZIP+4 and keep the 5-digit ZIP.
+    match = re.search(r"\b(\d{5})(?:-\d{4})?\b", text)
+    if match:
+        return match.group(1)
+
+    # Fallback: keep first 5 digits when separators/spaces are unusual.
+    digits_only = "".join(ch for ch in text if ch.isdigit())
+    if len(digits_only) >= 5:
+        return digits_only[:5]
+
+    return None
+
+
+def normalize_text(value: Any) -> str:
+    """Normalize text for robust dedupe comparisons."""
+    if value is None:
+        return ""
+    return " ".join(str(value).strip().lower().split())
+
+
+def normalize_price_key(value: Any) -> str:
+    """Normalize price for stable dedupe key comparisons."""
+    if value is None:
+        return "0.00"
+    try:
+        return f"{Decimal(str(value)):.2f}"
+    except Exception:
+        return str(value)
+
+
+def build_property_dedupe_key(property_data: Dict[str, Any]) -> tuple:
+    """Build a stable dedupe key for comparing existing/new homes."""
+    lat = property_data.get("lat")
+    lng = property_data.get("lng")
+
+    if lat is not None and lng is not None:
+        # Coordinates are the strongest signal for the same home.
+        return (
+            "coords",
+            round(float(lat), 6),
+            round(float(lng), 6),
+            normalize_price_key(property_data.get("price")),
+            int(property_data.get("size_sqft") or 0),
+            int(property_data.get("bedrooms") or 0),
+        )
+
+    return (
+        "addr",
+        normalize_text(property_data.get("address")),
+        normalize_text(property_data.get("city")),
+        normalize_text(property_data.get("state")),
+        normalize_text(property_data.get("zip_code")),
+        normalize_price_key(property_data.get("price")),
+        int(property_data.get("size_sqft") or 0),
+        int(property_data.get("bedrooms") or 0),
+    )
+
+
+def hash_key(key: tuple) -> str:
+    """Stable 40-character digest of a dedupe or location key, as stored on ``properties``."""
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+def build_property_dedupe_hash(property_data: Dict[str, Any]) -> str:
+    """Digest of ``build_property_dedupe_key``; unique per listing in the database."""
+    return hash_key(build_property_dedupe_key(property_data))
+
+
+def build_location_key(property_data: Dict[str, Any]) -> tuple:
+    """Identify the home itself (coordinates, else address) regardless of price or size."""
+    lat = property_data.get("lat")
+    lng = property_data.get("lng")
+
+    if lat is not None and lng is not None:
+        return ("coords", round(float(lat), 6), round(float(lng), 6))
+
+    return (
+        "addr",
+        normalize_text(property_data.get("address")),
+        normalize_text(property_data.get("city")),
+        normalize_text(property_data.get("state")),
+        normalize_text(property_data.get("zip_code")),
+    )
+
+
+def build_location_hash(property_data: Dict[str, Any]) -> str:
+    """Digest of ``build_location_key``."""
+    return hash_key(build_location_key(property_data))
+
+
+def coordinate_location_hash(coordinate_key: tuple) -> str:
+    """Location hash for a ``parse_coordinate_key_from_row`` key, usable before parsing."""
+    return hash_key(("coords",) + tuple(coordinate_key))
+
+
+def parse_coordinate_key_from_row(row: Dict[str, str]) -> Optional[tuple]:
+    """Build a coordinate key directly from CSV row values for fast duplicate checks."""
+    try:
+        lat = float(row.get("latitude", 0))
+        lng = float(row.get("longitude", 0))
+    except (ValueError, TypeError):
+        return None
+
+    if lat == 0 or lng == 0:
+        return None
+
+    return (round(lat, 6), round(lng, 6))
+
+
+def parse_geocode_coordinates(row: Dict[str, str]) -> Optional[tuple]:
+    """Return the (lat, lng) pair ``parse_csv_row`` would geocode for a row, if any."""
+    if not row.get("latitude") or not row.get("longitude"):
+        return None
+    try:
+        lat = float(row.get("latitude"))
+        lng = float(row.get("longitude"))
+    except (ValueError, TypeError):
+        return None
+    if not lat or not lng:
+        return None
+    return (lat, lng)
+
+
+def parse_listing(
+    row: Dict[str, str],
+    geocode_data: Optional[Dict[str, Optional[str]]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Parse a CSV row into property data without any network access.
+    
+    Args:
+        row: Dictionary from CSV reader
+        geocode_data: Reverse geocode result for the row's coordinates, if resolved
+        
+    Returns:
+        Dictionary of property data or None if validation fails
+    """
+    try:
+        # Extract and validate required fields
+        address = row.get("city", "Unknown")  # Use city as part of address since full address not in CSV
+        city = row.get("city", "").strip()
+        state = row.get("state", "").strip().upper()
+        if geocode_data:
+            # Offline (centroid) lookups can fill in a missing city/state.
+            city = city or (geocode_data.get("city") or "").strip()
+            state = state or (geocode_data.get("state") or "").strip().upper()
+        full_address = geocode_data.get("address") if geocode_data else None
+        if not full_address:
+            full_address = f"{city}, {state}"
+
+        
+        if not city or not state or len(state) != 2:
+            return None
+        
+        # Price (required)
+        try:
+            price_float = float(row.get("price", 0))
+            if price_float <= 0:
+                return None
+            price = Decimal(str(price_float))
+        except (ValueError, TypeError):
+            return None
+        
+        # Living area / size (required)
+        try:
+            size_sqft = int(float(row.get("livingArea", 0)))
+            if size_sqft <= 0:
+                return None
+        except (ValueError, TypeError):
+            return None
+        
+        # Bedrooms (required)
+        try:
+            bedrooms = int(float(row.get("num_bedrooms.x", 0)))
+            if bedrooms < 0:
+                return None
+        except (ValueError, TypeError):
+            return None
+        
+        # Bathrooms (calculate from full baths + half baths)
+        try:
+            full_baths = float(row.get("num_full_baths.x", 0))
+            half_baths = float(row.get("num_half_baths", 0))
+            three_quarter_baths = float(row.get("num_three_quarter_baths", 0))
+            bathrooms = full_baths + (half_baths * 0.5) + (three_quarter_baths * 0.75)
+            if bathrooms < 0:
+                bathrooms = 1.0  # Default to 1 bathroom
+        except (ValueError, TypeError):
+            bathrooms = 1.0
+        
+        # Property type
+        raw_property_type = row.get("property_type", "house")
+        property_type_normalized = str(raw_property_type).lower().strip().replace(" ", "_")
+        property_type_map = {
+            "single_family_residential": "single_family",
+            "single_family": "single_family",
+            "house": "single_family",
+            "multi_family_2_to_4": "multi_family",
+            "multi_family": "multi_family",
+            "townhouse": "townhouse",
+            "condo_coop": "condo",
+            "condo": "condo",
+            "apartment": "condo",
+            "manufactured": "house",
+            "land": "land",
+        }
+        property_type = property_type_map.get(property_type_normalized, "single_family")
+        
+        # Year built
+        try:
+            year_built_str = row.get("yearBuilt.x", "")
+            year_built = int(float(year_built_str)) if year_built_str else None
+            if year_built and (year_built < 1800 or year_built > 2100):
+                year_built = None
+        except (ValueError, TypeError):
+            year_built = None
+        
+        # Coordinates
+        try:
+            lat = float(row.get("latitude", 0))
+            lng = float(row.get("longitude", 0))
+            if lat == 0 or lng == 0:  # Invalid coordinates
+                lat, lng = None, None
+        except (ValueError, TypeError):
+            lat, lng = None, None
+        
+        # Zip code
+        zip_code = normalize_us_zip_code(row.get("zip_code", ""))
+        if (not zip_code) and geocode_data and geocode_data.get("zip_code"):
+            zip_code = normalize_us_zip_code(geocode_data.get("zip_code"))
+        if not zip_code:
+            zip_code = "00000"
+        
+        # Estimate rent if not provided
+        estimated_rent = estimate_monthly_rent(price, size_sqft, bedrooms)
+
+        # Market/risk features from CSV for richer scoring.
+        crime_rate = None
+        for key in ["crime_rate", "city_crime_rate", "crime_index"]:
+            crime_rate = parse_float(row.get(key))
+            if crime_rate is not None:
+                break
+
+        violent_crime = None
+        for key in ["violent_crime", "violent_crime_rate"]:
+            violent_crime = parse_float(row.get(key))
+            if violent_crime is not None:
+                break
+
+        property_crime = None
+        for key in ["property_crime", "property_crime_rate"]:
+            property_crime = parse_float(row.get(key))
+            if property_crime is not None:
+                break
+
+        days_on_market = parse_float(row.get("days_on_market"))
+        lagged_cpi = parse_float(row.get("lagged_CPI"))
+        fed_rate = parse_float(row.get("fed_rate"))
+        lagged_unemployment = parse_float(row.get("lagged_unemployment"))
+        volatility_value = parse_float(row.get("volatility_value"))
+        nr_weeks = parse_float(row.get("nr_weeks"))
+        lot_area = parse_float(row.get("lotArea"))
+
+        is_hot = parse_bool(row.get("isHot"))
+        is_new_listing = parse_bool(row.get("isNew"))
+        is_virtual_tour = parse_bool(row.get("is_virtual_tour"))
+        search_status = row.get("searchStatus")
+        
+        # Calculate profitability score. The crime and macro parts are kept apart so homes can be
+        # rescored from score_base when the (shared, per-city / per-region) figures move.
+        score_base = calculate_base_score(
+            price=price,
+            size_sqft=size_sqft,
+            estimated_rent=estimated_rent,
+            year_built=year_built,
+            property_type=property_type,
+            days_on_market=days_on_market,
+            is_hot=is_hot,
+            is_new_listing=is_new_listing,
+            search_status=search_status,
+            bathrooms=bathrooms,
+            lot_area=lot_area,
+            is_virtual_tour=is_virtual_tour,
+        )
+        crime = (crime_rate, violent_crime, property_crime)
+        macro = (lagged_cpi, fed_rate, lagged_unemployment, volatility_value, nr_weeks)
+        profitability_score = 0.0 if score_base is None else combine_score(
+            score_base,
+            calculate_crime_points(derive_crime_risk(*crime)),
+            calculate_macro_points(*macro),
+        )
+        
+        property_data = {
+            "address": full_address,
+            "city": city,
+            "state": state,
+            "zip_code": zip_code,
+            "price": price,
+            "size_sqft": size_sqft,
+            "bedrooms": bedrooms,
+            "bathrooms": bathrooms,
+            "property_type": property_type,
+            "year_built": year_built,
+            "lat": lat,
+            "lng": lng,
+            "estimated_rent": estimated_rent,
+            "profitability_score": profitability_score,
+            "score_base": score_base,
+            "image_url": None,
+            # Not properties columns; the writer links them to city_risk / macro_indicators rows.
+            "crime": crime if any(value is not None for value in crime) else None,
+            "macro": macro if any(value is not None for value in macro) else None,
+            # Not a properties column; recorded with price history.
+            "listing_status": (search_status or "").strip().upper()[:30] or None,
+        }
+        property_data["dedupe_hash"] = build_property_dedupe_hash(property_data)
+        property_data["location_hash"] = build_location_hash(property_data)
+        return property_data
+    
+    except Exception as e:
+        print(f"❌ Error parsing row: {str(e)}")
+        return None
+
+
+def parse_chunk(
+    chunk: List[Tuple[int, Dict[str, str], Optional[Dict[str, Optional[str]]]]],
+) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+    """Parse ``(row_num, row, geocode_data)`` items, keeping row numbers for ordered output."""
+    return [(row_num, parse_listing(row, geocode_data)) for row_num, row, geocode_data in chunk]
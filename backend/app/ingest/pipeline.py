@@ -0,0 +1,43 @@
+"""
+Parallel parse/score stage for the CSV loader.
+
+The reader hands over chunks of ``(row_num, row, geocode_data)``; a process
+pool runs ``parse_chunk`` on them and results come back strictly in
+submission order, so the single writer sees rows in file order no matter
+how many workers there are. At most ``max_pending`` chunks are in flight,
+which bounds memory and pushes back on the reader when the writer falls
+behind.
+"""
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .parsing import parse_chunk
+
+
+ParsedChunk = List[Tuple[int, Optional[Dict[str, Any]]]]
+
+
+def parse_chunks(
+    chunks: Iterable[List[Tuple[int, Dict[str, str], Any]]],
+    workers: int = 1,
+    max_pending: Optional[int] = None,
+) -> Iterator[ParsedChunk]:
+    """Yield parsed chunks in input order, parsing on ``workers`` processes."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield parse_chunk(chunk)
+        return
+
+    max_pending = max_pending or workers * 2
+    # Spawned workers do not inherit the loader's HTTP client, event loop or DB pool.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(parse_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
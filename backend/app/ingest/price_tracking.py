@@ -0,0 +1,122 @@
+"""
+Price-change tracking for homes the loader has already stored.
+
+A listing whose ``location_hash`` (its coordinates) is already in
+``properties`` is the same home seen again. Instead of inserting a
+near-copy, the loader passes it here: a changed price updates the stored
+home's price, rent estimate, score (with the city risk and macro indicator
+rows it was scored with) and ``dedupe_hash`` in place and appends a
+``property_price_history`` row; an unchanged price is a plain
+duplicate. Newly inserted homes get their first history row, so every
+tracked home's trajectory starts at the price it was first seen at.
+
+Only homes with coordinates are tracked. Rows without them only carry a
+"City, ST" address, which does not identify a single home.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Table, bindparam, insert, select, update
+from sqlalchemy.engine import Connection
+
+from ..models import Property, PropertyPriceHistory
+from .bulk import copy_rows
+from .parsing import normalize_price_key
+
+
+HISTORY_COLUMNS = ["property_id", "price", "status"]
+
+
+def _current_homes(connection: Connection, table: Table, location_hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Map location hashes to the stored home (the oldest row, if older data has several)."""
+    hashes = list(set(location_hashes))
+    if not hashes:
+        return {}
+    rows = connection.execute(
+        select(table.c.id, table.c.location_hash, table.c.price, table.c.dedupe_hash)
+        .where(table.c.location_hash.in_(hashes))
+        .order_by(table.c.id)
+    ).mappings()
+    homes: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        homes.setdefault(row["location_hash"], dict(row))
+    return homes
+
+
+def track_prices(
+    connection: Connection,
+    inserted: List[Dict[str, Any]],
+    observations: List[Dict[str, Any]],
+    table: Optional[Table] = None,
+    history_table: Optional[Table] = None,
+) -> Tuple[int, int]:
+    """
+    Record first prices for ``inserted`` homes and apply ``observations`` of known homes.
+
+    Both lists hold parsed listings with coordinates, in file order; ``inserted``
+    must already be written. Staged loads pass their staging tables as
+    ``table`` and ``history_table``. Returns ``(price_changes, unchanged)``.
+    """
+    table = table if table is not None else Property.__table__
+    history_table = history_table if history_table is not None else PropertyPriceHistory.__table__
+    homes = _current_homes(
+        connection, table, [row["location_hash"] for row in inserted] + [row["location_hash"] for row in observations]
+    )
+    history = []
+    for row in inserted:
+        home = homes.get(row["location_hash"])
+        if home is not None and home["dedupe_hash"] == row["dedupe_hash"]:
+            history.append({"property_id": home["id"], "price": row["price"], "status": row.get("listing_status")})
+
+    changes: Dict[int, Dict[str, Any]] = {}
+    price_changes = unchanged = 0
+    for row in observations:
+        home = homes.get(row["location_hash"])
+        if home is None or normalize_price_key(home["price"]) == normalize_price_key(row["price"]):
+            unchanged += 1
+            continue
+        home["price"] = row["price"]
+        changes[home["id"]] = {
+            "home_id": home["id"],
+            "new_price": row["price"],
+            "new_estimated_rent": row["estimated_rent"],
+            "new_profitability_score": row["profitability_score"],
+            "new_score_base": row.get("score_base"),
+            "new_city_risk_id": row.get("city_risk_id"),
+            "new_macro_indicator_id": row.get("macro_indicator_id"),
+            "new_dedupe_hash": row["dedupe_hash"],
+        }
+        history.append({"property_id": home["id"], "price": row["price"], "status": row.get("listing_status")})
+        price_changes += 1
+
+    if changes:
+        # Another (older, duplicated) row may already hold the new listing key; keep the old one then.
+        taken = set(connection.scalars(
+            select(table.c.dedupe_hash).where(
+                table.c.dedupe_hash.in_({change["new_dedupe_hash"] for change in changes.values()})
+            )
+        ))
+        stored_dedupe_hashes = {home["id"]: home["dedupe_hash"] for home in homes.values()}
+        for change in changes.values():
+            if change["new_dedupe_hash"] in taken:
+                change["new_dedupe_hash"] = stored_dedupe_hashes[change["home_id"]]
+
+        connection.execute(
+            update(table)
+            .where(table.c.id == bindparam("home_id"))
+            .values(
+                price=bindparam("new_price"),
+                estimated_rent=bindparam("new_estimated_rent"),
+                profitability_score=bindparam("new_profitability_score"),
+                score_base=bindparam("new_score_base"),
+                city_risk_id=bindparam("new_city_risk_id"),
+                macro_indicator_id=bindparam("new_macro_indicator_id"),
+                dedupe_hash=bindparam("new_dedupe_hash"),
+            ),
+            list(changes.values()),
+        )
+
+    if history and connection.dialect.name == "postgresql":
+        copy_rows(connection, history_table.name, history, HISTORY_COLUMNS)
+    elif history:
+        connection.execute(insert(history_table), history)
+    return price_changes, unchanged
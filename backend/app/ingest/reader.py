@@ -0,0 +1,113 @@
+"""
+Seekable CSV reader for resumable loads.
+
+The file is read in binary mode one record at a time, so the loader always
+knows the byte offset where the next record starts. A record ends at a
+newline outside quotes: while a line holds an odd number of ``"`` it is
+inside a quoted field and the next line is appended. Multiline values are
+therefore kept together and every offset handed out is a record boundary
+that ``seek()`` can return to.
+
+Row numbers follow ``csv.DictReader`` counting (header = row 1, blank
+lines skipped). Every ``index_interval``-th row's start offset is recorded
+in ``row_offsets`` so callers can persist a sparse row-to-offset index.
+"""
+import csv
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_INDEX_INTERVAL = 10000
+
+SKIP_READ_SIZE = 1 << 20
+
+
+class OffsetCSVReader:
+    """``csv.DictReader`` over a binary file that also reports byte offsets."""
+
+    def __init__(self, f: BinaryIO, encoding: str = "utf-8", index_interval: int = DEFAULT_INDEX_INTERVAL):
+        self._f = f
+        # mmap objects only grew seekable() in Python 3.13; they always seek.
+        self._seekable = f.seekable() if hasattr(f, "seekable") else True
+        self.encoding = encoding
+        self.index_interval = index_interval
+        self.offset = 0
+        self.next_row_num = 1
+        self.row_offsets: Dict[int, int] = {}
+
+        header = self._next_record()
+        self.fieldnames: Optional[List[str]] = (
+            next(csv.reader([header[1].decode(encoding)])) if header else None
+        )
+        self.data_start = self.offset
+
+    def _read_record(self) -> Optional[bytes]:
+        line = self._f.readline()
+        if not line:
+            return None
+        while line.count(b'"') % 2:  # Newline inside a quoted field
+            more = self._f.readline()
+            if not more:
+                break
+            line += more
+        return line
+
+    def _next_record(self) -> Optional[Tuple[int, bytes]]:
+        """Return the next non-blank ``(row_num, raw_record)`` and advance ``offset``."""
+        while True:
+            start = self.offset
+            raw = self._read_record()
+            if raw is None:
+                return None
+            self.offset += len(raw)
+            if not raw.rstrip(b"\r\n"):
+                continue
+            row_num = self.next_row_num
+            self.next_row_num += 1
+            if row_num % self.index_interval == 0:
+                self.row_offsets[row_num] = start
+            return row_num, raw
+
+    def seek(self, byte_offset: int, row_num: int) -> None:
+        """Continue reading at ``byte_offset``, which must be where ``row_num`` starts."""
+        if self._seekable:
+            self._f.seek(byte_offset)
+        else:
+            # Forward-only streams (zstd) get there by reading ahead.
+            remaining = byte_offset - self.offset
+            if remaining < 0:
+                raise ValueError("Cannot seek backwards in a forward-only stream")
+            while remaining > 0:
+                skipped = len(self._f.read(min(remaining, SKIP_READ_SIZE)))
+                if not skipped:
+                    break
+                remaining -= skipped
+        self.offset = byte_offset
+        self.next_row_num = row_num
+
+    def skip_to(self, row_num: int) -> None:
+        """Advance without CSV-parsing so the next row yielded is ``row_num``."""
+        while self.next_row_num < row_num:
+            if self._next_record() is None:
+                return
+
+    def _decoded_records(self) -> Iterator[str]:
+        while True:
+            record = self._next_record()
+            if record is None:
+                return
+            self._current = (record[0], self.offset)
+            yield record[1].decode(self.encoding)
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict[str, Optional[str]], int]]:
+        """Yield ``(row_num, row, end_offset)``; ``end_offset`` is where the next row starts."""
+        fieldnames = self.fieldnames or []
+        field_count = len(fieldnames)
+        # Each string handed to csv.reader is exactly one record.
+        for values in csv.reader(self._decoded_records()):
+            row_num, end_offset = self._current
+            row: Dict[str, Optional[str]] = dict(zip(fieldnames, values))
+            if len(values) < field_count:
+                row.update(dict.fromkeys(fieldnames[len(values):]))
+            elif len(values) > field_count:
+                row[None] = values[field_count:]
+            yield row_num, row, end_offset
@@ -0,0 +1,180 @@
+"""
+Shared score components and set-based rescoring.
+
+Two parts of a home's score come from figures the feed repeats on every
+listing of a group of homes: crime risk (per city, ``city_risk``) and the
+macro indicators (per state and load date, ``macro_indicators``). Each
+group is stored once with the points it adds to the score, and homes link
+to it. A home keeps ``score_base``, its score without the linked
+components, so
+
+    profitability_score = round(clamp(score_base + crime points + macro points), 2)
+
+and when a group's figures change, ``rescore_homes`` recomputes just the
+homes linked to it with one ``UPDATE`` that reads the points from the
+component tables. Rows whose score does not actually change are not written.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import Numeric, Table, case, cast, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
+
+from ..core.scoring import combine_score
+from ..models import CityRisk, MacroIndicator, Property
+
+
+Figures = Tuple[Optional[float], ...]
+
+
+def combine_score_sql(score_base, *components):
+    """SQL for ``combine_score``: ``round(clamp(score_base + components, 0, 100), 2)``.
+
+    Numeric rounding can differ from Python's float ``round`` by 0.01 on exact ties.
+    """
+    raw = score_base
+    for points in components:
+        raw = raw + points
+    clamped = case((raw < 0, 0.0), (raw > 100, 100.0), else_=raw)
+    return func.round(cast(clamped, Numeric(12, 4)), 2)
+
+
+def linked_score_sql(table: Table):
+    """A home's score from ``score_base`` and the points of the components it links to."""
+    crime = select(CityRisk.__table__.c.crime_points).where(CityRisk.__table__.c.id == table.c.city_risk_id)
+    macro = select(MacroIndicator.__table__.c.macro_points).where(
+        MacroIndicator.__table__.c.id == table.c.macro_indicator_id
+    )
+    return combine_score_sql(
+        table.c.score_base,
+        func.coalesce(crime.scalar_subquery(), 0.0),
+        func.coalesce(macro.scalar_subquery(), 0.0),
+    )
+
+
+def link_components(connection: Connection, listing: Dict[str, Any], caches: Sequence["SharedComponentCache"]) -> None:
+    """Link a parsed listing to its component rows and score it from ``score_base`` and their points."""
+    points = [cache.apply(connection, listing) for cache in caches]
+    if listing.get("score_base") is not None:
+        listing["profitability_score"] = combine_score(listing["score_base"], *points)
+
+
+def rescore_homes(connection: Connection, *conditions) -> int:
+    """Recompute ``profitability_score`` for homes matching ``conditions`` (all scored homes if none).
+
+    Returns the number of homes whose score changed.
+    """
+    live = Property.__table__
+    new_score = linked_score_sql(live)
+    statement = (
+        update(live)
+        .where(live.c.score_base.is_not(None), live.c.profitability_score != new_score, *conditions)
+        .values(profitability_score=new_score)
+    )
+    return connection.execute(statement).rowcount
+
+
+class SharedComponentCache(ABC):
+    """
+    In-memory map from a group key to its component row, for one load.
+
+    Subclasses name the component table, its figure columns and how a
+    parsed listing maps to a group. The first listing of a group in a load
+    creates the group's row, or refreshes it (and rescores the group's
+    homes) when the feed's figures changed since the row was written. Later
+    listings are resolved from the dict. Every listing with figures is
+    linked to its group's row and scored with the row's points, also when
+    its own figures disagree with the row (counted in ``stats``): the
+    figures are per group, and a home's score is always ``score_base`` plus
+    the points of the rows it links to, never points of its own.
+
+    With ``staged=True`` refreshed figures go to the component's staging
+    table instead (one row per live id, read back by later files of the
+    delivery) and ``publish_staged`` applies them and rescores the homes
+    they move. New groups are still inserted live; no live home links to
+    them before the publish.
+    """
+
+    table: Table
+    staging_table: Table  # Same columns; ``id`` is the live row a staged refresh replaces
+    group_columns: Tuple[str, ...]  # The table's unique key
+    fields: Tuple[str, ...]
+    listing_key: str  # Key parse_listing puts the figures under
+    link_column: str  # properties column that references the component row
+    points_column: str
+
+    def __init__(self, staged: bool = False):
+        self.staged = staged
+        self._known: Dict[Tuple[Any, ...], Tuple[int, float, Figures]] = {}
+        self.stats = {"created": 0, "refreshed": 0, "rescored": 0, "disagreed": 0}
+
+    @abstractmethod
+    def group(self, listing: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Unique-key columns of the listing's group, or None if it has none."""
+
+    @abstractmethod
+    def component_values(self, figures: Dict[str, Optional[float]]) -> Dict[str, Any]:
+        """Points (and anything else derived) stored with a group's figures."""
+
+    def apply(self, connection: Connection, listing: Dict[str, Any]) -> float:
+        """Link a parsed listing to its group's row; returns the row's points (0 if not linked)."""
+        values: Optional[Figures] = listing.pop(self.listing_key, None)
+        group = self.group(listing) if values is not None else None
+        if group is None:
+            return 0.0
+        row_id, points, stored = self.resolve(connection, group, values)
+        listing[self.link_column] = row_id
+        if values != stored:
+            self.stats["disagreed"] += 1
+        return points
+
+    def resolve(self, connection: Connection, group: Dict[str, Any], values: Figures) -> Tuple[int, float, Figures]:
+        """Row id, points and figures of the group's row, written from ``values`` on first use."""
+        key = tuple(group.values())
+        known = self._known.get(key)
+        if known is not None:
+            return known
+
+        table = self.table
+        figures = dict(zip(self.fields, values))
+        derived = self.component_values(figures)
+        self._insert_if_missing(connection, {**group, **figures, **derived})
+        row = connection.execute(
+            select(table).where(*(table.c[name] == value for name, value in group.items()))
+        ).mappings().one()
+        current = row
+        if self.staged:
+            staging = self.staging_table
+            current = connection.execute(
+                select(staging).where(staging.c.id == row["id"])
+            ).mappings().first() or row
+        if any(current[field] != figures[field] for field in self.fields):
+            self.stats["refreshed"] += 1
+            if self.staged:
+                connection.execute(staging.delete().where(staging.c.id == row["id"]))
+                connection.execute(insert(staging).values(**{**row, **figures, **derived}))
+            else:
+                connection.execute(update(table).where(table.c.id == row["id"]).values(**figures, **derived))
+                if derived[self.points_column] != row[self.points_column]:
+                    self.stats["rescored"] += rescore_homes(
+                        connection, Property.__table__.c[self.link_column] == row["id"]
+                    )
+        self._known[key] = (row["id"], derived[self.points_column], values)
+        return self._known[key]
+
+    def _insert_if_missing(self, connection: Connection, values: Dict[str, Any]) -> None:
+        table = self.table
+        unique_columns = list(self.group_columns)
+        if connection.dialect.name in ("postgresql", "sqlite"):
+            dialect_insert = pg_insert if connection.dialect.name == "postgresql" else sqlite_insert
+            statement = dialect_insert(table).values(**values).on_conflict_do_nothing(index_elements=unique_columns)
+        elif connection.execute(
+            select(table.c.id).where(*(table.c[name] == values[name] for name in unique_columns))
+        ).first() is not None:
+            return
+        else:
+            statement = insert(table).values(**values)
+        if connection.execute(statement).rowcount:
+            self.stats["created"] += 1
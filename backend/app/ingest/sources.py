@@ -0,0 +1,109 @@
+"""
+Input streams for the CSV loader.
+
+Compressed feeds (gzip, bzip2, xz and zstd) are recognised by their magic
+bytes and decompressed incrementally as rows are read, so no decompressed
+copy ever lands on disk. Plain files are memory-mapped: reads come straight
+from the page cache and ``readline`` runs in C over the mapping.
+
+Every stream is binary and positions are in decompressed bytes, which is
+what ``OffsetCSVReader`` offsets and load checkpoints store. zstd needs the
+``zstandard`` package.
+"""
+import bz2
+import glob
+import gzip
+import io
+import lzma
+import mmap
+import os
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # Only needed for .zst feeds.
+    zstandard = None
+
+
+# Decompressed bytes buffered per read from a compressed stream.
+READ_BUFFER_SIZE = 1 << 20
+
+# File names picked up when a directory is given as input.
+CSV_SUFFIXES = (".csv", ".csv.gz", ".csv.bz2", ".csv.xz", ".csv.zst")
+
+MAGIC_BYTES = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+    (b"BZh", "bzip2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+
+
+def detect_compression(path: str) -> Optional[str]:
+    """Return ``"gzip"``, ``"zstd"``, ``"bzip2"``, ``"xz"`` or None for a plain file."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, compression in MAGIC_BYTES:
+        if head.startswith(magic):
+            if compression == "zstd" and zstandard is None:
+                raise ValueError(f"{path} is zstd-compressed; install the 'zstandard' package to read it")
+            return compression
+    return None
+
+
+@contextmanager
+def open_csv_source(path: str) -> Iterator[BinaryIO]:
+    """Open ``path`` for binary line reading, decompressing or memory-mapping as appropriate."""
+    compression = detect_compression(path)
+    with ExitStack() as stack:
+        if compression is None:
+            f = stack.enter_context(open(path, "rb"))
+            if os.fstat(f.fileno()).st_size == 0:
+                yield f  # Empty files cannot be mapped
+            else:
+                yield stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            return
+
+        if compression == "gzip":
+            stream = gzip.open(path, "rb")
+        elif compression == "bzip2":
+            stream = bz2.open(path, "rb")
+        elif compression == "xz":
+            stream = lzma.open(path, "rb")
+        else:
+            raw = stack.enter_context(open(path, "rb"))
+            # Forward-only; OffsetCSVReader.seek reads ahead instead of seeking.
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, read_size=READ_BUFFER_SIZE)
+        stack.enter_context(stream)
+        yield stack.enter_context(io.BufferedReader(stream, buffer_size=READ_BUFFER_SIZE))
+
+
+def expand_input_paths(inputs: Iterable[str]) -> List[str]:
+    """Resolve files, directories and glob patterns to an ordered list of distinct files.
+
+    Directories contribute the CSV files directly inside them. Paths that do
+    not exist are kept so the loader can report them.
+    """
+    paths: List[str] = []
+    for item in inputs:
+        if any(char in item for char in "*?["):
+            paths.extend(match for match in sorted(glob.glob(item, recursive=True)) if os.path.isfile(match))
+        elif os.path.isdir(item):
+            paths.extend(
+                str(entry)
+                for entry in sorted(Path(item).iterdir())
+                if entry.is_file() and entry.name.lower().endswith(CSV_SUFFIXES)
+            )
+        else:
+            paths.append(item)
+
+    seen = set()
+    distinct = []
+    for path in paths:
+        key = os.path.realpath(path)
+        if key not in seen:
+            seen.add(key)
+            distinct.append(path)
+    return distinct
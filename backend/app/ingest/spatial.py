@@ -0,0 +1,223 @@
+"""
+Spatial near-duplicate detection for the CSV loader.
+
+Homes with coordinates are bucketed on a grid of cells at least
+``cell_meters`` wide (stored as ``properties.geo_cell``, e.g.
+``"100/3587/-10771"``). Grid rows are ``cell_meters`` of latitude; within
+a row the longitude step is sized for the row's poleward edge, so no cell
+is narrower than ``cell_meters`` anywhere in it. Any home within
+``radius_meters`` of a point is then in the point's cell or the
+cells its radius box overlaps, and a lookup probes a handful of cells
+however large the table is.
+
+Homes in range only count as the same home when the bedroom count
+matches, living areas are within ``SIZE_TOLERANCE`` and the addresses are
+similar enough (``difflib`` ratio). That keeps neighbouring units and
+next-door houses apart. Without a geocoded street address (geocoder off or
+offline) the parser falls back to "City, ST", which every home of the city
+shares, so such listings are never matched by proximity.
+"""
+import difflib
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import Table, bindparam, or_, select, update
+from sqlalchemy.engine import Connection, Engine
+
+from ..models import Property
+from .parsing import normalize_text
+
+
+METERS_PER_DEGREE_LAT = 111_320.0
+EARTH_RADIUS_M = 6_371_008.8
+
+# Largest relative living-area difference between two listings of one home.
+SIZE_TOLERANCE = 0.05
+
+
+def has_street_address(home: Dict[str, Any]) -> bool:
+    """False when the address is empty or just the "City, ST" fallback of ungeocoded listings."""
+    address = normalize_text(home.get("address"))
+    return bool(address) and address != normalize_text(f"{home.get('city')}, {home.get('state')}")
+
+
+def haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoGrid:
+    """Maps coordinates to ``geo_cell`` keys and their neighbourhoods."""
+
+    def __init__(self, cell_meters: float):
+        self.cell_meters = cell_meters
+        self.lat_step = cell_meters / METERS_PER_DEGREE_LAT
+        self.prefix = f"{cell_meters:g}/"
+        self._lng_steps: Dict[int, float] = {}
+
+    def _lng_step(self, row: int) -> float:
+        step = self._lng_steps.get(row)
+        if step is None:
+            poleward = min(max(abs(row * self.lat_step), abs((row + 1) * self.lat_step)), 89.9)
+            step = self._lng_steps[row] = self.lat_step / math.cos(math.radians(poleward))
+        return step
+
+    def key(self, lat: float, lng: float) -> str:
+        row = math.floor(lat / self.lat_step)
+        return f"{self.prefix}{row}/{math.floor(lng / self._lng_step(row))}"
+
+    def neighbor_keys(self, lat: float, lng: float, radius_meters: float) -> List[str]:
+        """Keys of every cell overlapping the box of ``radius_meters`` around the point.
+
+        Usually one to four cells; only cells the radius actually reaches are probed.
+        """
+        d_lat = radius_meters / METERS_PER_DEGREE_LAT
+        d_lng = d_lat / math.cos(math.radians(min(abs(lat) + d_lat, 89.9)))
+        keys = []
+        for row in range(math.floor((lat - d_lat) / self.lat_step), math.floor((lat + d_lat) / self.lat_step) + 1):
+            step = self._lng_step(row)
+            for col in range(math.floor((lng - d_lng) / step), math.floor((lng + d_lng) / step) + 1):
+                keys.append(f"{self.prefix}{row}/{col}")
+        return keys
+
+
+class NearDuplicateIndex:
+    """
+    Cell index of stored and pending homes for one load.
+
+    ``load`` pulls the stored homes around a chunk of listings in one query;
+    ``add`` registers listings queued for insert; ``clear`` drops everything
+    once a batch is committed (those homes are then found in the database).
+    """
+
+    def __init__(
+        self,
+        radius_meters: float,
+        cell_meters: float,
+        min_address_similarity: float,
+        tables: Optional[Sequence[Table]] = None,
+    ):
+        self.radius_meters = radius_meters
+        self.tables = tables or [Property.__table__]
+        self.min_address_similarity = min_address_similarity
+        self.grid = GeoGrid(cell_meters)
+        self._cells: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._loaded: Set[str] = set()
+        self.stats = {"matched": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.radius_meters > 0
+
+    def load(self, connection: Connection, listings: Iterable[Dict[str, Any]]) -> None:
+        if not self.enabled:
+            return
+        keys = set()
+        for listing in listings:
+            keys.update(self.grid.neighbor_keys(listing["lat"], listing["lng"], self.radius_meters))
+        missing = keys - self._loaded
+        if not missing:
+            return
+        for table in self.tables:
+            rows = connection.execute(
+                select(
+                    table.c.lat,
+                    table.c.lng,
+                    table.c.address,
+                    table.c.city,
+                    table.c.state,
+                    table.c.bedrooms,
+                    table.c.size_sqft,
+                    table.c.location_hash,
+                    table.c.geo_cell,
+                ).where(table.c.geo_cell.in_(missing))
+            ).mappings()
+            for row in rows:
+                self._cells[row["geo_cell"]].append(dict(row))
+        self._loaded |= missing
+
+    def add(self, listing: Dict[str, Any]) -> None:
+        if self.enabled:
+            self._cells[listing["geo_cell"]].append(listing)
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._loaded.clear()
+
+    def _same_home(self, listing: Dict[str, Any], candidate: Dict[str, Any]) -> bool:
+        if not has_street_address(candidate):
+            return False
+        if listing.get("bedrooms") != candidate.get("bedrooms"):
+            return False
+        size, other_size = listing.get("size_sqft"), candidate.get("size_sqft")
+        if size and other_size and abs(size - other_size) > SIZE_TOLERANCE * max(size, other_size):
+            return False
+        similarity = difflib.SequenceMatcher(
+            None, normalize_text(listing.get("address")), normalize_text(candidate.get("address"))
+        ).ratio()
+        return similarity >= self.min_address_similarity
+
+    def find(self, listing: Dict[str, Any]) -> Optional[str]:
+        """Return the ``location_hash`` of the closest home this listing duplicates, if any."""
+        if not self.enabled or not has_street_address(listing):
+            return None
+        lat, lng = listing["lat"], listing["lng"]
+        best: Optional[Tuple[float, str]] = None
+        for key in self.grid.neighbor_keys(lat, lng, self.radius_meters):
+            for candidate in self._cells.get(key, ()):
+                if candidate.get("location_hash") is None:
+                    continue
+                distance = haversine_meters(lat, lng, candidate["lat"], candidate["lng"])
+                if distance > self.radius_meters or (best is not None and distance >= best[0]):
+                    continue
+                if self._same_home(listing, candidate):
+                    best = (distance, candidate["location_hash"])
+        if best is None:
+            return None
+        self.stats["matched"] += 1
+        return best[1]
+
+
+def assign_geo_cells(engine: Engine, grid: GeoGrid, batch_size: int = 5000) -> int:
+    """Compute ``geo_cell`` for homes with coordinates where it is missing or on another grid.
+
+    Returns the number of rows updated. Normally this is two single-row probes.
+    """
+    table = Property.__table__
+    with engine.connect() as connection:
+        has_coordinates = Property.lat.is_not(None) & Property.lng.is_not(None)
+        missing = connection.execute(
+            select(Property.id).where(has_coordinates, Property.geo_cell.is_(None)).limit(1)
+        ).first() is not None
+        sample = connection.scalar(select(Property.geo_cell).where(Property.geo_cell.is_not(None)).limit(1))
+        regrid = sample is not None and not sample.startswith(grid.prefix)
+
+    updated = 0
+    if missing or regrid:
+        stale = or_(Property.geo_cell.is_(None), Property.geo_cell.not_like(f"{grid.prefix}%"))
+        last_id = 0
+        with engine.connect() as connection:
+            while True:
+                partition = connection.execute(
+                    select(Property.id, Property.lat, Property.lng)
+                    .where(has_coordinates, stale, Property.id > last_id)
+                    .order_by(Property.id)
+                    .limit(batch_size)
+                ).all()
+                if not partition:
+                    break
+                connection.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("row_id"))
+                    .values(geo_cell=bindparam("new_geo_cell")),
+                    [{"row_id": row.id, "new_geo_cell": grid.key(row.lat, row.lng)} for row in partition],
+                )
+                connection.commit()
+                updated += len(partition)
+                last_id = partition[-1].id
+    return updated
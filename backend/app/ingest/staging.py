@@ -0,0 +1,190 @@
+"""
+Staged loads: write an import to shadow tables, then publish it at once.
+
+A ``--staged`` load inserts new homes into ``properties_staging`` and
+writes price changes of live homes to a staged copy of the home
+(copy-on-write: the live row is copied in with ``property_id`` set and
+updated there). Price history goes to ``property_price_history_staging``,
+and refreshed crime and macro figures to ``city_risk_staging`` and
+``macro_indicators_staging`` (keyed by the live row's id). Checkpoints and
+the batch loop work as usual, so a staged load can be resumed. The live
+tables are not touched until ``publish_staged`` merges everything staged
+in one transaction:
+
+- copy the staged figures over their live city risk and macro indicator rows
+- update the live rows of staged copies whose price changed
+- ``INSERT ... SELECT`` the new homes (``ON CONFLICT (dedupe_hash) DO NOTHING``)
+- append the staged history, mapped to live ids
+- rescore the published homes and the live homes whose component points moved
+- empty the staging tables and mark staged checkpoints and manifest entries complete
+
+Renaming a fully built copy over ``properties`` is not an option:
+``favorites`` and ``property_price_history`` reference ``properties.id``
+and would keep pointing at the old table. Readers are never blocked by the
+publish under MVCC; they see the old data until it commits and the whole
+import after.
+"""
+from typing import Dict, Iterable, List
+
+from sqlalchemy import and_, exists, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection, Engine
+
+from ..models import (
+    CityRisk,
+    CityRiskStaging,
+    LoadCheckpoint,
+    LoadManifest,
+    MacroIndicator,
+    MacroIndicatorStaging,
+    PriceHistoryStaging,
+    Property,
+    PropertyPriceHistory,
+    PropertyStaging,
+)
+from .bulk import PROPERTY_INSERT_COLUMNS
+from .rescoring import rescore_homes
+
+
+STAGED_STATUS = "staged"
+
+# (live table, staging table, properties column linking to it, points column)
+STAGED_COMPONENTS = (
+    (CityRisk.__table__, CityRiskStaging.__table__, "city_risk_id", "crime_points"),
+    (MacroIndicator.__table__, MacroIndicatorStaging.__table__, "macro_indicator_id", "macro_points"),
+)
+STAGING_TABLES = [
+    PriceHistoryStaging.__table__,
+    PropertyStaging.__table__,
+    *(staging for _, staging, _, _ in STAGED_COMPONENTS),
+]
+
+
+def staging_is_empty(connection: Connection) -> bool:
+    return all(connection.execute(select(table.c.id).limit(1)).first() is None for table in STAGING_TABLES)
+
+
+def reset_staging_tables(engine: Engine) -> bool:
+    """Recreate empty staging tables so they match the current ``properties`` columns.
+
+    Returns False (and leaves them alone) when a staged import is waiting to be published.
+    """
+    with engine.begin() as connection:
+        if not staging_is_empty(connection):
+            return False
+        for table in STAGING_TABLES:
+            table.drop(connection, checkfirst=True)
+        for table in reversed(STAGING_TABLES):
+            table.create(connection)
+    return True
+
+
+def stage_known_homes(connection: Connection, location_hashes: Iterable[str]) -> int:
+    """Copy live homes at these locations into staging (once each) so staged price changes apply there."""
+    hashes = list(set(location_hashes))
+    if not hashes:
+        return 0
+    live, staged = Property.__table__, PropertyStaging.__table__
+    source = select(live.c.id, *(live.c[name] for name in PROPERTY_INSERT_COLUMNS)).where(
+        live.c.location_hash.in_(hashes),
+        ~exists().where(staged.c.location_hash == live.c.location_hash),
+    )
+    result = connection.execute(insert(staged).from_select(["property_id", *PROPERTY_INSERT_COLUMNS], source))
+    return result.rowcount
+
+
+def publish_components(connection: Connection) -> Dict[str, List[int]]:
+    """Copy staged figures over their live rows; returns, per link column, the ids whose points moved."""
+    moved = {}
+    for live, staged, link_column, points_column in STAGED_COMPONENTS:
+        moved[link_column] = list(connection.scalars(
+            select(staged.c.id)
+            .join(live, live.c.id == staged.c.id)
+            .where(live.c[points_column] != staged.c[points_column])
+        ))
+        copied = [column.name for column in staged.columns if column.name not in ("id", "created_at", "updated_at")]
+        connection.execute(
+            update(live).where(live.c.id == staged.c.id).values(**{name: staged.c[name] for name in copied})
+        )
+    return moved
+
+
+def publish_staged(connection: Connection) -> Dict[str, int]:
+    """Merge everything staged into the live tables. Run inside one transaction; the caller commits."""
+    live, staged = Property.__table__, PropertyStaging.__table__
+    other = live.alias("other")
+
+    moved = publish_components(connection)
+
+    updated = connection.execute(
+        update(live)
+        .where(live.c.id == staged.c.property_id, live.c.price != staged.c.price)
+        .values(
+            price=staged.c.price,
+            estimated_rent=staged.c.estimated_rent,
+            profitability_score=staged.c.profitability_score,
+            score_base=staged.c.score_base,
+            city_risk_id=staged.c.city_risk_id,
+            macro_indicator_id=staged.c.macro_indicator_id,
+        )
+    ).rowcount
+    # A listing key another live row already holds stays where it is (as in track_prices).
+    connection.execute(
+        update(live)
+        .where(
+            live.c.id == staged.c.property_id,
+            live.c.dedupe_hash != staged.c.dedupe_hash,
+            ~exists().where(other.c.dedupe_hash == staged.c.dedupe_hash),
+        )
+        .values(dedupe_hash=staged.c.dedupe_hash)
+    )
+
+    new_homes = select(*(staged.c[name] for name in PROPERTY_INSERT_COLUMNS)).where(staged.c.property_id.is_(None))
+    if connection.dialect.name in ("postgresql", "sqlite"):
+        dialect_insert = pg_insert if connection.dialect.name == "postgresql" else sqlite_insert
+        statement = dialect_insert(live).from_select(PROPERTY_INSERT_COLUMNS, new_homes).on_conflict_do_nothing(
+            index_elements=["dedupe_hash"]
+        )
+    else:
+        statement = insert(live).from_select(PROPERTY_INSERT_COLUMNS, new_homes)
+    inserted = connection.execute(statement).rowcount
+
+    history, staged_history = PropertyPriceHistory.__table__, PriceHistoryStaging.__table__
+    property_id = func.coalesce(staged.c.property_id, live.c.id)
+    staged_prices = (
+        select(property_id, staged_history.c.observed_at, staged_history.c.price, staged_history.c.status)
+        .select_from(
+            staged_history.join(staged, staged.c.id == staged_history.c.property_id).outerjoin(
+                live, and_(staged.c.property_id.is_(None), live.c.dedupe_hash == staged.c.dedupe_hash)
+            )
+        )
+        .where(property_id.is_not(None))
+        .order_by(staged_history.c.id)
+    )
+    history_rows = connection.execute(
+        insert(history).from_select(["property_id", "observed_at", "price", "status"], staged_prices)
+    ).rowcount
+
+    # The published homes and the homes of moved components, each set through its index. Only
+    # homes whose stored score differs from score_base + their linked points are written.
+    rescored = rescore_homes(
+        connection, live.c.id.in_(select(staged.c.property_id).where(staged.c.property_id.is_not(None)))
+    )
+    rescored += rescore_homes(
+        connection, live.c.dedupe_hash.in_(select(staged.c.dedupe_hash).where(staged.c.property_id.is_(None)))
+    )
+    for link_column, ids in moved.items():
+        if ids:
+            rescored += rescore_homes(connection, live.c[link_column].in_(ids))
+
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"TRUNCATE {', '.join(table.name for table in STAGING_TABLES)}")
+    else:
+        for table in STAGING_TABLES:
+            connection.execute(table.delete())
+    for model in (LoadCheckpoint, LoadManifest):
+        connection.execute(
+            update(model.__table__).where(model.__table__.c.status == STAGED_STATUS).values(status="complete")
+        )
+    return {"inserted": inserted, "updated": updated, "history": history_rows, "rescored": rescored}
@@ -0,0 +1,160 @@
+"""
+Offline reverse geocoding from a ZIP/place centroid file.
+
+The centroid file is a CSV with one row per ZIP code and at least a ZIP,
+latitude and longitude column (``zip``/``zip_code``/``zcta``,
+``lat``/``latitude``, ``lng``/``lon``/``longitude``). Optional ``city`` and
+``state`` columns are returned alongside the nearest ZIP. ``.csv.gz`` files
+are read directly.
+
+Centroids are projected onto the unit sphere so that Euclidean nearest
+neighbour equals great-circle nearest neighbour. Queries use a SciPy
+``cKDTree`` when SciPy is installed and otherwise fall back to blocked
+NumPy dot products; both give identical answers for a whole batch of
+coordinates in one call.
+"""
+import csv
+import gzip
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # SciPy is optional; the NumPy path is exact, just slower.
+    cKDTree = None
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+ZIP_COLUMNS = ("zip", "zip_code", "zipcode", "zcta", "postcode")
+LAT_COLUMNS = ("lat", "latitude", "intptlat")
+LNG_COLUMNS = ("lng", "lon", "long", "longitude", "intptlong")
+
+Coordinate = Tuple[float, float]
+
+
+def _to_unit_vectors(lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    lat_rad = np.radians(lats)
+    lng_rad = np.radians(lngs)
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lng_rad), cos_lat * np.sin(lng_rad), np.sin(lat_rad)))
+
+
+def _pick_column(fieldnames: List[str], candidates: Tuple[str, ...]) -> Optional[str]:
+    lookup = {name.strip().lower(): name for name in fieldnames}
+    for candidate in candidates:
+        if candidate in lookup:
+            return lookup[candidate]
+    return None
+
+
+class ZipCentroidIndex:
+    """Nearest-ZIP lookup over a table of ZIP centroids."""
+
+    def __init__(
+        self,
+        zip_codes: List[str],
+        lats: Iterable[float],
+        lngs: Iterable[float],
+        cities: Optional[List[Optional[str]]] = None,
+        states: Optional[List[Optional[str]]] = None,
+        max_distance_km: float = 25.0,
+        use_kdtree: bool = True,
+    ):
+        self.zip_codes = list(zip_codes)
+        self.cities = cities or [None] * len(self.zip_codes)
+        self.states = states or [None] * len(self.zip_codes)
+        self.max_distance_km = max_distance_km
+        self._points = _to_unit_vectors(np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64))
+        self._tree = cKDTree(self._points) if (use_kdtree and cKDTree is not None) else None
+        self.stats = {"resolved": 0, "unmatched": 0}
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "ZipCentroidIndex":
+        """Load centroids from a (optionally gzip-compressed) CSV file."""
+        centroid_file = Path(path)
+        if not centroid_file.exists():
+            raise FileNotFoundError(f"ZIP centroid file not found: {path}")
+
+        opener = gzip.open if centroid_file.suffix == ".gz" else open
+        zip_codes, lats, lngs, cities, states = [], [], [], [], []
+        with opener(centroid_file, "rt", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            fieldnames = reader.fieldnames or []
+            zip_col = _pick_column(fieldnames, ZIP_COLUMNS)
+            lat_col = _pick_column(fieldnames, LAT_COLUMNS)
+            lng_col = _pick_column(fieldnames, LNG_COLUMNS)
+            city_col = _pick_column(fieldnames, ("city", "place", "primary_city"))
+            state_col = _pick_column(fieldnames, ("state", "state_code", "stusps"))
+            if not (zip_col and lat_col and lng_col):
+                raise ValueError(f"{path} needs ZIP, latitude and longitude columns, found: {fieldnames}")
+
+            for row in reader:
+                try:
+                    lat = float(row[lat_col])
+                    lng = float(row[lng_col])
+                except (TypeError, ValueError):
+                    continue
+                zip_code = str(row[zip_col]).strip()
+                if not zip_code:
+                    continue
+                zip_codes.append(zip_code.zfill(5))
+                lats.append(lat)
+                lngs.append(lng)
+                cities.append(row[city_col].strip() if city_col and row.get(city_col) else None)
+                states.append(row[state_col].strip().upper() if state_col and row.get(state_col) else None)
+
+        if not zip_codes:
+            raise ValueError(f"No usable centroids in {path}")
+        return cls(zip_codes, lats, lngs, cities, states, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.zip_codes)
+
+    def nearest(self, lats: Iterable[float], lngs: Iterable[float], block_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(indices, distances_km)`` of the nearest centroid for each query point."""
+        queries = _to_unit_vectors(np.asarray(lats, dtype=np.float64), np.asarray(lngs, dtype=np.float64))
+        if len(queries) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        if self._tree is not None:
+            chord, indices = self._tree.query(queries)
+        else:
+            indices = np.empty(len(queries), dtype=np.int64)
+            for start in range(0, len(queries), block_size):
+                block = queries[start:start + block_size]
+                indices[start:start + block_size] = np.argmax(block @ self._points.T, axis=1)
+            chord = np.linalg.norm(queries - self._points[indices], axis=1)
+
+        # Chord length on the unit sphere -> great-circle distance.
+        distances = 2.0 * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0)) * EARTH_RADIUS_KM
+        return np.asarray(indices, dtype=np.int64), distances
+
+    def reverse_many(self, coordinates: Iterable[Coordinate]) -> Dict[Coordinate, Optional[Dict[str, Optional[str]]]]:
+        """Resolve coordinates to ``{"address", "zip_code", "city", "state"}`` in one vectorized query.
+
+        Same shape as the online geocoder's results; ``address`` is always None
+        because centroids carry no street-level detail.
+        """
+        unique = list(dict.fromkeys(coordinates))
+        if not unique:
+            return {}
+        lats, lngs = zip(*unique)
+        indices, distances = self.nearest(lats, lngs)
+
+        results: Dict[Coordinate, Optional[Dict[str, Optional[str]]]] = {}
+        for coords, idx, distance in zip(unique, indices, distances):
+            if distance > self.max_distance_km:
+                results[coords] = None
+                self.stats["unmatched"] += 1
+                continue
+            results[coords] = {
+                "address": None,
+                "zip_code": self.zip_codes[idx],
+                "city": self.cities[idx],
+                "state": self.states[idx],
+            }
+            self.stats["resolved"] += 1
+        return results
@@ -0,0 +1,7 @@
+from .runner import FINISHED_STATUSES, JOB_HANDLERS, JobContext, JobRunner, cancel_job, job_handler, job_runner, resume_job, submit_job
+from . import tasks  # Registers the built-in job kinds
+
+__all__ = [
+    "FINISHED_STATUSES", "JOB_HANDLERS", "JobContext", "JobRunner",
+    "cancel_job", "job_handler", "job_runner", "resume_job", "submit_job",
+]
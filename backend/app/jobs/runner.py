@@ -0,0 +1,353 @@
+"""
+In-process background jobs.
+
+Jobs are rows in ``jobs``. ``submit_job`` queues one; every API process
+with ``JOB_WORKERS > 0`` runs a ``JobRunner`` whose asyncio workers claim
+queued rows (an ``UPDATE ... WHERE status = 'queued'``, so exactly one
+process wins each job) and run the job's handler in a thread, keeping long
+data work off the event loop and the request path.
+
+Handlers are registered with ``job_handler`` and called as
+``handler(context, **params)``. They report counters through
+``context.report``, which stores them on the row (at most once a second)
+and returns False once the job should stop: it was cancelled, from any
+process, or this process is shutting down. A handler that stops returns
+early with ``"stopped": True`` in its result. Handlers are written so a
+rerun continues where the last run stopped (loads resume from their
+checkpoint): a job stopped by a shutdown goes back to the queue, and a
+cancelled or failed one can be queued again with ``resume_job``.
+
+A job whose process died keeps status ``running`` until its heartbeat is
+``JOB_STALE_SECONDS`` old; then any runner puts it back in the queue, or
+marks it failed once it was claimed ``JOB_MAX_ATTEMPTS`` times (a job that
+kills its process would otherwise be retried forever).
+"""
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Job
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Stop reason of jobs interrupted by a shutdown; they are queued again.
+SHUTDOWN = "shutdown"
+
+# At most one progress write per job this often; running jobs heartbeat this often.
+PROGRESS_INTERVAL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 10.0
+
+JobHandler = Callable[..., Optional[Dict[str, Any]]]
+JOB_HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Register ``handler(context, **params)`` as the handler of ``kind`` jobs."""
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[kind] = handler
+        return handler
+    return register
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value  # SQLite returns naive UTC
+
+
+def submit_job(db: Session, kind: str, params: Optional[Dict[str, Any]] = None, created_by: Optional[str] = None) -> Job:
+    """Queue a job. Raises ValueError for an unknown kind or parameters its handler does not take."""
+    handler = JOB_HANDLERS.get(kind)
+    if handler is None:
+        raise ValueError(f"Unknown job kind {kind!r}; expected one of {', '.join(sorted(JOB_HANDLERS))}")
+    params = params or {}
+    try:
+        inspect.signature(handler).bind(None, **params)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for a {kind} job: {e}")
+    job = Job(kind=kind, params=params, status=QUEUED, created_by=created_by)
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def cancel_job(db: Session, job: Job) -> Job:
+    """Cancel a queued job now, or ask the process running it to stop it at its next report."""
+    if job.status in FINISHED_STATUSES:
+        raise ValueError(f"Job {job.id} already {job.status}")
+    if job.status == QUEUED:
+        job.status = CANCELLED
+        job.finished_at = utcnow()
+    job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def resume_job(db: Session, job: Job) -> Job:
+    """Queue a cancelled or failed job again; it continues where it stopped."""
+    if job.status not in (CANCELLED, FAILED):
+        raise ValueError(f"Only cancelled or failed jobs can be resumed; job {job.id} is {job.status}")
+    job.status = QUEUED
+    job.cancel_requested = False
+    job.error = None
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+class JobContext:
+    """What a running handler gets: its job id, attempt number and progress reporting."""
+
+    def __init__(self, job_id: int, attempt: int, session_factory: sessionmaker):
+        self.job_id = job_id
+        self.attempt = attempt
+        self.session_factory = session_factory
+        self.progress: Dict[str, Any] = {}
+        self.stop_reason: Optional[str] = None
+        self._written = 0.0
+        self._lock = threading.Lock()
+
+    def stop(self, reason: str) -> None:
+        if self.stop_reason is None:
+            self.stop_reason = reason
+
+    def report(self, counters: Dict[str, Any]) -> bool:
+        """Record progress counters; False once the handler should stop."""
+        self.progress = dict(counters)
+        if time.monotonic() - self._written >= PROGRESS_INTERVAL_SECONDS:
+            self.sync()
+        return self.stop_reason is None
+
+    def sync(self) -> None:
+        """Store progress and heartbeat; pick up a cancellation requested through any process."""
+        with self._lock, self.session_factory() as db:
+            self._written = time.monotonic()
+            db.execute(
+                update(Job).where(Job.id == self.job_id).values(progress=self.progress or None, heartbeat_at=utcnow())
+            )
+            cancel_requested = db.execute(select(Job.cancel_requested).where(Job.id == self.job_id)).scalar()
+            db.commit()
+        if cancel_requested:
+            self.stop(CANCELLED)
+
+
+class JobRunner:
+    """Claims and runs queued jobs, ``workers`` at a time, on the running event loop."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker = SessionLocal,
+        workers: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.workers = settings.JOB_WORKERS if workers is None else workers
+        self.poll_seconds = settings.JOB_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.stale_seconds = settings.JOB_STALE_SECONDS if stale_seconds is None else stale_seconds
+        self.max_attempts = settings.JOB_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._periodic: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._running: Dict[int, JobContext] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def schedule(self, kind: str, every_seconds: float, params: Optional[Dict[str, Any]] = None) -> None:
+        """Queue a ``kind`` job whenever the last one was created ``every_seconds`` ago or more."""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        self._periodic[kind] = (every_seconds, params or {})
+
+    async def start(self) -> None:
+        if self.workers <= 0 or self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintain()))
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop running jobs at their next report (they go back to the queue) and wait for the workers."""
+        self._stopping = True
+        for context in list(self._running.values()):
+            context.stop(SHUTDOWN)
+        self.wake()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        self._tasks = []
+
+    def wake(self) -> None:
+        """Look for queued jobs now instead of at the next poll; safe from any thread."""
+        if self._loop is not None and self._wake is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def cancel_running(self, job_id: int) -> None:
+        """Stop a job this process runs without waiting for its next progress write."""
+        context = self._running.get(job_id)
+        if context is not None:
+            context.stop(CANCELLED)
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except Exception:
+                logger.exception("Job runner could not claim a job")
+                claimed = None
+            if claimed is None:
+                await self._idle()
+                continue
+            await self._run(*claimed)
+
+    async def _maintain(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.to_thread(self._requeue_stale)
+                if await asyncio.to_thread(self._enqueue_periodic):
+                    self.wake()
+            except Exception:
+                logger.exception("Job runner maintenance failed")
+            await self._idle()
+
+    async def _run(self, job_id: int, kind: str, params: Dict[str, Any], attempt: int) -> None:
+        context = JobContext(job_id, attempt, self.session_factory)
+        self._running[job_id] = context
+        if self._stopping:
+            context.stop(SHUTDOWN)
+        logger.info("Job %s (%s) started, attempt %s", job_id, kind, attempt)
+        result, error = None, None
+        try:
+            handler_done = asyncio.ensure_future(asyncio.to_thread(self._call, kind, context, params))
+            while not (await asyncio.wait({handler_done}, timeout=HEARTBEAT_SECONDS))[0]:
+                try:
+                    await asyncio.to_thread(context.sync)
+                except Exception:
+                    logger.exception("Heartbeat of job %s failed", job_id)
+            result = handler_done.result()
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job_id, kind)
+            error = f"{type(e).__name__}: {e}"
+        finally:
+            self._running.pop(job_id, None)
+        await asyncio.to_thread(self._finish, context, result, error)
+
+    @staticmethod
+    def _call(kind: str, context: JobContext, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        handler = JOB_HANDLERS.get(kind)
+        if handler is None:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        return handler(context, **params)
+
+    def _claim(self) -> Optional[Tuple[int, str, Dict[str, Any], int]]:
+        with self.session_factory() as db:
+            candidates = db.execute(
+                select(Job.id, Job.kind, Job.params, Job.attempts)
+                .where(Job.status == QUEUED)
+                .order_by(Job.id)
+                .limit(self.workers + 1)
+            ).all()
+            for job_id, kind, params, attempts in candidates:
+                now = utcnow()
+                claimed = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == QUEUED)
+                    .values(status=RUNNING, worker=self.worker_id, started_at=now, heartbeat_at=now, attempts=attempts + 1)
+                ).rowcount
+                db.commit()
+                if claimed:
+                    return job_id, kind, params or {}, attempts + 1
+        return None
+
+    def _finish(self, context: JobContext, result: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        stopped = isinstance(result, dict) and result.get("stopped")
+        values: Dict[str, Any] = {"worker": None, "progress": context.progress or None, "heartbeat_at": utcnow()}
+        if error is not None:
+            values.update(status=FAILED, error=error, finished_at=utcnow())
+        elif stopped and context.stop_reason == SHUTDOWN:
+            values.update(status=QUEUED)
+        elif stopped:
+            values.update(status=CANCELLED, result=result, finished_at=utcnow())
+        else:
+            values.update(status=SUCCEEDED, result=result, finished_at=utcnow())
+        with self.session_factory() as db:
+            # Only if no other runner took the job over in the meantime
+            db.execute(update(Job).where(Job.id == context.job_id, Job.worker == self.worker_id).values(**values))
+            db.commit()
+        logger.info("Job %s %s", context.job_id, values["status"])
+
+    def _requeue_stale(self) -> int:
+        cutoff = utcnow() - timedelta(seconds=self.stale_seconds)
+        stale = (Job.status == RUNNING, Job.heartbeat_at < cutoff)
+        with self.session_factory() as db:
+            db.execute(
+                update(Job).where(*stale, Job.cancel_requested.is_(True))
+                .values(status=CANCELLED, worker=None, finished_at=utcnow())
+            )
+            failed = db.execute(
+                update(Job).where(*stale, Job.attempts >= self.max_attempts)
+                .values(
+                    status=FAILED, worker=None, finished_at=utcnow(),
+                    error=f"Runner stopped responding on all {self.max_attempts} attempts",
+                )
+            ).rowcount
+            requeued = db.execute(update(Job).where(*stale).values(status=QUEUED, worker=None)).rowcount
+            db.commit()
+        if failed:
+            logger.error("Failed %s jobs whose runner stopped responding %s times", failed, self.max_attempts)
+        if requeued:
+            logger.warning("Requeued %s jobs whose runner stopped responding", requeued)
+        return requeued
+
+    def _enqueue_periodic(self) -> int:
+        submitted = 0
+        with self.session_factory() as db:
+            for kind, (every_seconds, params) in self._periodic.items():
+                active = db.execute(
+                    select(Job.id).where(Job.kind == kind, Job.status.in_((QUEUED, RUNNING))).limit(1)
+                ).first()
+                if active is not None:
+                    continue
+                last = db.execute(select(func.max(Job.created_at)).where(Job.kind == kind)).scalar()
+                if last is None or _as_utc(last) <= utcnow() - timedelta(seconds=every_seconds):
+                    submit_job(db, kind, params, created_by="scheduler")
+                    submitted += 1
+        return submitted
+
+
+job_runner = JobRunner()
@@ -0,0 +1,70 @@
+"""
+Job handlers: CSV loads, score recalculation and planner statistics.
+
+``load`` and ``rescore`` run the CSV loader's core (``app/ingest/loader.py``,
+imported on first use), the same functions as the ``load_csv_data.py`` CLI,
+writing through the runner's session factory.
+"""
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+
+from ..config import settings
+from ..models import CityRisk, MacroIndicator, Property, PropertyPriceHistory
+from .runner import JobContext, job_handler
+
+
+def import_path(path: str) -> Path:
+    """``path`` resolved against ``JOB_IMPORT_DIR``; ValueError if it leads outside it."""
+    root = Path(settings.JOB_IMPORT_DIR).resolve()
+    resolved = (root / path).resolve()
+    if resolved != root and root not in resolved.parents:
+        raise ValueError(f"{path} is outside JOB_IMPORT_DIR")
+    return resolved
+
+
+@job_handler("load")
+def run_load(
+    context: JobContext,
+    path: str,
+    batch_size: Optional[int] = None,
+    geocoder_mode: Optional[str] = None,
+    start_row: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    staged: bool = False,
+) -> Dict[str, Any]:
+    """Load one CSV file under ``JOB_IMPORT_DIR``; a rerun resumes from the file's checkpoint."""
+    from ..ingest.loader import load_csv_into_db
+
+    options = {"batch_size": batch_size, "geocoder_mode": geocoder_mode, "start_row": start_row, "max_rows": max_rows}
+    return load_csv_into_db(
+        str(import_path(path)),
+        resume=True,
+        staged=staged,
+        on_progress=context.report,
+        session_factory=context.session_factory,
+        **{name: value for name, value in options.items() if value is not None},
+    )
+
+
+@job_handler("rescore")
+def run_rescore(context: JobContext, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Recalculate scores from stored fields (``load_csv_data.py --recalculate``)."""
+    from ..ingest.loader import recalculate_scores_in_db
+
+    return recalculate_scores_in_db(
+        limit=limit, on_progress=context.report, session_factory=context.session_factory
+    )
+
+
+@job_handler("analyze")
+def run_analyze(context: JobContext) -> Dict[str, Any]:
+    """Refresh the planner statistics of the listing tables, e.g. periodically or after big loads."""
+    tables = [model.__tablename__ for model in (Property, PropertyPriceHistory, CityRisk, MacroIndicator)]
+    with context.session_factory() as db:
+        for number, table in enumerate(tables, start=1):
+            db.execute(text(f"ANALYZE {table}"))
+            db.commit()
+            context.report({"tables": number})
+    return {"tables": len(tables)}
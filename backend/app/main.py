@@ -2,17 +2,19 @@
 Main FastAPI application entry point.
 Configures CORS, routes, and middleware.
 """
-from fastapi import FastAPI
+import secrets
+import time
+from typing import Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
+from sqlalchemy.orm import Session
 
 from .config import settings
-from .api.v1 import auth_router, properties_router, users_router, favorites_router
-from .database import Base, engine
-
-# Create database tables
-# Note: In production, use Alembic migrations instead
-Base.metadata.create_all(bind=engine)
+from .api.v1 import auth_router, properties_router, users_router, favorites_router, admin_router
+from .core.request_metrics import route_stats, server_timing
+from .database import LAST_WRITE_HEADER, QueryStats, engine, get_db, read_engines, request_sql_stats
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -22,6 +24,40 @@ app = FastAPI(
     debug=settings.DEBUG
 )
 
+
+def create_tables():
+    """Create missing tables and upgrade older ones (``app.schema``). In production, use Alembic migrations."""
+    from .schema import upgrade_schema
+
+    upgrade_schema(engine)
+
+
+# Off by default: every (Lambda) cold start would pay the schema introspection round trips.
+if settings.CREATE_TABLES_ON_STARTUP:
+    app.add_event_handler("startup", create_tables)
+
+# Background jobs run in API processes that have job workers (not on Lambda).
+if settings.JOB_WORKERS > 0:
+    from .jobs import job_runner
+
+    for kind, every_seconds in settings.PERIODIC_JOBS.items():
+        job_runner.schedule(kind, every_seconds)
+    app.add_event_handler("startup", job_runner.start)
+    app.add_event_handler("shutdown", job_runner.stop)
+
+# Columnar search keeps its snapshot fresh from a background task (long-running servers, not Lambda).
+if settings.SEARCH_BACKEND == "columnar":
+    from .core.search_index import search_index
+
+    app.add_event_handler("startup", search_index.start)
+    app.add_event_handler("shutdown", search_index.stop)
+
+# Innermost middleware, so a profile covers routing and the endpoint and sees the request's SQL stats.
+if settings.PROFILING_ENABLED:
+    from .core.profiling import ProfilingMiddleware
+
+    app.add_middleware(ProfilingMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,13 +65,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[LAST_WRITE_HEADER],  # Read by the frontend for read-your-writes
 )
 
+
+@app.middleware("http")
+async def sql_instrumentation(request: Request, call_next):
+    """Count each request's queries and DB time; report them as Server-Timing and per route."""
+    if not settings.SQL_INSTRUMENTATION:
+        return await call_next(request)
+    stats = QueryStats()
+    token = request_sql_stats.set(stats)
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_sql_stats.reset(token)
+    elapsed = time.perf_counter() - started
+    response.headers["Server-Timing"] = server_timing(stats, elapsed)
+    route = request.scope.get("route")
+    if route is not None:
+        route_stats.record(f"{request.method} {route.path}", stats, elapsed)
+    return response
+
+
+if settings.METRICS_ENABLED:
+    from .core.telemetry import PrometheusMiddleware, mark_worker_stopped, observe_pool
+
+    # Added last, so it is the outermost middleware and times everything below it.
+    app.add_middleware(PrometheusMiddleware)
+    observe_pool(engine, "primary")
+    for number, read_engine in enumerate(read_engines, start=1):
+        observe_pool(read_engine, f"replica{number}")
+    app.add_event_handler("shutdown", mark_worker_stopped)
+
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(properties_router, prefix="/api")
 app.include_router(users_router, prefix="/api")
 app.include_router(favorites_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
 
 
 @app.get("/")
@@ -54,5 +123,18 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(db: Session = Depends(get_db), authorization: Optional[str] = Header(None)):
+    """Prometheus metrics of all workers; needs ``Bearer <METRICS_TOKEN>``, and is hidden until a token is set."""
+    if not settings.METRICS_ENABLED or not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not secrets.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    from .core.telemetry import render_metrics
+
+    body, content_type = render_metrics(db)
+    return Response(content=body, media_type=content_type)
+
+
 # AWS Lambda handler using Mangum
 handler = Mangum(app)
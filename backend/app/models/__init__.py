@@ -1,5 +1,11 @@
 from .user import User, UserProfile
+from .macro_indicator import MacroIndicator
+from .city_risk import CityRisk
 from .property import Property
 from .favorite import Favorite
+from .price_history import PropertyPriceHistory
+from .load_checkpoint import LoadCheckpoint, LoadRowOffset, LoadManifest
+from .staging import CityRiskStaging, MacroIndicatorStaging, PropertyStaging, PriceHistoryStaging
+from .job import Job
 
-__all__ = ["User", "UserProfile", "Property", "Favorite"]
+__all__ = ["User", "UserProfile", "MacroIndicator", "CityRisk", "Property", "Favorite", "PropertyPriceHistory", "LoadCheckpoint", "LoadRowOffset", "LoadManifest", "PropertyStaging", "PriceHistoryStaging", "CityRiskStaging", "MacroIndicatorStaging", "Job"]
@@ -0,0 +1,27 @@
+"""
+City crime risk model.
+Crime metrics in the listing feed are city-level, repeated on every listing
+of a city; they are stored once per city with the risk score they give.
+"""
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class CityRisk(Base):
+    __tablename__ = "city_risk"
+
+    id = Column(Integer, primary_key=True, index=True)
+    city = Column(String(100), nullable=False)
+    state = Column(String(2), nullable=False)
+
+    crime_rate = Column(Float, nullable=True)
+    violent_crime = Column(Float, nullable=True)
+    property_crime = Column(Float, nullable=True)
+    risk = Column(Float, nullable=True)  # 0-100 crime risk derived from the metrics above
+    crime_points = Column(Float, nullable=False, default=0.0)  # Score component this risk gives
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (UniqueConstraint("city", "state", name="_city_risk_city_state_uc"),)
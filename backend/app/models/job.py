@@ -0,0 +1,32 @@
+"""
+Background job model.
+One row per submitted load/rescore/maintenance job; the job runner claims
+queued rows, and progress, cancellation and results go through the row so
+every API process sees them.
+"""
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50), nullable=False, index=True)  # load, rescore, analyze
+    params = Column(JSON, nullable=False, default=dict)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, succeeded, failed, cancelled
+
+    progress = Column(JSON, nullable=True)  # Latest counters the job reported
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    attempts = Column(Integer, nullable=False, default=0)  # Runs started; a resumed job continues where it stopped
+
+    worker = Column(String(100), nullable=True)  # host:pid running it
+    created_by = Column(String, nullable=True)  # Admin email, or "scheduler" for periodic jobs
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Running jobs with a stale heartbeat are requeued
+    finished_at = Column(DateTime(timezone=True), nullable=True)
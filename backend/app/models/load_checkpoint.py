@@ -0,0 +1,64 @@
+"""
+Bookkeeping models for CSV loads.
+Tracks how far each source file has been committed, where its rows start,
+and which file contents have already been loaded.
+"""
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class LoadCheckpoint(Base):
+    __tablename__ = "load_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, unique=True, index=True, nullable=False)  # Resolved CSV path
+    source_fingerprint = Column(String, nullable=False)  # Size + mtime; a changed file invalidates the checkpoint
+
+    # Position just past the last row whose outcome is committed
+    byte_offset = Column(BigInteger, nullable=False, default=0)
+    row_num = Column(Integer, nullable=False, default=1)  # 1 = header
+    end_row = Column(Integer, nullable=True)  # Last row requested (max_rows), None = whole file
+
+    loaded_count = Column(Integer, nullable=False, default=0)
+    updated_count = Column(Integer, nullable=False, default=0)  # Known homes whose price changed
+    duplicate_count = Column(Integer, nullable=False, default=0)
+    skipped_count = Column(Integer, nullable=False, default=0)
+
+    # Where dedupe state lives; nothing in memory needs restoring when this is the DB index
+    dedupe_state = Column(String(100), nullable=True)
+    status = Column(String(20), nullable=False, default="running")  # running, staged, complete
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class LoadRowOffset(Base):
+    __tablename__ = "load_row_offsets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, nullable=False, index=True)
+    source_fingerprint = Column(String, nullable=False)
+    row_num = Column(Integer, nullable=False)
+    byte_offset = Column(BigInteger, nullable=False)  # Where ``row_num`` starts
+
+    __table_args__ = (UniqueConstraint('source', 'row_num', name='_source_row_uc'),)
+
+
+class LoadManifest(Base):
+    __tablename__ = "load_manifest"
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_sha256 = Column(String(64), unique=True, index=True, nullable=False)  # Same bytes = same file, whatever its name
+    source = Column(String, nullable=False)  # Path it was last loaded from
+    size_bytes = Column(BigInteger, nullable=False)
+    status = Column(String(20), nullable=False, default="loading")  # loading, staged, complete, failed
+
+    loaded_count = Column(Integer, nullable=True)
+    updated_count = Column(Integer, nullable=True)
+    duplicate_count = Column(Integer, nullable=True)
+    skipped_count = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
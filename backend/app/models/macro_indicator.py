@@ -0,0 +1,28 @@
+"""
+Macro indicator model.
+The listing feed repeats the same CPI, rate and unemployment figures on every
+row; they are stored once per region and date and homes reference them.
+"""
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class MacroIndicator(Base):
+    __tablename__ = "macro_indicators"
+
+    id = Column(Integer, primary_key=True, index=True)
+    region = Column(String(32), nullable=False)  # State code of the homes these figures were loaded with
+    as_of = Column(Date, nullable=False)  # Load date; the feed carries no observation date
+
+    lagged_cpi = Column(Float, nullable=True)
+    fed_rate = Column(Float, nullable=True)
+    lagged_unemployment = Column(Float, nullable=True)
+    volatility_value = Column(Float, nullable=True)
+    nr_weeks = Column(Float, nullable=True)
+    macro_points = Column(Float, nullable=False, default=0.0)  # Score component these figures give
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (UniqueConstraint("region", "as_of", name="_macro_region_as_of_uc"),)
@@ -0,0 +1,23 @@
+"""
+Price history model for tracking listing price changes.
+One row per observed price of a home, so trajectories are a single indexed range scan.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class PropertyPriceHistory(Base):
+    __tablename__ = "property_price_history"
+    
+    id = Column(Integer, primary_key=True)
+    property_id = Column(Integer, ForeignKey("properties.id", ondelete="CASCADE"), nullable=False)
+    observed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    price = Column(Numeric(12, 2), nullable=False)
+    status = Column(String(30), nullable=True)  # Listing status when observed (ACTIVE, PENDING, SOLD, ...)
+    
+    __table_args__ = (Index("ix_price_history_property_observed", "property_id", "observed_at"),)
+    
+    # Relationships
+    property = relationship("Property", back_populates="price_history")
@@ -2,7 +2,7 @@
 Property model for storing real estate listings.
 Includes profitability score calculation.
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Numeric
+from sqlalchemy import Column, Integer, String, Float, DateTime, Numeric, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -31,8 +31,23 @@ class Property(Base):
     # Investment metrics
     profitability_score = Column(Float, nullable=False, index=True)  # 0-100 scale
     estimated_rent = Column(Numeric(10, 2), nullable=True)  # Monthly rent estimate
+    # Score without its shared components; profitability_score = clamp(score_base + crime points + macro points)
+    score_base = Column(Float, nullable=True)
+    city_risk_id = Column(Integer, ForeignKey("city_risk.id"), nullable=True, index=True)
+    macro_indicator_id = Column(Integer, ForeignKey("macro_indicators.id"), nullable=True, index=True)
+    
+    # Loader dedupe: digest of the full listing key (unique) and of the home's location
+    dedupe_hash = Column(String(40), nullable=True, unique=True, index=True)
+    location_hash = Column(String(40), nullable=True, index=True)
+    geo_cell = Column(String(32), nullable=True, index=True)  # Spatial grid cell for near-duplicate lookups
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     favorites = relationship("Favorite", back_populates="property", cascade="all, delete-orphan")
+    price_history = relationship(
+        "PropertyPriceHistory",
+        back_populates="property",
+        cascade="all, delete-orphan",
+        order_by="PropertyPriceHistory.observed_at",
+    )
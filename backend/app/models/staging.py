@@ -0,0 +1,59 @@
+"""
+Staging tables for ``--staged`` CSV loads.
+A staged load writes here instead of the live tables, and a single
+transaction publishes the result, so searches never see a half-loaded import.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Table
+from sqlalchemy.sql import func
+from ..database import Base
+from .city_risk import CityRisk
+from .macro_indicator import MacroIndicator
+from .property import Property
+
+# Only the columns the loader looks homes up by are indexed while staging.
+STAGING_INDEXED_COLUMNS = {"location_hash", "geo_cell"}
+
+
+def _staged_property_columns():
+    """Copies of every ``properties`` column except ``id``, so the two tables never drift apart."""
+    columns = []
+    for column in Property.__table__.columns:
+        if column.name == "id":
+            continue
+        copy = column._copy()
+        copy.index = column.name in STAGING_INDEXED_COLUMNS
+        columns.append(copy)
+    return columns
+
+
+def _staged_component_columns(table: Table):
+    """Copies of a component table's columns; ``id`` is the live row the staged figures replace."""
+    return [column._copy() for column in table.columns]
+
+
+class PropertyStaging(Base):
+    __table__ = Table(
+        "properties_staging",
+        Base.metadata,
+        Column("id", Integer, primary_key=True),
+        Column("property_id", Integer, nullable=True, index=True),  # Live home this row updates; None = new home
+        *_staged_property_columns(),
+    )
+
+
+class PriceHistoryStaging(Base):
+    __tablename__ = "property_price_history_staging"
+
+    id = Column(Integer, primary_key=True)
+    property_id = Column(Integer, nullable=False, index=True)  # properties_staging.id
+    observed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    price = Column(Numeric(12, 2), nullable=False)
+    status = Column(String(30), nullable=True)
+
+
+class CityRiskStaging(Base):
+    __table__ = Table("city_risk_staging", Base.metadata, *_staged_component_columns(CityRisk.__table__))
+
+
+class MacroIndicatorStaging(Base):
+    __table__ = Table("macro_indicators_staging", Base.metadata, *_staged_component_columns(MacroIndicator.__table__))
@@ -0,0 +1,77 @@
+"""
+Schema setup and upgrades, shared by the API and the CSV loader.
+
+``create_all`` creates missing tables but never alters existing ones, so a
+database created by an older version lacks the columns added since (the
+listing hashes, ``geo_cell``, ``score_base`` and the component links).
+``upgrade_schema`` is the one step that brings any database up to date:
+
+1. create missing tables;
+2. add missing nullable columns to existing tables, with the model's type
+   and foreign key;
+3. fill in derived columns for rows that predate them (dedupe and location
+   hashes, grid cells, which are also recomputed when ``GEO_CELL_METERS``
+   changed). Older homes keep a NULL ``score_base`` and are left alone by
+   rescoring;
+4. create the indexes of the added columns (after the backfills, so those
+   do not maintain them row by row).
+
+The loader runs it before writing (load, recalculate, set-macro,
+set-city-risk) and the API at startup with ``CREATE_TABLES_ON_STARTUP``.
+On an up-to-date database it is one inspection per table and a few
+single-row probes. In production, use Alembic migrations instead.
+"""
+from typing import Dict, List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import Column, CreateColumn, Table
+
+from .config import settings
+from .database import Base
+from .ingest.dedupe import backfill_hashes
+from .ingest.spatial import GeoGrid, assign_geo_cells
+
+
+def column_ddl(column: Column, engine: Engine) -> str:
+    """``ADD COLUMN`` clause for ``column``, including its foreign key."""
+    ddl = str(CreateColumn(column).compile(dialect=engine.dialect))
+    for foreign_key in column.foreign_keys:
+        ddl += f" REFERENCES {foreign_key.column.table.name} ({foreign_key.column.name})"
+    return ddl
+
+
+def add_missing_columns(engine: Engine) -> Dict[Table, List[str]]:
+    """Add model columns missing from existing tables; returns the added column names per table."""
+    inspector = inspect(engine)
+    added: Dict[Table, List[str]] = {}
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            present = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in present]
+            for column in missing:
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(
+                        f"{table.name}.{column.name} is NOT NULL without a default; add it with a migration"
+                    )
+                connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl(column, engine)}")
+            if missing:
+                added[table] = [column.name for column in missing]
+    return added
+
+
+def upgrade_schema(engine: Engine) -> Dict[str, int]:
+    """Bring the database up to date; returns how many homes got hashes and grid cells."""
+    Base.metadata.create_all(bind=engine)
+    added = add_missing_columns(engine)
+    counts = {
+        "hashed": backfill_hashes(engine),
+        "celled": assign_geo_cells(engine, GeoGrid(settings.GEO_CELL_METERS)),
+    }
+    if added:
+        with engine.begin() as connection:
+            for table, names in added.items():
+                for index in table.indexes:
+                    if any(column.name in names for column in index.columns):
+                        index.create(connection, checkfirst=True)
+    return counts
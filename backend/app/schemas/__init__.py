@@ -1,6 +1,7 @@
 from .user import UserCreate, UserLogin, UserResponse, UserProfileCreate, UserProfileUpdate, UserProfileResponse
 from .auth import Token, TokenData, GoogleAuthRequest
-from .property import PropertyCreate, PropertyResponse, PropertySearchParams, FavoriteCreate, FavoriteResponse
+from .property import PropertyCreate, PropertyResponse, PriceHistoryEntry, PropertySearchParams, FavoriteCreate, FavoriteResponse
+from .admin import RouteSQLStats, JobCreate, JobResponse, ProfileSummary, ProfileDetail
 from .investment import (
     InvestmentAssumptionsSchema,
     CashFlowBreakdownSchema,
@@ -12,8 +13,9 @@ __all__ = [
     "UserCreate", "UserLogin", "UserResponse", 
     "UserProfileCreate", "UserProfileUpdate", "UserProfileResponse",
     "Token", "TokenData", "GoogleAuthRequest",
-    "PropertyCreate", "PropertyResponse", "PropertySearchParams",
+    "PropertyCreate", "PropertyResponse", "PriceHistoryEntry", "PropertySearchParams",
     "FavoriteCreate", "FavoriteResponse",
     "InvestmentAssumptionsSchema", "CashFlowBreakdownSchema",
     "InvestmentMetricsSchema", "InvestmentAnalysisResponse",
+    "RouteSQLStats", "JobCreate", "JobResponse", "ProfileSummary", "ProfileDetail",
 ]
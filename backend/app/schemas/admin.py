@@ -0,0 +1,87 @@
+"""
+Pydantic schemas for admin diagnostics and background jobs.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class RouteSQLStats(BaseModel):
+    route: str
+    requests: int
+    avg_ms: float
+    db_ms_total: float
+    avg_db_ms: float
+    avg_queries: float
+    max_queries: int
+    pool_wait_ms_total: float
+    slow_queries: int
+
+
+class JobCreate(BaseModel):
+    kind: str  # load, rescore, analyze
+    params: Dict[str, Any] = {}
+
+
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    params: Dict[str, Any]
+    status: str
+    progress: Optional[Dict[str, Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    attempts: int
+    worker: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProfileSQL(BaseModel):
+    queries: int
+    db_ms: float
+
+
+class AllocationSite(BaseModel):
+    site: str
+    size_kb: float
+    count: int
+
+
+class ProfileMemory(BaseModel):
+    allocated_kb: float
+    peak_kb: float
+    top: List[AllocationSite]
+
+
+class ProfileSummary(BaseModel):
+    id: int
+    method: str
+    path: str
+    route: Optional[str] = None
+    status_code: int
+    mode: str  # sampling or deterministic
+    started_at: datetime
+    duration_ms: float
+    breakdown: Dict[str, float]  # ms per category: sql, validation, analysis, serialization, app, await
+    sql: Optional[ProfileSQL] = None
+    memory: Optional[ProfileMemory] = None
+
+
+class ProfileFunction(BaseModel):
+    function: str
+    calls: int
+    self_ms: float
+    cumulative_ms: float
+
+
+class ProfileDetail(ProfileSummary):
+    functions: List[ProfileFunction]
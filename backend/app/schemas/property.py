@@ -44,6 +44,16 @@ class PropertyResponse(PropertyBase):
         from_attributes = True
 
 
+class PriceHistoryEntry(BaseModel):
+    """One observed price of a home."""
+    observed_at: datetime
+    price: Decimal
+    status: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class PropertySearchParams(BaseModel):
     """Query parameters for property search."""
     zip_code: Optional[str] = None
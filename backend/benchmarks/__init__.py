@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks of the API and loader hot paths (``python -m benchmarks``).
+
+Inputs come from the deterministic generator in ``synthetic``; results are
+compared with ``baselines.json`` so a performance change comes with a number.
+"""
@@ -0,0 +1,59 @@
+"""
+Run the benchmark suite and compare it with the saved baselines.
+
+    python -m benchmarks                      # all benchmarks, compared with baselines.json
+    python -m benchmarks -k scoring           # names containing "scoring"
+    python -m benchmarks --save               # record the results as the new baselines
+    python -m benchmarks --threshold 0.1      # fail on anything more than 10% slower
+
+Exits with status 1 when a benchmark is slower than its baseline by more
+than the threshold.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from .runner import BASELINES_PATH, DEFAULT_THRESHOLD, compare, format_table, load_baselines, run, save_baselines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Micro-benchmarks of RentIQ hot paths")
+    parser.add_argument("-k", dest="pattern", help="Only benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=10, help="Timed rounds per benchmark (default 10)")
+    parser.add_argument("--min-round-seconds", type=float, default=0.05, help="Minimum length of a round (default 0.05)")
+    parser.add_argument("--quick", action="store_true", help="One short round each (smoke test, not for baselines)")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH, help="Baseline file (default benchmarks/baselines.json)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown as a fraction (default 0.25)")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baselines")
+    parser.add_argument("--json", type=Path, help="Also write the results and comparison to this file")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.rounds, args.min_round_seconds = 1, 0.01
+    results = run(args.pattern, rounds=args.rounds, min_round_seconds=args.min_round_seconds)
+    if not results:
+        print(f"No benchmark matches {args.pattern!r}")
+        return 2
+
+    comparisons = compare(results, load_baselines(args.baselines), args.threshold)
+    print(format_table(results, comparisons))
+    if args.json:
+        args.json.write_text(json.dumps({
+            "results": [result._asdict() for result in results],
+            "comparisons": [comparison._asdict() for comparison in comparisons],
+        }, indent=2))
+    if args.save:
+        save_baselines(results, args.baselines)
+        print(f"Saved baselines to {args.baselines}")
+        return 0
+
+    regressed = [comparison.name for comparison in comparisons if comparison.regressed]
+    if regressed:
+        print(f"\n{len(regressed)} benchmark(s) more than {args.threshold:.0%} slower than baseline: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Async HTTP load driver: replays a weighted mix of property searches, detail,
+analysis and favorites calls against a running API and reports throughput
+and latency percentiles per route.
+
+Load is applied in stages of increasing concurrency (closed loop: each
+virtual user sends its next request when the previous one is answered), so
+one run shows where latency starts to climb and throughput stops growing.
+Each virtual user signs in with an account of its own, so favorites calls
+never race each other. Searches draw their filters from the synthetic
+markets, and detail, analysis and favorites calls use ids seen in search
+results.
+"""
+import asyncio
+import math
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import httpx
+
+from .synthetic import MARKETS
+
+DEFAULT_MIX = {"search": 60, "detail": 20, "analysis": 10, "favorites": 10}
+PASSWORD = "loadtest-password"
+
+
+class Call(NamedTuple):
+    route: str  # Method and route template, e.g. "GET /api/properties/{id}"
+    method: str
+    url: str
+    params: Optional[Dict[str, object]] = None
+    json: Optional[Dict[str, object]] = None
+
+
+class Sample(NamedTuple):
+    route: str
+    seconds: float
+    ok: bool
+
+
+class RouteReport(NamedTuple):
+    route: str
+    requests: int
+    errors: int
+    throughput: float  # Requests per second
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+
+
+class StageReport(NamedTuple):
+    concurrency: int
+    seconds: float
+    routes: List[RouteReport]  # Per route, then "all"
+
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Sequence[Sample], seconds: float) -> List[RouteReport]:
+    """Per-route figures, heaviest traffic first, followed by one row for all routes."""
+    by_route: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        by_route.setdefault(sample.route, []).append(sample)
+    groups = sorted(by_route.items(), key=lambda item: -len(item[1])) + [("all", list(samples))]
+    reports = []
+    for route, group in groups:
+        latencies = sorted(sample.seconds * 1000 for sample in group)
+        reports.append(RouteReport(
+            route,
+            len(group),
+            sum(not sample.ok for sample in group),
+            len(group) / seconds if seconds else 0.0,
+            percentile(latencies, 50),
+            percentile(latencies, 95),
+            percentile(latencies, 99),
+            latencies[-1] if latencies else 0.0,
+        ))
+    return reports
+
+
+def format_report(stages: List[StageReport]) -> str:
+    lines = []
+    for stage in stages:
+        lines.append(f"\nconcurrency {stage.concurrency} ({stage.seconds:.1f}s)")
+        width = max(len(row.route) for row in stage.routes)
+        lines.append(
+            f"  {'route':<{width}}  {'requests':>8}  {'errors':>6}  {'req/s':>8}  "
+            f"{'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'max ms':>8}"
+        )
+        for row in stage.routes:
+            lines.append(
+                f"  {row.route:<{width}}  {row.requests:>8}  {row.errors:>6}  {row.throughput:>8.1f}  "
+                f"{row.p50_ms:>8.1f}  {row.p95_ms:>8.1f}  {row.p99_ms:>8.1f}  {row.max_ms:>8.1f}"
+            )
+    return "\n".join(lines)
+
+
+def search_params(rng: random.Random) -> Dict[str, object]:
+    """Filters like the search page sends: a ZIP or a price band, sometimes more."""
+    _, _, zip_prefix, _, _, price_per_sqft = rng.choice(MARKETS)
+    params: Dict[str, object] = {}
+    if rng.random() < 0.5:
+        params["zip_code"] = f"{zip_prefix}{rng.randrange(100):02d}"
+        if rng.random() < 0.1:
+            params["radius_miles"] = rng.choice([5, 10, 25])
+    if rng.random() < 0.3:
+        low = price_per_sqft * rng.choice([800, 1200, 1600])
+        params["min_price"], params["max_price"] = low, low * 2
+    if rng.random() < 0.2:
+        params["bedrooms"] = rng.choice([2, 3, 4])
+    if rng.random() < 0.15:
+        params["min_score"] = rng.choice([50, 60, 70])
+    if rng.random() < 0.1:
+        params["property_type"] = rng.choice(["single_family", "condo", "townhouse", "multi_family"])
+    params["sort_by"] = rng.choices(["profitability_score", "price", "size_sqft"], [70, 20, 10])[0]
+    params["sort_order"] = rng.choice(["desc", "asc"]) if params["sort_by"] != "profitability_score" else "desc"
+    params["limit"] = rng.choices([20, 50, 100], [60, 25, 15])[0]
+    params["skip"] = params["limit"] * rng.choices([0, 1, 2, 4], [70, 15, 10, 5])[0]
+    return params
+
+
+class VirtualUser:
+    """One simulated client: picks calls from the mix and remembers its favorites."""
+
+    def __init__(self, rng: random.Random, mix: Dict[str, float], ids: List[int], token: str):
+        self.rng = rng
+        self.kinds = list(mix)
+        self.weights = list(mix.values())
+        self.ids = ids
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.favorites: List[int] = []
+
+    def next_call(self) -> Call:
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        if kind == "search":
+            return Call("GET /api/properties", "GET", "/api/properties", params=search_params(self.rng))
+        property_id = self.rng.choice(self.ids)
+        if kind == "detail":
+            return Call("GET /api/properties/{id}", "GET", f"/api/properties/{property_id}")
+        if kind == "analysis":
+            return Call("GET /api/properties/{id}/analysis", "GET", f"/api/properties/{property_id}/analysis")
+        choice = self.rng.random()
+        if self.favorites and choice < 0.3:
+            removed = self.favorites.pop(self.rng.randrange(len(self.favorites)))
+            return Call("DELETE /api/favorites/{id}", "DELETE", f"/api/favorites/{removed}")
+        if choice < 0.6 and property_id not in self.favorites:
+            self.favorites.append(property_id)
+            return Call("POST /api/favorites", "POST", "/api/favorites", json={"property_id": property_id})
+        return Call("GET /api/favorites", "GET", "/api/favorites")
+
+    async def send(self, client: httpx.AsyncClient, call: Call) -> Sample:
+        started = time.perf_counter()
+        try:
+            response = await client.request(
+                call.method, call.url, params=call.params, json=call.json, headers=self.headers
+            )
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        return Sample(call.route, time.perf_counter() - started, ok)
+
+
+async def sign_in(client: httpx.AsyncClient, email: str) -> str:
+    """Token for a load-test account, registering it on first use."""
+    response = await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+    if response.status_code != 200:
+        response = await client.post("/api/auth/register", json={"email": email, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def discover_ids(client: httpx.AsyncClient, rng: random.Random, searches: int = 30) -> List[int]:
+    """Ids of listings found by a few searches, for detail, analysis and favorites calls."""
+    ids = set()
+    for _ in range(searches):
+        response = await client.get("/api/properties", params={**search_params(rng), "skip": 0})
+        response.raise_for_status()
+        ids.update(home["id"] for home in response.json())
+    if not ids:
+        raise RuntimeError("Searches found no listings; load data first")
+    return sorted(ids)
+
+
+async def drive(
+    base_url: str,
+    stages: Sequence[int],
+    duration: float,
+    mix: Optional[Dict[str, float]] = None,
+    seed: int = 1,
+    timeout: float = 30.0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> List[StageReport]:
+    """Run each concurrency stage for ``duration`` seconds and report on each.
+
+    ``transport`` replaces the network, e.g. ``httpx.ASGITransport(app)`` to
+    drive the app in process.
+    """
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    limits = httpx.Limits(max_connections=max(stages), max_keepalive_connections=max(stages))
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=timeout, limits=limits, transport=transport
+    ) as client:
+        ids = await discover_ids(client, rng)
+        tokens = [await sign_in(client, f"loadtest-{number}@example.com") for number in range(max(stages))]
+        users = [
+            VirtualUser(random.Random(f"{seed}:{number}"), mix, ids, token) for number, token in enumerate(tokens)
+        ]
+
+        reports = []
+        for concurrency in stages:
+            samples: List[Sample] = []
+            deadline = time.perf_counter() + duration
+
+            async def run_user(user: VirtualUser) -> None:
+                while time.perf_counter() < deadline:
+                    samples.append(await user.send(client, user.next_call()))
+
+            started = time.perf_counter()
+            await asyncio.gather(*(run_user(user) for user in users[:concurrency]))
+            elapsed = time.perf_counter() - started
+            reports.append(StageReport(concurrency, elapsed, summarize(samples, elapsed)))
+    return reports
@@ -0,0 +1,156 @@
+"""
+End-to-end load test on one box, fully offline.
+
+    python -m benchmarks.loadtest generate listings.csv --rows 1000000
+    python -m benchmarks.loadtest drive --url http://127.0.0.1:8000 --stages 1,8,32 --duration 30
+    python -m benchmarks.loadtest run --rows 1000000 --database-url sqlite:////tmp/rentiq-load.db
+
+``run`` does it all: writes the synthetic CSV (kept for the next run),
+loads it with ``load_csv_data.py --geocoder off`` (a file already in the
+load manifest is skipped), starts uvicorn on the same database, drives the
+load stages against it and stops the server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from .driver import DEFAULT_MIX, drive, format_report
+from .synthetic import DEFAULT_SEED, write_csv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_stages(value: str) -> List[int]:
+    stages = [int(stage) for stage in value.split(",")]
+    if not stages or min(stages) < 1:
+        raise argparse.ArgumentTypeError("stages are positive concurrency levels, e.g. 1,8,32")
+    return stages
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in DEFAULT_MIX or not weight:
+            raise argparse.ArgumentTypeError(f"mix entries are KIND=WEIGHT with KIND in {', '.join(DEFAULT_MIX)}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def generate(path: str, rows: int, seed: int) -> Path:
+    started = time.perf_counter()
+    written = write_csv(path, rows, seed)
+    print(f"Wrote {rows} rows to {written} in {time.perf_counter() - started:.1f}s")
+    return written
+
+
+def run_drive(args: argparse.Namespace) -> int:
+    reports = asyncio.run(drive(args.url, args.stages, args.duration, args.mix, args.seed))
+    print(format_report(reports))
+    if args.json:
+        Path(args.json).write_text(json.dumps([
+            {"concurrency": stage.concurrency, "seconds": stage.seconds, "routes": [row._asdict() for row in stage.routes]}
+            for stage in reports
+        ], indent=2))
+    failed = sum(row.errors for stage in reports for row in stage.routes if row.route == "all")
+    return 1 if failed else 0
+
+
+def wait_until_up(url: str, server: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not answer at {url} within {timeout:.0f}s")
+
+
+def run_all(args: argparse.Namespace) -> int:
+    env = {**os.environ, "DATABASE_URL": args.database_url, "GEOCODER_MODE": "off"}
+    csv_path = Path(args.csv or Path(tempfile.gettempdir()) / f"rentiq-loadtest-{args.rows}-{args.seed}.csv")
+    if not csv_path.exists():
+        generate(str(csv_path), args.rows, args.seed)
+
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "load_csv_data.py", str(csv_path), "--geocoder", "off",
+         "--batch-size", str(args.batch_size), "--workers", str(args.load_workers)],
+        cwd=BACKEND_DIR, env=env, check=True,
+    )
+    print(f"Loader finished in {time.perf_counter() - started:.1f}s")
+
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+         "--workers", str(args.server_workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    try:
+        wait_until_up(url, server)
+        args.url = url
+        return run_drive(args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="Offline end-to-end load test")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Write a synthetic listings CSV")
+    gen.add_argument("path", help="Output CSV (.gz to compress)")
+    gen.add_argument("--rows", type=int, default=1_000_000)
+    gen.add_argument("--seed", type=int, default=DEFAULT_SEED)
+
+    def add_drive_options(command):
+        command.add_argument("--stages", type=parse_stages, default=[1, 8, 32],
+                             help="Concurrency of each stage (default 1,8,32)")
+        command.add_argument("--duration", type=float, default=30.0, help="Seconds per stage (default 30)")
+        command.add_argument("--mix", type=parse_mix, default=None,
+                             help="Call weights, e.g. search=60,detail=20,analysis=10,favorites=10 (the default)")
+        command.add_argument("--seed", type=int, default=DEFAULT_SEED)
+        command.add_argument("--json", default=None, metavar="PATH", help="Also write the report as JSON")
+
+    drv = commands.add_parser("drive", help="Drive load against a running API")
+    drv.add_argument("--url", default="http://127.0.0.1:8000")
+    add_drive_options(drv)
+
+    run = commands.add_parser("run", help="Generate, load, serve and drive in one go")
+    run.add_argument("--rows", type=int, default=1_000_000)
+    run.add_argument("--csv", default=None, help="CSV to use or create (default in the temp directory)")
+    run.add_argument("--database-url", required=True, help="Database to load and serve, e.g. sqlite:////tmp/rentiq-load.db")
+    run.add_argument("--batch-size", type=int, default=5000)
+    run.add_argument("--load-workers", type=int, default=1, help="Loader parse processes")
+    run.add_argument("--server-workers", type=int, default=1, help="uvicorn workers")
+    run.add_argument("--port", type=int, default=8799)
+    add_drive_options(run)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "generate":
+        generate(args.path, args.rows, args.seed)
+        return 0
+    if args.command == "drive":
+        return run_drive(args)
+    return run_all(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
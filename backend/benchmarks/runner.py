@@ -0,0 +1,152 @@
+"""
+Timing, baselines and regression checks for the benchmark suite.
+
+A result is the best and median time per item over several rounds. Each
+round of a benchmark is paired with a round of a fixed reference workload
+run right before it, and ``relative`` is the median ratio of the two: how
+many reference runs one item costs. Comparisons with the baselines use
+``relative``, so a machine that is busy or throttled for a while slows
+both halves of a pair and does not read as a regression. This evens out
+machine speed, not machine kind: record baselines on the kind of machine
+that checks them.
+"""
+import json
+import platform
+import statistics
+import timeit
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from .suite import BENCHMARKS, Benchmark
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+
+# Slower than the baseline by more than this share counts as a regression.
+DEFAULT_THRESHOLD = 0.25
+
+
+class Result(NamedTuple):
+    name: str
+    items: int
+    best_us: float  # Per item
+    median_us: float
+    relative: float  # Per item, in reference workload runs
+    rounds: int
+    calls_per_round: int
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline_us: Optional[float]
+    current_us: float
+    change: Optional[float]  # relative / baseline relative - 1
+    regressed: bool
+
+
+def _reference_workload() -> Decimal:
+    """Pure-Python and Decimal arithmetic, like the code under benchmark."""
+    total = Decimal("0")
+    rate = Decimal("1.05")
+    for i in range(200):
+        total += Decimal(i) / rate ** (i % 12)
+    return total + sum(i * i for i in range(2000))
+
+
+def _calls_per_round(timer: timeit.Timer, min_round_seconds: float) -> int:
+    calls = 1
+    while timer.timeit(calls) < min_round_seconds and calls < 1_000_000:
+        calls *= 2
+    return calls
+
+
+def measure(bench: Benchmark, rounds: int = 10, min_round_seconds: float = 0.05) -> Result:
+    """Time ``bench``: calls per round sized so a round takes ``min_round_seconds``."""
+    fn = bench.setup()
+    fn()  # Warm caches and lazy imports
+    timer = timeit.Timer(fn)
+    reference = timeit.Timer(_reference_workload)
+    calls = _calls_per_round(timer, min_round_seconds)
+    reference_calls = _calls_per_round(reference, min_round_seconds)
+    per_item, ratios = [], []
+    for _ in range(rounds):
+        reference_seconds = reference.timeit(reference_calls) / reference_calls
+        seconds = timer.timeit(calls) / calls / bench.items
+        per_item.append(seconds * 1e6)
+        ratios.append(seconds / reference_seconds)
+    return Result(
+        bench.name, bench.items, min(per_item), statistics.median(per_item), statistics.median(ratios), rounds, calls
+    )
+
+
+def run(pattern: Optional[str] = None, rounds: int = 10, min_round_seconds: float = 0.05) -> List[Result]:
+    """Measure every benchmark whose name contains ``pattern``, in name order."""
+    return [
+        measure(BENCHMARKS[name], rounds, min_round_seconds)
+        for name in sorted(BENCHMARKS)
+        if pattern is None or pattern in name
+    ]
+
+
+def load_baselines(path: Path = BASELINES_PATH) -> Dict[str, Dict[str, float]]:
+    """Baselines by benchmark name ({} if there is no baseline file)."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["benchmarks"]
+
+
+def save_baselines(results: Iterable[Result], path: Path = BASELINES_PATH) -> None:
+    """Record ``results`` as the baselines, keeping those of benchmarks not run this time."""
+    data = json.loads(path.read_text()) if path.exists() else {"benchmarks": {}}
+    data["machine"] = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.machine(),
+        "recorded": date.today().isoformat(),
+    }
+    for result in results:
+        data["benchmarks"][result.name] = {
+            "best_us": round(result.best_us, 3),
+            "median_us": round(result.median_us, 3),
+            "relative": round(result.relative, 5),
+            "items": result.items,
+        }
+    data["benchmarks"] = dict(sorted(data["benchmarks"].items()))
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def compare(
+    results: Iterable[Result], baselines: Dict[str, Dict[str, float]], threshold: float = DEFAULT_THRESHOLD
+) -> List[Comparison]:
+    """Each result against its baseline; slower by more than ``threshold`` is a regression."""
+    comparisons = []
+    for result in results:
+        baseline = baselines.get(result.name)
+        change = None if baseline is None else result.relative / baseline["relative"] - 1
+        comparisons.append(Comparison(
+            result.name,
+            None if baseline is None else baseline["best_us"],
+            result.best_us,
+            change,
+            change is not None and change > threshold,
+        ))
+    return comparisons
+
+
+def format_table(results: List[Result], comparisons: List[Comparison]) -> str:
+    """Results as a fixed-width table, with the change against the baseline when there is one."""
+    by_name = {comparison.name: comparison for comparison in comparisons}
+    width = max([len(result.name) for result in results] + [9])
+    lines = [f"{'benchmark':<{width}}  {'best us/item':>12}  {'median':>10}  {'baseline':>10}  {'change':>8}"]
+    for result in results:
+        comparison = by_name.get(result.name)
+        baseline = "-" if comparison is None or comparison.baseline_us is None else f"{comparison.baseline_us:.2f}"
+        change = "-"
+        if comparison is not None and comparison.change is not None:
+            change = f"{comparison.change:+.1%}" + (" !" if comparison.regressed else "")
+        lines.append(
+            f"{result.name:<{width}}  {result.best_us:>12.2f}  {result.median_us:>10.2f}  {baseline:>10}  {change:>8}"
+        )
+    return "\n".join(lines)
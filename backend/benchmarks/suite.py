@@ -0,0 +1,156 @@
+"""
+The benchmarks: hot paths of scoring, investment analysis, CSV parsing,
+columnar search and response serialization.
+
+Each benchmark is a setup function registered with ``@benchmark``; it builds
+its inputs from ``synthetic`` and returns the callable that is timed. One
+call handles ``items`` inputs (a 100-row page, like a search response), and
+results are reported per item.
+"""
+import json
+from typing import Callable, Dict, List, NamedTuple
+
+from pydantic import TypeAdapter
+
+from app.core.investment import _compute_simple_irr, analyze_investment
+from app.core.scoring import calculate_profitability_score, estimate_monthly_rent
+from app.ingest.parsing import build_property_dedupe_key
+from app.schemas import PropertyResponse
+
+from . import synthetic
+
+PAGE_SIZE = 100
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    items: int
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, items: int = PAGE_SIZE):
+    """Register a setup function returning the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, items)
+        return setup
+
+    return register
+
+
+@benchmark("scoring.estimate_monthly_rent")
+def bench_estimate_monthly_rent():
+    homes = [(home["price"], home["size_sqft"], home["bedrooms"]) for home in synthetic.listings(PAGE_SIZE)]
+    return lambda: [estimate_monthly_rent(*home) for home in homes]
+
+
+@benchmark("scoring.calculate_profitability_score")
+def bench_calculate_profitability_score():
+    inputs = []
+    for home in synthetic.listings(PAGE_SIZE):
+        crime_rate, violent_crime, property_crime = home["crime"] or (None, None, None)
+        lagged_cpi, fed_rate, lagged_unemployment, volatility_value, nr_weeks = home["macro"] or (None,) * 5
+        inputs.append({
+            "price": home["price"],
+            "size_sqft": home["size_sqft"],
+            "estimated_rent": home["estimated_rent"],
+            "year_built": home["year_built"],
+            "property_type": home["property_type"],
+            "bathrooms": home["bathrooms"],
+            "crime_rate": crime_rate,
+            "violent_crime": violent_crime,
+            "property_crime": property_crime,
+            "lagged_cpi": lagged_cpi,
+            "fed_rate": fed_rate,
+            "lagged_unemployment": lagged_unemployment,
+            "volatility_value": volatility_value,
+            "nr_weeks": nr_weeks,
+            "search_status": home["listing_status"],
+        })
+    return lambda: [calculate_profitability_score(**kwargs) for kwargs in inputs]
+
+
+@benchmark("investment.analyze_investment")
+def bench_analyze_investment():
+    homes = synthetic.properties(PAGE_SIZE)
+    return lambda: [analyze_investment(home) for home in homes]
+
+
+@benchmark("investment.compute_simple_irr")
+def bench_compute_simple_irr():
+    series = synthetic.cash_flow_series(PAGE_SIZE)
+    return lambda: [_compute_simple_irr(flows) for flows in series]
+
+
+@benchmark("ingest.parse_csv_row")
+def bench_parse_csv_row():
+    from load_csv_data import parse_csv_row
+
+    rows = list(synthetic.csv_rows(PAGE_SIZE))
+    return lambda: [parse_csv_row(row, geocode=False) for row in rows]
+
+
+@benchmark("ingest.build_property_dedupe_key")
+def bench_build_property_dedupe_key():
+    homes = synthetic.listings(PAGE_SIZE)
+    return lambda: [build_property_dedupe_key(home) for home in homes]
+
+
+@benchmark("serialization.property_page_validate")
+def bench_property_page_validate():
+    """``PropertyResponse.model_validate`` of ORM rows, as search builds its page."""
+    homes = synthetic.properties(PAGE_SIZE)
+    return lambda: [PropertyResponse.model_validate(home) for home in homes]
+
+
+@benchmark("serialization.property_page_render")
+def bench_property_page_render():
+    """What FastAPI does with a ``List[PropertyResponse]`` response_model: validate, dump, encode."""
+    page = [PropertyResponse.model_validate(home) for home in synthetic.properties(PAGE_SIZE)]
+    adapter = TypeAdapter(List[PropertyResponse])
+    return lambda: json.dumps(adapter.dump_python(adapter.validate_python(page), mode="json")).encode()
+
+
+@benchmark("api.search_page")
+def bench_search_page():
+    """The Python work of one 100-row search page after the query: validate, analyze, render."""
+    homes = synthetic.properties(PAGE_SIZE)
+    adapter = TypeAdapter(List[PropertyResponse])
+
+    def search_page():
+        page = []
+        for home in homes:
+            response_obj = PropertyResponse.model_validate(home)
+            analysis = analyze_investment(home)
+            if analysis:
+                response_obj.cap_rate = analysis.cap_rate
+                response_obj.gross_yield = analysis.gross_yield
+                response_obj.net_yield = analysis.net_yield
+                response_obj.cash_on_cash_roi = analysis.cash_on_cash_roi
+                response_obj.deal_score = analysis.deal_score
+            page.append(response_obj)
+        return json.dumps(adapter.dump_python(adapter.validate_python(page), mode="json")).encode()
+
+    return search_page
+
+
+COLUMNAR_SEARCHES = [
+    {},
+    {"min_price": 200_000, "max_price": 400_000, "sort_by": "price", "sort_order": "asc"},
+    {"bedrooms": 3, "property_type": "condo", "limit": 50},
+    {"min_score": 60, "min_size": 1500, "sort_by": "size_sqft", "skip": 40},
+]
+
+
+@benchmark("search.columnar_page", items=len(COLUMNAR_SEARCHES))
+def bench_columnar_page():
+    """Page ids of typical searches from a 50,000-listing snapshot (``SEARCH_BACKEND=columnar``)."""
+    from app.core.search_index import build_snapshot, page_rows
+
+    homes = synthetic.listings(5000)
+    columns = ("zip_code", "price", "size_sqft", "bedrooms", "bathrooms", "property_type", "profitability_score")
+    rows = [(number, *(home[name] for name in columns)) for number, home in enumerate(homes * 10, start=1)]
+    snapshot = build_snapshot([rows])
+    return lambda: [page_rows(snapshot, **search) for search in COLUMNAR_SEARCHES]
@@ -0,0 +1,144 @@
+"""
+Deterministic synthetic listings for benchmarks and load tests.
+
+Row ``i`` of a given seed is always the same, whatever else is generated,
+so benchmark inputs never change between runs or machines. Rows use the
+columns of the Kaggle CSV that ``load_csv_data.py`` reads.
+"""
+import csv
+import gzip
+import random
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.ingest.parsing import parse_listing
+from app.models import Property
+
+DEFAULT_SEED = 2026
+
+CSV_COLUMNS = [
+    "city", "state", "zip_code", "price", "livingArea", "num_bedrooms.x", "num_full_baths.x",
+    "num_half_baths", "num_three_quarter_baths", "property_type", "yearBuilt.x", "latitude", "longitude",
+    "lotArea", "days_on_market", "isHot", "isNew", "is_virtual_tour", "searchStatus",
+    "lagged_CPI", "fed_rate", "lagged_unemployment", "volatility_value", "nr_weeks",
+    "crime_rate", "violent_crime", "property_crime",
+]
+
+# City, state, ZIP prefix, centre and a typical price per square foot
+MARKETS = [
+    ("Dallas", "TX", "752", 32.78, -96.80, 190),
+    ("Austin", "TX", "787", 30.27, -97.74, 280),
+    ("Phoenix", "AZ", "850", 33.45, -112.07, 250),
+    ("Atlanta", "GA", "303", 33.75, -84.39, 220),
+    ("Columbus", "OH", "432", 39.96, -83.00, 170),
+    ("Denver", "CO", "802", 39.74, -104.99, 340),
+    ("Tampa", "FL", "336", 27.95, -82.46, 260),
+    ("Charlotte", "NC", "282", 35.23, -80.84, 230),
+]
+PROPERTY_TYPES = [
+    ("Single Family Residential", 60),
+    ("Condo", 15),
+    ("Townhouse", 15),
+    ("Multi Family", 10),
+]
+SEARCH_STATUSES = ["ACTIVE", "ACTIVE", "ACTIVE", "PENDING", "CONTINGENT", ""]
+
+
+def _blank_or(rng: random.Random, value: str, blank_share: float = 0.1) -> str:
+    return "" if rng.random() < blank_share else value
+
+
+def csv_row(i: int, seed: int = DEFAULT_SEED) -> Dict[str, str]:
+    """Row ``i`` (0-based) of the synthetic CSV."""
+    rng = random.Random(f"{seed}:{i}")
+    city, state, zip_prefix, lat, lng, price_per_sqft = rng.choice(MARKETS)
+    property_type = rng.choices([name for name, _ in PROPERTY_TYPES], [weight for _, weight in PROPERTY_TYPES])[0]
+    bedrooms = rng.choices([1, 2, 3, 4, 5, 6], [5, 20, 40, 25, 8, 2])[0]
+    size_sqft = max(450, int(rng.gauss(500 + bedrooms * 420, 250)))
+    price = round(size_sqft * price_per_sqft * rng.uniform(0.7, 1.4), -2)
+    violent_crime = rng.uniform(150, 1200)
+    property_crime = rng.uniform(1200, 5000)
+    return {
+        "city": city,
+        "state": state,
+        "zip_code": f"{zip_prefix}{rng.randrange(100):02d}",
+        "price": f"{price:.0f}",
+        "livingArea": str(size_sqft),
+        "num_bedrooms.x": str(bedrooms),
+        "num_full_baths.x": str(max(1, bedrooms - rng.randrange(2))),
+        "num_half_baths": str(rng.randrange(2)),
+        "num_three_quarter_baths": "0",
+        "property_type": property_type,
+        "yearBuilt.x": _blank_or(rng, str(rng.randrange(1920, 2025))),
+        "latitude": f"{lat + rng.uniform(-0.25, 0.25):.6f}",
+        "longitude": f"{lng + rng.uniform(-0.25, 0.25):.6f}",
+        "lotArea": _blank_or(rng, str(rng.randrange(1500, 15000)), 0.3),
+        "days_on_market": str(rng.randrange(0, 180)),
+        "isHot": rng.choice(["True", "False", "False", ""]),
+        "isNew": rng.choice(["True", "False", "False"]),
+        "is_virtual_tour": rng.choice(["True", "False"]),
+        "searchStatus": rng.choice(SEARCH_STATUSES),
+        "lagged_CPI": f"{rng.uniform(290, 320):.3f}",
+        "fed_rate": f"{rng.uniform(4.0, 5.5):.2f}",
+        "lagged_unemployment": f"{rng.uniform(3.4, 4.6):.1f}",
+        "volatility_value": f"{rng.uniform(0.05, 0.4):.3f}",
+        "nr_weeks": str(rng.randrange(1, 52)),
+        "crime_rate": _blank_or(rng, f"{(violent_crime + property_crime) / 1000:.2f}"),
+        "violent_crime": f"{violent_crime:.1f}",
+        "property_crime": f"{property_crime:.1f}",
+    }
+
+
+def csv_rows(count: int, seed: int = DEFAULT_SEED, start: int = 0) -> Iterator[Dict[str, str]]:
+    """Rows ``start`` .. ``start + count - 1``."""
+    for i in range(start, start + count):
+        yield csv_row(i, seed)
+
+
+def write_csv(path: str, count: int, seed: int = DEFAULT_SEED, start: int = 0) -> Path:
+    """Write rows ``start`` .. ``start + count - 1`` as a CSV (gzip-compressed if ``path`` ends in .gz)."""
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(csv_rows(count, seed, start))
+    return path
+
+
+def listings(count: int, seed: int = DEFAULT_SEED) -> List[Dict[str, Any]]:
+    """Parsed listings (``parse_listing`` output, no geocoding) of the first ``count`` rows."""
+    parsed = (parse_listing(row) for row in csv_rows(count, seed))
+    return [listing for listing in parsed if listing is not None]
+
+
+def properties(count: int, seed: int = DEFAULT_SEED, created_at: Optional[datetime] = None) -> List[Property]:
+    """Transient ``Property`` rows as search returns them (id, score, rent and created_at set)."""
+    created_at = created_at or datetime(2026, 1, 1)
+    homes = []
+    for i, listing in enumerate(listings(count, seed), start=1):
+        homes.append(Property(
+            id=i,
+            created_at=created_at,
+            **{name: listing[name] for name in (
+                "address", "city", "state", "zip_code", "price", "size_sqft", "bedrooms",
+                "bathrooms", "property_type", "year_built", "lat", "lng", "estimated_rent",
+                "profitability_score",
+            )},
+        ))
+    return homes
+
+
+def cash_flow_series(count: int, seed: int = DEFAULT_SEED, years: int = 10) -> List[List[Decimal]]:
+    """IRR inputs: a down payment, ``years`` of yearly cash flow, the last with the sale."""
+    rng = random.Random(f"{seed}:irr")
+    series = []
+    for _ in range(count):
+        invested = Decimal(rng.randrange(40_000, 150_000))
+        yearly = Decimal(rng.randrange(-3_000, 12_000))
+        flows = [-invested] + [yearly] * years
+        flows[-1] += invested * Decimal(str(round(rng.uniform(1.0, 1.8), 2)))
+        series.append(flows)
+    return series
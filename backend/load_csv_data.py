@@ -1,579 +1,499 @@
 """
 Script to load property data from CSV file into the database.
-Handles CSV parsing, field mapping, validation, and database insertion.
+Handles the command line, multi-file loads and output; the loading itself
+(parsing, validation, database insertion) is ``app/ingest/loader.py``.
 Run: python load_csv_data.py
 """
-import csv
-import re
+import argparse
+import atexit
+import cProfile
+import logging
+import multiprocessing
 import sys
-from decimal import Decimal
-from pathlib import Path
-from typing import Optional, Dict, Any
-import requests
 import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from datetime import date
+from pathlib import Path
+from typing import Optional, Dict, Any, List
 
-from app.database import SessionLocal, Base, engine
-from app.models import Property
-from app.core.scoring import calculate_profitability_score, estimate_monthly_rent
+from app.config import settings
+from app.core.cache import invalidate_listings
+from app.database import SessionLocal, engine
+from app.schema import upgrade_schema
 from app.core.security import get_password_hash
+from app.ingest import BlockingGeocoder
+from app.ingest.city_risk import CRIME_FIELDS, update_city_risk
+from app.ingest.loader import DEFAULT_BATCH_SIZE, LoadError, load_csv_into_db, recalculate_scores_in_db
+from app.ingest.macro import MACRO_FIELDS, update_macro_indicators
+from app.ingest.manifest import file_sha256, finish_manifest_entry, get_manifest_entry, start_manifest_entry
+from app.ingest.sources import expand_input_paths
+from app.ingest.staging import STAGED_STATUS, publish_staged, reset_staging_tables
+from app.ingest.parsing import (
+    parse_bool,
+    parse_float,
+    normalize_us_zip_code,
+    normalize_text,
+    normalize_price_key,
+    build_property_dedupe_key,
+    parse_coordinate_key_from_row,
+    coordinate_location_hash,
+    parse_geocode_coordinates,
+    parse_listing,
+)
+
+
+_geocoder: Optional[BlockingGeocoder] = None
+
+
+def get_geocoder() -> BlockingGeocoder:
+    """Return the geocoder of ``reverse_geocode``, opening its cache and HTTP client on first use.
+
+    Single-threaded callers only (CLI, benchmarks); ``load_csv_into_db`` opens its own.
+    """
+    global _geocoder
+    if _geocoder is None:
+        _geocoder = BlockingGeocoder()
+        atexit.register(_geocoder.close)
+    return _geocoder
 
 
-geocode_cache = {}
-
-
-def parse_bool(value: Any) -> Optional[bool]:
-    """Parse common CSV truthy/falsey strings into booleans."""
-    if value is None:
+def reverse_geocode(lat: float, lng: float) -> Optional[Dict[str, Optional[str]]]:
+    """Return address and postcode from lat/lon using the configured Nominatim endpoint."""
+    if not lat or not lng:
         return None
-    text = str(value).strip().lower()
-    if text in {"true", "1", "yes", "y", "t"}:
-        return True
-    if text in {"false", "0", "no", "n", "f"}:
-        return False
-    return None
+    return get_geocoder().reverse(lat, lng)
 
 
-def parse_float(value: Any) -> Optional[float]:
-    """Parse optional float values from CSV safely."""
-    if value in (None, ""):
-        return None
-    try:
-        return float(value)
-    except (ValueError, TypeError):
-        return None
+def parse_csv_row(
+    row: Dict[str, str],
+    geocode_data: Optional[Dict[str, Optional[str]]] = None,
+    geocode: bool = True,
+) -> Optional[Dict[str, Any]]:
+    """
+    Parse a CSV row into property data, reverse geocoding it on demand.
+    
+    Args:
+        row: Dictionary from CSV reader
+        geocode_data: Pre-resolved reverse geocode result for the row's coordinates
+        geocode: Look coordinates up when ``geocode_data`` is not supplied
+        
+    Returns:
+        Dictionary of property data or None if validation fails
+    """
+    if geocode_data is None and geocode:
+        coordinates = parse_geocode_coordinates(row)
+        geocode_data = reverse_geocode(*coordinates) if coordinates else None
+    return parse_listing(row, geocode_data)
 
 
-def normalize_us_zip_code(value: Any) -> Optional[str]:
-    """Return a US 5-digit ZIP code when possible."""
-    if value in (None, ""):
-        return None
+class PrintHandler(logging.Handler):
+    """Prints log messages to whatever ``sys.stdout`` is at the time (see ``PrefixedOutput``)."""
 
-    text = str(value).strip()
-    if not text:
-        return None
+    def emit(self, record: logging.LogRecord) -> None:
+        print(self.format(record))
 
-    # Match standard ZIP or ZIP+4 and keep the 5-digit ZIP.
-    match = re.search(r"\b(\d{5})(?:-\d{4})?\b", text)
-    if match:
-        return match.group(1)
 
-    # Fallback: keep first 5 digits when separators/spaces are unusual.
-    digits_only = "".join(ch for ch in text if ch.isdigit())
-    if len(digits_only) >= 5:
-        return digits_only[:5]
+def show_loader_output() -> None:
+    """Print the loader core's progress and summaries (``app.ingest`` logs them)."""
+    logger = logging.getLogger("app.ingest")
+    logger.setLevel(logging.INFO)
+    if not any(isinstance(handler, PrintHandler) for handler in logger.handlers):
+        logger.addHandler(PrintHandler())
 
-    return None
 
+class PrefixedOutput:
+    """Stdout wrapper that tags each line, so concurrent file loads stay readable."""
 
-def normalize_text(value: Any) -> str:
-    """Normalize text for robust dedupe comparisons."""
-    if value is None:
-        return ""
-    return " ".join(str(value).strip().lower().split())
+    def __init__(self, stream, prefix: str):
+        self.stream = stream
+        self.prefix = prefix
+        self.pending = ""
 
+    def write(self, text: str) -> int:
+        # Whole lines go out in one write so other processes' output cannot split them.
+        lines = (self.pending + text).split("\n")
+        self.pending = lines.pop()
+        if lines:
+            self.stream.write("".join(f"{self.prefix}{line}\n" for line in lines))
+            self.stream.flush()
+        return len(text)
 
-def normalize_price_key(value: Any) -> str:
-    """Normalize price for stable dedupe key comparisons."""
-    if value is None:
-        return "0.00"
-    try:
-        return f"{Decimal(str(value)):.2f}"
-    except Exception:
-        return str(value)
-
-
-def build_property_dedupe_key(property_data: Dict[str, Any]) -> tuple:
-    """Build a stable dedupe key for comparing existing/new homes."""
-    lat = property_data.get("lat")
-    lng = property_data.get("lng")
-
-    if lat is not None and lng is not None:
-        # Coordinates are the strongest signal for the same home.
-        return (
-            "coords",
-            round(float(lat), 6),
-            round(float(lng), 6),
-            normalize_price_key(property_data.get("price")),
-            int(property_data.get("size_sqft") or 0),
-            int(property_data.get("bedrooms") or 0),
-        )
-
-    return (
-        "addr",
-        normalize_text(property_data.get("address")),
-        normalize_text(property_data.get("city")),
-        normalize_text(property_data.get("state")),
-        normalize_text(property_data.get("zip_code")),
-        normalize_price_key(property_data.get("price")),
-        int(property_data.get("size_sqft") or 0),
-        int(property_data.get("bedrooms") or 0),
-    )
+    def flush(self):
+        self.stream.flush()
 
 
-def parse_coordinate_key_from_row(row: Dict[str, str]) -> Optional[tuple]:
-    """Build a coordinate key directly from CSV row values for fast duplicate checks."""
-    try:
-        lat = float(row.get("latitude", 0))
-        lng = float(row.get("longitude", 0))
-    except (ValueError, TypeError):
-        return None
+def load_file_once(csv_file_path: str, options: Dict[str, Any], force: bool = False) -> Dict[str, Any]:
+    """
+    Load one file of a multi-file ingest unless the manifest says its content is already loaded.
 
-    if lat == 0 or lng == 0:
-        return None
+    Interrupted files are resumed from their checkpoint. Returns the file's
+    status (``loaded``, ``skipped`` or ``failed``) and counts.
+    """
+    result = {"path": csv_file_path, "status": "failed", "loaded": 0, "updated": 0, "duplicate": 0, "skipped": 0}
+    started = time.perf_counter()
+    if not Path(csv_file_path).is_file():
+        print(f"❌ CSV file not found: {csv_file_path}")
+        return result
 
-    return (round(lat, 6), round(lng, 6))
+    content_sha256 = file_sha256(csv_file_path)
+    db = SessionLocal()
+    try:
+        entry = get_manifest_entry(db, content_sha256)
+        if entry is not None and entry.status == "complete" and not force:
+            print(f"⏭️  Already loaded from {entry.source}; skipping")
+            result["status"] = "skipped"
+            return result
+
+        entry = start_manifest_entry(db, csv_file_path, content_sha256)
+        if entry is None:
+            print("⏭️  Identical file is being loaded by another worker; skipping")
+            result["status"] = "skipped"
+            return result
 
+        try:
+            counts = load_csv_into_db(csv_file_path, resume=True, **options)
+            error = None
+        except Exception as e:
+            print(f"❌ {str(e)}")
+            counts, error = None, f"{type(e).__name__}: {e}"
+        staged = options.get("staged") and not options.get("publish", True)
+        finish_manifest_entry(db, entry, counts, error, status=STAGED_STATUS if staged else "complete")
+    finally:
+        db.close()
 
+    if counts is not None:
+        result.update(counts, status="loaded")
+    result["seconds"] = time.perf_counter() - started
+    return result
 
-def reverse_geocode(lat: float, lng: float) -> Optional[Dict[str, Optional[str]]]:
-    """Return address and postcode from lat/lon using OpenStreetMap Nominatim."""
-    key = f"{lat}, {lng}"
-    if key in geocode_cache:
-        return geocode_cache[key]
-    
 
-    if not lat or not lng:
-        return None
-    url =   "https://nominatim.openstreetmap.org/reverse"
-    params = {
-        "format": "json",
-        "lat": lat,
-        "lon": lng,
-        "zoom": 18,
-        "addressdetails": 1
-    }
-    try:
-        time.sleep(2)
-        res = requests.get(url, params=params, headers={"User-Agent": "RentIQ/1.0"})
-        res.raise_for_status()
-        data = res.json()
-        address = data.get("display_name")
-        postcode = data.get("address", {}).get("postcode")
-        geocode_data = {
-            "address": address,
-            "zip_code": normalize_us_zip_code(postcode),
-        }
-        geocode_cache[key] = geocode_data
-        return geocode_data
-    except Exception as e:
-        print(f"❌ Geocoding error for ({lat}, {lng}): {str(e)}")
-        return None
-    
+def _load_file_in_worker(csv_file_path: str, options: Dict[str, Any], force: bool) -> Dict[str, Any]:
+    show_loader_output()  # A fresh (spawned) process
+    with redirect_stdout(PrefixedOutput(sys.stdout, f"[{Path(csv_file_path).name}] ")):
+        return load_file_once(csv_file_path, options, force)
 
 
-def parse_csv_row(row: Dict[str, str]) -> Optional[Dict[str, Any]]:
+def load_files(inputs: List[str], file_workers: int = 1, force: bool = False, **options) -> List[Dict[str, Any]]:
     """
-    Parse a CSV row into property data.
-    
-    Args:
-        row: Dictionary from CSV reader
-        
-    Returns:
-        Dictionary of property data or None if validation fails
+    Load every CSV matched by ``inputs`` (files, directories or glob patterns).
+
+    Up to ``file_workers`` files load at once, each in its own process with its
+    own checkpoint. Cross-file duplicates are caught by the shared unique
+    ``dedupe_hash`` index, and files whose content is already in the load
+    manifest are skipped unless ``force`` is set. ``options`` are passed to
+    ``load_csv_into_db``; with ``staged=True`` every file is staged and the
+    whole delivery is published in one transaction at the end.
     """
-    try:
-        # Extract and validate required fields
-        address = row.get("city", "Unknown")  # Use city as part of address since full address not in CSV
-        city = row.get("city", "").strip()
-        state = row.get("state", "").strip().upper()
-        geocode_data = reverse_geocode(float(row.get("latitude")), float(row.get("longitude"))) if row.get("latitude") and row.get("longitude") else None
-        full_address = geocode_data.get("address") if geocode_data else None
-        if not full_address:
-            full_address = f"{city}, {state}"
-
-        
-        if not city or not state or len(state) != 2:
-            return None
-        
-        # Price (required)
-        try:
-            price_float = float(row.get("price", 0))
-            if price_float <= 0:
-                return None
-            price = Decimal(str(price_float))
-        except (ValueError, TypeError):
-            return None
-        
-        # Living area / size (required)
-        try:
-            size_sqft = int(float(row.get("livingArea", 0)))
-            if size_sqft <= 0:
-                return None
-        except (ValueError, TypeError):
-            return None
-        
-        # Bedrooms (required)
-        try:
-            bedrooms = int(float(row.get("num_bedrooms.x", 0)))
-            if bedrooms < 0:
-                return None
-        except (ValueError, TypeError):
-            return None
-        
-        # Bathrooms (calculate from full baths + half baths)
-        try:
-            full_baths = float(row.get("num_full_baths.x", 0))
-            half_baths = float(row.get("num_half_baths", 0))
-            three_quarter_baths = float(row.get("num_three_quarter_baths", 0))
-            bathrooms = full_baths + (half_baths * 0.5) + (three_quarter_baths * 0.75)
-            if bathrooms < 0:
-                bathrooms = 1.0  # Default to 1 bathroom
-        except (ValueError, TypeError):
-            bathrooms = 1.0
-        
-        # Property type
-        raw_property_type = row.get("property_type", "house")
-        property_type_normalized = str(raw_property_type).lower().strip().replace(" ", "_")
-        property_type_map = {
-            "single_family_residential": "single_family",
-            "single_family": "single_family",
-            "house": "single_family",
-            "multi_family_2_to_4": "multi_family",
-            "multi_family": "multi_family",
-            "townhouse": "townhouse",
-            "condo_coop": "condo",
-            "condo": "condo",
-            "apartment": "condo",
-            "manufactured": "house",
-            "land": "land",
-        }
-        property_type = property_type_map.get(property_type_normalized, "single_family")
-        
-        # Year built
-        try:
-            year_built_str = row.get("yearBuilt.x", "")
-            year_built = int(float(year_built_str)) if year_built_str else None
-            if year_built and (year_built < 1800 or year_built > 2100):
-                year_built = None
-        except (ValueError, TypeError):
-            year_built = None
-        
-        # Coordinates
-        try:
-            lat = float(row.get("latitude", 0))
-            lng = float(row.get("longitude", 0))
-            if lat == 0 or lng == 0:  # Invalid coordinates
-                lat, lng = None, None
-        except (ValueError, TypeError):
-            lat, lng = None, None
-        
-        # Zip code
-        zip_code = normalize_us_zip_code(row.get("zip_code", ""))
-        if (not zip_code) and geocode_data and geocode_data.get("zip_code"):
-            zip_code = normalize_us_zip_code(geocode_data.get("zip_code"))
-        if not zip_code:
-            zip_code = "00000"
-        
-        # Estimate rent if not provided
-        estimated_rent = estimate_monthly_rent(price, size_sqft, bedrooms)
-
-        # Market/risk features from CSV for richer scoring.
-        crime_rate = None
-        for key in ["crime_rate", "city_crime_rate", "crime_index"]:
-            crime_rate = parse_float(row.get(key))
-            if crime_rate is not None:
-                break
-
-        violent_crime = None
-        for key in ["violent_crime", "violent_crime_rate"]:
-            violent_crime = parse_float(row.get(key))
-            if violent_crime is not None:
-                break
-
-        property_crime = None
-        for key in ["property_crime", "property_crime_rate"]:
-            property_crime = parse_float(row.get(key))
-            if property_crime is not None:
-                break
-
-        days_on_market = parse_float(row.get("days_on_market"))
-        lagged_cpi = parse_float(row.get("lagged_CPI"))
-        fed_rate = parse_float(row.get("fed_rate"))
-        lagged_unemployment = parse_float(row.get("lagged_unemployment"))
-        volatility_value = parse_float(row.get("volatility_value"))
-        nr_weeks = parse_float(row.get("nr_weeks"))
-        lot_area = parse_float(row.get("lotArea"))
-
-        is_hot = parse_bool(row.get("isHot"))
-        is_new_listing = parse_bool(row.get("isNew"))
-        is_virtual_tour = parse_bool(row.get("is_virtual_tour"))
-        search_status = row.get("searchStatus")
-        
-        # Calculate profitability score
-        profitability_score = calculate_profitability_score(
-            price=price,
-            size_sqft=size_sqft,
-            estimated_rent=estimated_rent,
-            year_built=year_built,
-            property_type=property_type,
-            crime_rate=crime_rate,
-            violent_crime=violent_crime,
-            property_crime=property_crime,
-            days_on_market=days_on_market,
-            is_hot=is_hot,
-            is_new_listing=is_new_listing,
-            search_status=search_status,
-            lagged_cpi=lagged_cpi,
-            fed_rate=fed_rate,
-            lagged_unemployment=lagged_unemployment,
-            volatility_value=volatility_value,
-            nr_weeks=nr_weeks,
-            bathrooms=bathrooms,
-            lot_area=lot_area,
-            is_virtual_tour=is_virtual_tour,
+    paths = expand_input_paths(inputs)
+    if not paths:
+        print(f"❌ No CSV files matched: {' '.join(inputs)}")
+        return []
+    print(f"📚 {len(paths)} files to load, {max(file_workers, 1)} at a time")
+
+    # Set up the schema once here; workers creating tables concurrently would race.
+    upgrade_schema(engine)
+    staged = options.get("staged", False)
+    if staged:
+        reset_staging_tables(engine)
+        options = {**options, "publish": False}
+
+    results = []
+    started = time.perf_counter()
+
+    def report(result):
+        results.append(result)
+        name = Path(result["path"]).name
+        if result["status"] == "loaded":
+            print(
+                f"📦 [{len(results)}/{len(paths)}] {name}: {result['loaded']} loaded, {result['updated']} price changes, "
+                f"{result['duplicate']} duplicate, {result['skipped']} invalid ({result['seconds']:.1f}s)"
+            )
+        else:
+            label = "already loaded" if result["status"] == "skipped" else result["status"]
+            print(f"📦 [{len(results)}/{len(paths)}] {name}: {label}")
+
+    if file_workers <= 1:
+        for path in paths:
+            report(load_file_once(path, options, force))
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=file_workers, mp_context=context) as pool:
+            futures = {pool.submit(_load_file_in_worker, path, options, force): path for path in paths}
+            for future in as_completed(futures):
+                try:
+                    report(future.result())
+                except Exception as e:
+                    print(f"❌ {futures[future]}: {str(e)}")
+                    report({"path": futures[future], "status": "failed"})
+
+    if staged:
+        with engine.begin() as connection:
+            published = publish_staged(connection)
+        print(
+            f"🚀 Published staged import: {published['inserted']} new homes, {published['updated']} price changes, "
+            f"{published['rescored']} homes rescored"
         )
-        
-        return {
-            "address": full_address,
-            "city": city,
-            "state": state,
-            "zip_code": zip_code,
-            "price": price,
-            "size_sqft": size_sqft,
-            "bedrooms": bedrooms,
-            "bathrooms": bathrooms,
-            "property_type": property_type,
-            "year_built": year_built,
-            "lat": lat,
-            "lng": lng,
-            "estimated_rent": estimated_rent,
-            "profitability_score": profitability_score,
-            "image_url": None,
-        }
-    
-    except Exception as e:
-        print(f"❌ Error parsing row: {str(e)}")
-        return None
 
+    elapsed = time.perf_counter() - started
+    by_status = {status: sum(1 for r in results if r["status"] == status) for status in ("loaded", "skipped", "failed")}
+    print(f"\n✅ Multi-file load complete in {elapsed:.1f}s!")
+    print(f"   ✓ Files loaded: {by_status['loaded']}, already loaded: {by_status['skipped']}, failed: {by_status['failed']}")
+    print(f"   ✓ Rows loaded: {sum(r.get('loaded', 0) for r in results)}")
+    print(f"   ↻ Price changes: {sum(r.get('updated', 0) for r in results)}")
+    print(f"   ↺ Duplicate skipped: {sum(r.get('duplicate', 0) for r in results)}")
+    return results
 
-def load_csv_into_db(csv_file_path: str, batch_size: int = 100, start_row: Optional[int] = None, max_rows: Optional[int] = None):
-    """
-    Load property data from CSV file into database.
-    
-    Args:
-        csv_file_path: Path to CSV file
-        batch_size: Number of records to insert per batch
-        start_row: Starting row number (1-indexed, after header). None = start at beginning
-        max_rows: Maximum rows to load (None = load all)
-    """
-    csv_file = Path(csv_file_path)
-    
-    if not csv_file.exists():
-        print(f"❌ CSV file not found: {csv_file_path}")
-        return
-    
-    print(f"📁 Loading data from: {csv_file_path}")
-    
-    # Ensure tables exist without dropping unrelated data
-    print("📋 Ensuring database tables exist...")
-    Base.metadata.create_all(bind=engine)
-    print("✅ Database tables ready!")
-    
-    db = SessionLocal()
-    
-    try:
-        # Build a dedupe index from existing records to support append-only loads.
-        existing_keys = set()
-        existing_coordinate_keys = set()
-        existing_rows = db.query(
-            Property.address,
-            Property.city,
-            Property.state,
-            Property.zip_code,
-            Property.price,
-            Property.size_sqft,
-            Property.bedrooms,
-            Property.lat,
-            Property.lng,
-        ).all()
-
-        for row in existing_rows:
-            if row.lat is not None and row.lng is not None:
-                existing_coordinate_keys.add((round(float(row.lat), 6), round(float(row.lng), 6)))
-
-            existing_keys.add(
-                build_property_dedupe_key(
-                    {
-                        "address": row.address,
-                        "city": row.city,
-                        "state": row.state,
-                        "zip_code": row.zip_code,
-                        "price": row.price,
-                        "size_sqft": row.size_sqft,
-                        "bedrooms": row.bedrooms,
-                        "lat": row.lat,
-                        "lng": row.lng,
-                    }
-                )
-            )
 
-        print(f"🧠 Existing dedupe index loaded: {len(existing_keys)} homes")
-        print(f"📍 Existing coordinate index loaded: {len(existing_coordinate_keys)} homes")
-        
-        # Load CSV
-        loaded_count = 0
-        skipped_count = 0
-        duplicate_count = 0
-        batch = []
-        
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            if reader.fieldnames is None:
-                print("❌ CSV file is empty or has no headers")
-                return
-            
-            print(f"📊 CSV columns: {', '.join(reader.fieldnames[:5])}...")
-            print(f"📊 Total columns: {len(reader.fieldnames)}")
-            
-            start_row_num = (start_row + 1) if start_row else 2  # Convert to actual row number (row 1 = header)
-            end_row_num = (start_row_num + max_rows - 1) if max_rows else None
-            
-            for row_num, row in enumerate(reader, start=2):  # Start at 2 (after header)
-                if row_num < start_row_num:
-                    continue  # Skip rows before start
-                if end_row_num and row_num > end_row_num:
-                    break  # Stop after reaching end
-
-                # Fast path: if lat/lon already exists, skip before geocoding/API work.
-                coordinate_key = parse_coordinate_key_from_row(row)
-                if coordinate_key and coordinate_key in existing_coordinate_keys:
-                    duplicate_count += 1
-                    continue
-                
-                property_data = parse_csv_row(row)
-                
-                if property_data:
-                    dedupe_key = build_property_dedupe_key(property_data)
-                    if dedupe_key in existing_keys:
-                        duplicate_count += 1
-                        continue
-
-                    property_obj = Property(**property_data)
-                    batch.append(property_obj)
-                    existing_keys.add(dedupe_key)
-                    if property_data.get("lat") is not None and property_data.get("lng") is not None:
-                        existing_coordinate_keys.add((round(float(property_data["lat"]), 6), round(float(property_data["lng"]), 6)))
-                    loaded_count += 1
-                    
-                    # Insert batch
-                    if len(batch) >= batch_size:
-                        db.add_all(batch)
-                        db.commit()
-                        print(f"✅ Inserted {loaded_count} properties...")
-                        batch = []
-                else:
-                    skipped_count += 1
-                
-                # Progress indicator
-                if row_num % 1000 == 0:
-                    print(f"📈 Processed {row_num} rows ({loaded_count} loaded, {duplicate_count} duplicate, {skipped_count} invalid)...")
-        
-        # Insert remaining batch
-        if batch:
-            db.add_all(batch)
-            db.commit()
-        
-        print(f"\n✅ Data load complete!")
-        print(f"   ✓ Loaded: {loaded_count} properties")
-        print(f"   ↺ Duplicate skipped: {duplicate_count}")
-        print(f"   ⚠️  Skipped: {skipped_count} invalid rows")
-        print(f"   📊 Total processed: {loaded_count + duplicate_count + skipped_count}")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Database error: {str(e)}")
-        sys.exit(1)
-    finally:
-        db.close()
+def parse_assignments(assignments: List[str]) -> Dict[str, float]:
+    """``["fed_rate=5.25", ...]`` -> ``{"fed_rate": 5.25, ...}``; raises ValueError on a bad value."""
+    changes = {}
+    for assignment in assignments:
+        field, _, value = assignment.partition("=")
+        changes[field.strip()] = float(value)
+    return changes
 
 
-def recalculate_scores_in_db(limit: Optional[int] = None):
-    """Recalculate profitability scores for existing properties in-place.
+def set_macro_indicators(assignments: List[str], region: Optional[str] = None, as_of: Optional[date] = None):
+    """Apply ``FIELD=VALUE`` macro indicator updates and rescore the affected homes in one transaction."""
+    try:
+        changes = parse_assignments(assignments)
+        upgrade_schema(engine)
+        with engine.begin() as connection:
+            result = update_macro_indicators(connection, changes, region=region, as_of=as_of)
+        invalidate_listings()
+    except ValueError as e:
+        print(f"❌ Invalid macro update: {str(e)}")
+        sys.exit(1)
+    print(f"📉 Updated {result['indicators']} macro indicator rows; rescored {result['rescored']} homes")
 
-    This mode uses fields already persisted in the database, so it does not
-    require CSV reload and does not delete any rows.
-    """
-    print("🔁 Recalculating profitability scores for existing properties...")
-    db = SessionLocal()
 
+def set_city_risk(city_state: str, assignments: List[str]):
+    """Apply ``FIELD=VALUE`` crime metric updates to one "City, ST" and rescore its homes in one transaction."""
     try:
-        query = db.query(Property).order_by(Property.id)
-        if limit and limit > 0:
-            query = query.limit(limit)
-
-        properties = query.all()
-        if not properties:
-            print("ℹ️  No properties found to recalculate.")
-            return
-
-        updated = 0
-        for prop in properties:
-            prop.profitability_score = calculate_profitability_score(
-                price=prop.price,
-                size_sqft=prop.size_sqft,
-                estimated_rent=prop.estimated_rent,
-                year_built=prop.year_built,
-                property_type=prop.property_type,
-            )
-            updated += 1
-
-            if updated % 500 == 0:
-                db.commit()
-                print(f"✅ Recalculated {updated} properties...")
+        city, _, state = city_state.rpartition(",")
+        if not city.strip() or not state.strip():
+            raise ValueError(f'expected "City, ST", got "{city_state}"')
+        changes = parse_assignments(assignments)
+        upgrade_schema(engine)
+        with engine.begin() as connection:
+            result = update_city_risk(connection, city, state, changes)
+        invalidate_listings()
+    except ValueError as e:
+        print(f"❌ Invalid city risk update: {str(e)}")
+        sys.exit(1)
+    if not result["cities"]:
+        print(f"ℹ️  No crime metrics stored for {city_state}; nothing to update.")
+        return
+    print(f"📉 Updated crime metrics for {city_state}; rescored {result['rescored']} homes")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """CLI for the loader; positional arguments keep the original usage working."""
+    parser = argparse.ArgumentParser(description="Load property listings from CSV into the database.")
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        metavar="PATH",
+        help="CSV file, directory or glob pattern (several allowed); a single file may be followed "
+        "by start_row (1-indexed, after header) and max_rows",
+    )
+    parser.add_argument(
+        "--recalculate",
+        nargs="?",
+        const=0,
+        type=int,
+        metavar="LIMIT",
+        help="Recalculate scores for existing properties instead of loading (optionally only LIMIT rows)",
+    )
+    parser.add_argument(
+        "--set-macro",
+        nargs="+",
+        default=None,
+        metavar="FIELD=VALUE",
+        help=f"Update stored macro indicators and rescore only the homes they affect "
+        f"(fields: {', '.join(MACRO_FIELDS)}), e.g. --set-macro fed_rate=5.25",
+    )
+    parser.add_argument("--macro-region", default=None, metavar="ST", help="Limit --set-macro to one state")
+    parser.add_argument(
+        "--macro-as-of",
+        default=None,
+        type=date.fromisoformat,
+        metavar="YYYY-MM-DD",
+        help="Limit --set-macro to indicators stored for one load date",
+    )
+    parser.add_argument(
+        "--set-city-risk",
+        nargs="+",
+        default=None,
+        metavar="ARG",
+        help=f'Update one city\'s crime metrics and rescore only its homes: "City, ST" FIELD=VALUE ... '
+        f"(fields: {', '.join(CRIME_FIELDS)})",
+    )
+    parser.add_argument(
+        "--geocoder",
+        choices=["online", "offline", "off"],
+        default=settings.GEOCODER_MODE,
+        help="online = Nominatim street addresses, offline = nearest ZIP centroid, off = no lookups",
+    )
+    parser.add_argument("--zip-centroids", default=None, help="ZIP centroid CSV for --geocoder offline")
+    parser.add_argument(
+        "--near-duplicate-meters",
+        type=float,
+        default=None,
+        help="Treat listings this close to a known home with a similar address as that home "
+        f"(default {settings.NEAR_DUPLICATE_RADIUS_METERS:g}; 0 = exact coordinates only)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to parse and score rows; output order does not depend on this",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted load of this file from its last committed checkpoint",
+    )
+    parser.add_argument(
+        "--file-workers",
+        type=int,
+        default=1,
+        help="Files loaded at once when loading a directory, glob or several paths",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reload files the load manifest already lists as loaded",
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Load into staging tables and publish to the live tables in one transaction at the end",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        default=None,
+        metavar="PATH",
+        help="Append stage timings and counters to PATH as JSON lines (progress records and a final summary)",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        metavar="SECONDS",
+        help="Seconds between progress records in --metrics-jsonl (default 10)",
+    )
+    parser.add_argument(
+        "--profile",
+        default=None,
+        metavar="PATH",
+        help="Write a cProfile dump of the run to PATH (inspect with python -m pstats PATH)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Rows per bulk insert and per committed transaction (default {DEFAULT_BATCH_SIZE})",
+    )
+    return parser
 
-        db.commit()
-        print(f"✅ Recalculation complete! Updated {updated} properties.")
-        print("ℹ️  Crime-based adjustments are only applied during CSV import since crime metrics are not stored in the properties table.")
 
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Recalculation error: {str(e)}")
-        sys.exit(1)
-    finally:
-        db.close()
+def split_row_range(inputs: List[str]) -> tuple:
+    """Split trailing ``start_row``/``max_rows`` numbers off the positional paths."""
+    inputs = list(inputs)
+    numbers = []
+    while len(inputs) > 1 and len(numbers) < 2 and inputs[-1].isdigit() and not Path(inputs[-1]).exists():
+        numbers.insert(0, int(inputs.pop()))
+    numbers += [None] * (2 - len(numbers))
+    return inputs, numbers[0], numbers[1]
 
 
 def main():
     """Main entry point."""
-    csv_path = "USA_clean_unique_with_city.csv"
-    start_row = None
-    max_rows = None
-    recalculate_only = False
-    recalc_limit = None
-    
-    # Parse command line arguments
     # Usage:
-    #   python load_csv_data.py [csv_file] [start_row] [max_rows]
+    #   python load_csv_data.py [csv_file] [start_row] [max_rows] [--geocoder offline]
+    #   python load_csv_data.py [csv_file] --resume
+    #   python load_csv_data.py drops/2026-10-18/ 'more/*.csv.gz' --file-workers 8
+    #   python load_csv_data.py [csv_file] --metrics-jsonl metrics.jsonl --profile load.prof
     #   python load_csv_data.py --recalculate [limit]
-    if len(sys.argv) > 1 and sys.argv[1] == "--recalculate":
-        recalculate_only = True
-        if len(sys.argv) > 2:
-            try:
-                recalc_limit = int(sys.argv[2])
-                print(f"🔒 Recalculating maximum {recalc_limit} properties")
-            except ValueError:
-                pass
-
-        recalculate_scores_in_db(limit=recalc_limit)
+    #   python load_csv_data.py --set-macro fed_rate=5.25 [--macro-region TX]
+    #   python load_csv_data.py --set-city-risk "Dallas, TX" violent_crime=410
+    args = build_arg_parser().parse_args()
+    show_loader_output()
+    if not args.profile:
+        run(args)
         return
 
-    if len(sys.argv) > 1:
-        csv_path = sys.argv[1]
-    if len(sys.argv) > 2:
-        try:
-            start_row = int(sys.argv[2])
-            print(f"📍 Starting at row {start_row}")
-        except ValueError:
-            pass
-    if len(sys.argv) > 3:
+    # Only this process is profiled; --workers and --file-workers children are not.
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(run, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        print(f"🔬 Profile written to {args.profile} (python -m pstats {args.profile})")
+
+
+def run(args: argparse.Namespace):
+    """Run the loader for parsed command-line arguments."""
+    inputs, args.start_row, args.max_rows = split_row_range(args.inputs or ["USA_clean_unique_with_city.csv"])
+
+    if args.recalculate is not None:
+        recalc_limit = args.recalculate or None
+        if recalc_limit:
+            print(f"🔒 Recalculating maximum {recalc_limit} properties")
         try:
-            max_rows = int(sys.argv[3])
-            print(f"🔒 Loading maximum {max_rows} rows")
-        except ValueError:
-            pass
+            recalculate_scores_in_db(limit=recalc_limit)
+        except Exception as e:
+            print(f"❌ Recalculation error: {str(e)}")
+            sys.exit(1)
+        return
+
+    if args.set_macro:
+        set_macro_indicators(args.set_macro, region=args.macro_region, as_of=args.macro_as_of)
+        return
+
+    if args.set_city_risk:
+        if len(args.set_city_risk) < 2:
+            build_arg_parser().error('--set-city-risk needs "City, ST" and at least one FIELD=VALUE')
+        set_city_risk(args.set_city_risk[0], args.set_city_risk[1:])
+        return
+
+    options = {
+        "batch_size": args.batch_size,
+        "workers": args.workers,
+        "geocoder_mode": args.geocoder,
+        "zip_centroids_path": args.zip_centroids,
+        "near_duplicate_meters": args.near_duplicate_meters,
+        "metrics_jsonl": args.metrics_jsonl,
+        "metrics_interval": args.metrics_interval,
+        "staged": args.staged,
+    }
+    if len(inputs) > 1 or Path(inputs[0]).is_dir() or any(char in inputs[0] for char in "*?["):
+        if args.start_row is not None or args.max_rows is not None:
+            build_arg_parser().error("start_row and max_rows only apply when loading a single file")
+        load_files(inputs, file_workers=args.file_workers, force=args.force, **options)
+        return
+
+    if args.start_row is not None:
+        print(f"📍 Starting at row {args.start_row}")
+    if args.max_rows is not None:
+        print(f"🔒 Loading maximum {args.max_rows} rows")
     
-    load_csv_into_db(str(csv_path), start_row=start_row, max_rows=max_rows)
+    try:
+        load_csv_into_db(
+            inputs[0],
+            start_row=args.start_row,
+            max_rows=args.max_rows,
+            resume=args.resume,
+            **options,
+        )
+    except LoadError as e:
+        print(f"❌ {str(e)}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Database error: {str(e)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
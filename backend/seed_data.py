@@ -6,8 +6,9 @@ Re-running will clear existing properties and reseed.
 import subprocess
 import sys
 from pathlib import Path
-from app.database import SessionLocal, Base, engine
+from app.database import SessionLocal, engine
 from app.models import User
+from app.schema import upgrade_schema
 from app.core.security import get_password_hash
 
 # Dev account credentials for testing
@@ -46,7 +47,7 @@ def create_dev_user(db):
 
 
 if __name__ == "__main__":
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
     db = SessionLocal()
     create_dev_user(db)
     db.close()
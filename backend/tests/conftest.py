@@ -6,6 +6,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
+from app.config import settings
 from app.database import Base, get_db
 from app.main import app
 from app.core.security import create_access_token
@@ -17,6 +18,14 @@ engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": Fal
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def geocode_cache_path(tmp_path, monkeypatch):
+    """Keep each test's geocode cache in its own temporary directory."""
+    path = tmp_path / "geocode_cache.sqlite3"
+    monkeypatch.setattr(settings, "GEOCODE_CACHE_PATH", str(path))
+    return path
+
+
 @pytest.fixture(scope="function")
 def db():
     """Create a fresh database for each test."""
@@ -0,0 +1,54 @@
+"""
+Tests for the benchmark suite: deterministic inputs, every benchmark runs,
+and regressions against the baselines are caught.
+"""
+import json
+
+from benchmarks import synthetic
+from benchmarks.__main__ import main
+from benchmarks.runner import Result, compare, load_baselines, run, save_baselines
+from benchmarks.suite import BENCHMARKS
+
+
+def test_synthetic_rows_are_deterministic_and_parse():
+    """Row i is the same whatever else is generated, and every row is a valid listing."""
+    assert synthetic.csv_row(41) == list(synthetic.csv_rows(2, start=40))[1]
+    assert synthetic.csv_row(41) != synthetic.csv_row(41, seed=7)
+    assert set(synthetic.csv_row(0)) == set(synthetic.CSV_COLUMNS)
+
+    homes = synthetic.properties(200)
+    assert len(homes) == 200
+    assert len({home.property_type for home in homes}) == 4
+    assert all(home.estimated_rent and home.profitability_score > 0 for home in homes)
+
+
+def test_every_benchmark_runs():
+    """A single short round of each benchmark, so none of them rots."""
+    results = run(rounds=1, min_round_seconds=0.0)
+    assert [result.name for result in results] == sorted(BENCHMARKS)
+    assert all(result.best_us > 0 and result.relative > 0 for result in results)
+
+
+def test_regressions_against_saved_baselines(tmp_path, capsys):
+    """A benchmark slower than its baseline by more than the threshold fails the run."""
+    path = tmp_path / "baselines.json"
+    save_baselines([Result("scoring.estimate_monthly_rent", 100, 1.0, 1.2, 0.004, 10, 1000)], path)
+    baselines = load_baselines(path)
+    assert baselines["scoring.estimate_monthly_rent"]["relative"] == 0.004
+
+    slower = Result("scoring.estimate_monthly_rent", 100, 1.5, 1.6, 0.006, 10, 1000)
+    faster = slower._replace(relative=0.0044)
+    new = slower._replace(name="ingest.parse_csv_row")
+    [regressed, within, unknown] = compare([slower, faster, new], baselines, threshold=0.25)
+    assert (regressed.regressed, round(regressed.change, 2)) == (True, 0.5)
+    assert (within.regressed, round(within.change, 2)) == (False, 0.1)
+    assert (unknown.baseline_us, unknown.change, unknown.regressed) == (None, None, False)
+
+    # Baselines impossible to meet: the CLI reports the regression and exits with 1.
+    data = json.loads(path.read_text())
+    data["benchmarks"]["scoring.estimate_monthly_rent"]["relative"] = 1e-9
+    path.write_text(json.dumps(data))
+    assert main(["-k", "estimate_monthly_rent", "--quick", "--baselines", str(path)]) == 1
+    assert "more than 25% slower" in capsys.readouterr().out
+    assert main(["-k", "estimate_monthly_rent", "--quick", "--baselines", str(path), "--save"]) == 0
+    assert main(["-k", "estimate_monthly_rent", "--quick", "--baselines", str(path), "--threshold", "10"]) == 0
@@ -0,0 +1,227 @@
+"""
+Tests for the shared cache: LRU and Redis-protocol backends (against an
+in-process fake server), generations, stampede protection and the cached
+API routes.
+"""
+import asyncio
+import socketserver
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from app.api.v1 import properties as properties_api
+from app.core import cache as cache_module
+from app.core.cache import (
+    Cache,
+    MemoryBackend,
+    RedisBackend,
+    ReplyError,
+    dump_models,
+    invalidate_listings,
+    load_models,
+)
+from app.models import Favorite, Property, User
+from app.schemas import PropertyResponse
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """The handful of RESP commands the cache uses, over one shared dict."""
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        data, lock = self.server.data, self.server.lock
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            name, args = args[0].upper(), args[1:]
+            with lock:
+                now = time.monotonic()
+                for key in [key for key, (_, expires) in data.items() if expires and expires <= now]:
+                    del data[key]
+                if name == b"GET":
+                    reply = data.get(args[0], (None,))[0]
+                elif name == b"MGET":
+                    reply = [data.get(key, (None,))[0] for key in args]
+                elif name == b"SET":
+                    options = [arg.upper() for arg in args[2:]]
+                    expires = now + int(options[options.index(b"PX") + 1]) / 1000 if b"PX" in options else None
+                    if b"NX" in options and args[0] in data:
+                        reply = None
+                    else:
+                        data[args[0]] = (args[1], expires)
+                        reply = "OK"
+                elif name == b"DEL":
+                    reply = sum(data.pop(key, None) is not None for key in args)
+                elif name == b"INCR":
+                    value = int(data.get(args[0], (b"0",))[0]) + 1
+                    data[args[0]] = (str(value).encode(), None)
+                    reply = value
+                elif name == b"FLUSHDB":
+                    data.clear()
+                    reply = "OK"
+                else:
+                    reply = ReplyError(f"ERR unknown command '{name.decode()}'")
+            self.wfile.write(self.encode(reply))
+
+    def encode(self, reply):
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, ReplyError):
+            return b"-%s\r\n" % str(reply).encode()
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode()
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, list):
+            return b"*%d\r\n" % len(reply) + b"".join(self.encode(item) for item in reply)
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+@pytest.fixture
+def redis_url():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.data, server.lock = {}, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    server.shutdown()
+    server.server_close()
+
+
+def test_memory_lru_evicts_by_size_and_expires():
+    now = [0.0]
+    backend = MemoryBackend(max_bytes=25, clock=lambda: now[0])
+    backend.set("a", b"1" * 9)
+    backend.set("b", b"2" * 9, ttl=5)
+    assert backend.get_many(["a"]) == [b"1" * 9]  # "a" is now the most recently used
+    backend.set("c", b"3" * 9)  # Over 25 bytes: evicts "b", the least recently used
+    assert backend.get_many(["a", "b", "c"]) == [b"1" * 9, None, b"3" * 9]
+
+    assert backend.add("d", b"x", ttl=5) and not backend.add("d", b"y")
+    now[0] = 6.0
+    assert backend.get_many(["d"]) == [None] and backend.add("d", b"z")
+    assert (backend.incr("n"), backend.incr("n")) == (1, 2)
+
+
+def test_redis_backend_generations_and_models(redis_url):
+    backend = RedisBackend(redis_url)
+    backend.set("k", b"\x00value\r\n")
+    assert backend.get_many(["k", "missing"]) == [b"\x00value\r\n", None]
+    assert backend.add("lock", b"t", ttl=0.01) and not backend.add("lock", b"t")
+    time.sleep(0.02)
+    assert backend.add("lock", b"t")
+    with pytest.raises(ReplyError):
+        backend.execute("EVAL", "return 1", 0)
+    assert backend.incr("counter") == 1  # The connection survived the error reply
+
+    # Values built on a generation are unreachable once it is bumped.
+    cache = Cache(backend, prefix="test")
+    homes = cache.namespace("search", generations=("listings",))
+    page = [
+        PropertyResponse(
+            id=number, address=f"{number} Elm St", city="Austin", state="TX", zip_code="78701",
+            price=Decimal("250000.50"), size_sqft=1400, bedrooms=3, bathrooms=2.0, property_type="condo",
+            profitability_score=61.5, created_at="2026-01-02T03:04:05",
+        )
+        for number in (1, 2)
+    ]
+    homes.set("page", dump_models(page))
+    found, data = homes.get("page")
+    assert found and data["fields"][0] == "address" and len(data["rows"]) == 2
+    assert load_models(PropertyResponse, data) == page
+    cache.invalidate("listings")
+    assert homes.get("page") == (False, None)
+    assert homes.full_key("page") == "test:search:g1:page"
+
+
+def test_stampede_computes_once_across_workers(redis_url):
+    """Concurrent misses in two "workers" sharing one server run the computation once."""
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.2)
+        return {"rent": 1850}
+
+    async def burst():
+        workers = [Cache(RedisBackend(redis_url), prefix="w").namespace("analysis") for _ in range(2)]
+        return await asyncio.gather(*(
+            workers[number % 2].get_or_compute("home-7", compute) for number in range(10)
+        ))
+
+    assert asyncio.run(burst()) == [{"rent": 1850}] * 10
+    assert len(calls) == 1
+
+    # A dead server is a cache miss, not an error.
+    down = Cache(RedisBackend("redis://127.0.0.1:1/0"), prefix="w").namespace("analysis")
+    assert asyncio.run(down.get_or_compute("home-7", lambda: {"rent": 1})) == {"rent": 1}
+    assert down.get("home-7") == (False, None)
+
+
+def test_async_callers_use_worker_threads_for_redis(redis_url):
+    """Redis round trips from async code never run on the event loop's thread."""
+    backend = RedisBackend(redis_url)
+    threads = []
+    execute = backend.execute
+    backend.execute = lambda *args: threads.append(threading.current_thread()) or execute(*args)
+    users = Cache(backend, prefix="t").namespace("users")
+
+    async def main():
+        await users.aset("a@example.com", {"id": 1})
+        return await users.aget("a@example.com"), await users.get_or_compute("b", lambda: 2)
+
+    assert asyncio.run(main()) == ((True, {"id": 1}), 2)
+    assert threads and threading.main_thread() not in threads
+
+
+def test_search_and_analysis_are_cached(client, db, monkeypatch, test_user_token):
+    monkeypatch.setattr(cache_module.cache, "backend", MemoryBackend())
+    analyses = []
+    real_analyze = properties_api.analyze_investment
+    monkeypatch.setattr(
+        properties_api, "analyze_investment", lambda *args, **kwargs: analyses.append(1) or real_analyze(*args, **kwargs)
+    )
+    user = User(email="test@example.com", username="testuser")
+    homes = [
+        Property(
+            address=f"{number} Oak Ave", city="Dallas", state="TX", zip_code="75201", price=Decimal("300000"),
+            size_sqft=1500, bedrooms=3, bathrooms=2.0, property_type="single_family",
+            profitability_score=50.0 + number, estimated_rent=Decimal("2400"),
+        )
+        for number in range(3)
+    ]
+    db.add_all([user, *homes])
+    db.commit()
+    db.add(Favorite(user_id=user.id, property_id=homes[0].id))
+    db.commit()
+
+    first = client.get("/api/properties?zip_code=75201").json()
+    assert len(analyses) == 3
+    signed_in = client.get("/api/properties?zip_code=75201", headers={"Authorization": f"Bearer {test_user_token}"})
+    assert len(analyses) == 3  # Served from the cache, with this user's favorites marked
+    assert [home["is_favorited"] for home in signed_in.json()] == [False, False, True]
+    assert [home["cap_rate"] for home in signed_in.json()] == [home["cap_rate"] for home in first]
+
+    invalidate_listings()
+    client.get("/api/properties?zip_code=75201")
+    assert len(analyses) == 6
+
+    url = f"/api/properties/{homes[1].id}/analysis?vacancy_rate=0.1"
+    computed, cached = client.get(url).json(), client.get(url).json()
+    assert computed["metrics"] == cached["metrics"] and len(analyses) == 7
+    assert cached["generated_at"] > computed["generated_at"]  # Stamped per response, not cached
+    assert client.get(f"/api/properties/{homes[1].id}/analysis").status_code == 200
+    assert len(analyses) == 8
@@ -0,0 +1,169 @@
+"""
+Tests for connection handling per deployment mode.
+
+The harness below stands in for a burst of serverless instances: each
+thread is one instance with its own engine (as every Lambda instance has),
+serving a few invocations one after another, all instances at once.
+"""
+import threading
+from types import SimpleNamespace
+import time
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.config import settings
+from app.database import QueryStats, _explain, create_pooled_engine, engine_options, request_sql_stats
+
+
+class ConnectionCounter:
+    """Open DBAPI connections across engines, and the most ever open at once."""
+
+    def __init__(self):
+        self.open = 0
+        self.peak = 0
+        self.connects = 0
+        self._lock = threading.Lock()
+
+    def watch(self, engine):
+        event.listen(engine.pool, "connect", lambda *args: self._change(1))
+        event.listen(engine.pool, "close", lambda *args: self._change(-1))
+
+    def _change(self, delta):
+        with self._lock:
+            self.open += delta
+            self.peak = max(self.peak, self.open)
+            if delta > 0:
+                self.connects += 1
+
+
+def simulate_instances(url, instances, invocations, pause=0.0):
+    counter = ConnectionCounter()
+    start = threading.Barrier(instances)
+    errors = []
+
+    def instance():
+        engine = create_pooled_engine(url, mode="serverless")
+        counter.watch(engine)
+        Session = sessionmaker(bind=engine)
+        try:
+            start.wait()
+            for _ in range(invocations):
+                db = Session()
+                try:
+                    db.execute(text("SELECT 1"))
+                    time.sleep(0.002)  # Hold the connection like a short request
+                finally:
+                    db.close()
+                time.sleep(pause)
+        except Exception as e:  # pragma: no cover - surfaced by the assertion below
+            errors.append(e)
+        finally:
+            engine.dispose()
+
+    threads = [threading.Thread(target=instance) for _ in range(instances)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    return counter
+
+
+def test_serverless_instances_reuse_one_connection_each(tmp_path):
+    """A burst of instances opens at most one connection each, reused across warm invocations."""
+    counter = simulate_instances(f"sqlite:///{tmp_path / 'burst.db'}", instances=16, invocations=5)
+
+    assert counter.peak <= 16
+    assert counter.connects == 16
+    assert counter.open == 0  # Instances that go away take their connections with them
+
+
+def test_serverless_null_pool_holds_no_idle_connections(tmp_path, monkeypatch):
+    """With DB_POOL_SIZE=0 a connection only exists while an invocation uses it."""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 0)
+    url = f"sqlite:///{tmp_path / 'burst.db'}"
+    assert isinstance(create_pooled_engine(url, mode="serverless").pool, NullPool)
+
+    counter = simulate_instances(url, instances=16, invocations=3, pause=0.01)
+
+    assert counter.peak <= 16
+    assert counter.connects == 16 * 3
+
+
+def test_serverless_replaces_idle_connections(tmp_path, monkeypatch):
+    """A connection left idle longer than DB_POOL_IDLE_SECONDS is replaced before reuse."""
+    monkeypatch.setattr(settings, "DB_POOL_IDLE_SECONDS", 0.05)
+    counter = simulate_instances(f"sqlite:///{tmp_path / 'idle.db'}", instances=2, invocations=3, pause=0.1)
+
+    assert counter.connects == 2 * 3
+    assert counter.peak <= 2
+
+
+def test_engine_options_per_mode(monkeypatch):
+    """Pool sizes follow the deployment mode; PgBouncer mode turns off server-side prepares."""
+    server = engine_options("postgresql://db/rentiq", mode="server")
+    assert issubclass(server["poolclass"], QueuePool)
+    assert (server["pool_size"], server["max_overflow"]) == (10, 20)
+    serverless = engine_options("postgresql://db/rentiq", mode="serverless")
+    assert (serverless["pool_size"], serverless["max_overflow"]) == (1, 2)
+    assert serverless["pool_recycle"] == settings.DB_POOL_RECYCLE_SECONDS
+
+    monkeypatch.setattr(settings, "DB_PGBOUNCER", True)
+    assert engine_options("postgresql+psycopg://db/rentiq", mode="serverless")["connect_args"] == {
+        "prepare_threshold": None
+    }
+    assert engine_options("postgresql+psycopg2://db/rentiq", mode="serverless")["connect_args"] == {}
+
+    with pytest.raises(ValueError):
+        engine_options("postgresql://db/rentiq", mode="lambda")
+
+
+def test_request_stats_count_statements_and_pool_waits(tmp_path):
+    """A statement that raises is not counted and does not skew the next one's timing."""
+    engine = create_pooled_engine(f"sqlite:///{tmp_path / 'stats.db'}", mode="server")
+    stats = QueryStats()
+    token = request_sql_stats.set(stats)
+    try:
+        with engine.connect() as connection:
+            with pytest.raises(Exception):
+                connection.execute(text("SELECT * FROM missing_table"))
+            connection.execute(text("SELECT 1"))
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 2"))
+    finally:
+        request_sql_stats.reset(token)
+        engine.dispose()
+    assert stats.queries == 2
+    assert 0 < stats.db_seconds < 1
+    assert stats.pool_wait_seconds > 0
+
+
+class RecordingCursor:
+    """DBAPI cursor that records statements and fails the EXPLAIN."""
+
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement.split(" SELECT")[0])
+        if statement.startswith("EXPLAIN"):
+            raise RuntimeError("could not bind parameter")
+
+    def close(self):
+        pass
+
+
+def test_failed_explain_rolls_back_to_its_savepoint():
+    """On PostgreSQL a failed EXPLAIN must not leave the request's transaction aborted."""
+    executed = []
+    dbapi_connection = SimpleNamespace(cursor=lambda: RecordingCursor(executed))
+    connection = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        connection=SimpleNamespace(dbapi_connection=dbapi_connection),
+    )
+    plan = _explain(connection, "SELECT * FROM properties WHERE id = %(id)s", {})
+    assert plan == "(EXPLAIN failed: could not bind parameter)"
+    assert executed == ["SAVEPOINT slow_query_explain", "EXPLAIN", "ROLLBACK TO SAVEPOINT slow_query_explain"]
@@ -0,0 +1,118 @@
+"""
+Tests for the loader's reverse geocoder against a local fake Nominatim server.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.ingest import BlockingGeocoder
+
+
+class FakeNominatimHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    fail_next = 0
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        FakeNominatimHandler.requests_seen.append(query)
+        if FakeNominatimHandler.fail_next > 0:
+            FakeNominatimHandler.fail_next -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        body = json.dumps({
+            "display_name": f"{query['lat'][0]}, {query['lon'][0]}, Testville",
+            "address": {"postcode": "75201-1234"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_geocoder_url():
+    FakeNominatimHandler.requests_seen = []
+    FakeNominatimHandler.fail_next = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeNominatimHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/reverse"
+    server.shutdown()
+    server.server_close()
+
+
+def make_geocoder(url, cache_path):
+    return BlockingGeocoder(
+        cache_path=str(cache_path),
+        base_url=url,
+        rate_limit=0,
+        backoff_seconds=0.01,
+    )
+
+
+def test_reverse_many_dedupes_and_persists(fake_geocoder_url, tmp_path):
+    """Repeated and rerun coordinates are served from the SQLite cache."""
+    cache_path = tmp_path / "geocode.sqlite3"
+    coords = [(32.7767, -96.797), (32.7767, -96.797), (30.2672, -97.7431)]
+
+    with make_geocoder(fake_geocoder_url, cache_path) as geocoder:
+        results = geocoder.reverse_many(coords)
+    assert len(FakeNominatimHandler.requests_seen) == 2
+    assert results[(32.7767, -96.797)]["zip_code"] == "75201-1234"
+
+    # A new process (new geocoder) hits the cache, including for coordinates
+    # that only differ past the cache precision.
+    with make_geocoder(fake_geocoder_url, cache_path) as geocoder:
+        result = geocoder.reverse(32.7767000001, -96.7970000001)
+        assert geocoder.stats["cache_hits"] == 1
+    assert len(FakeNominatimHandler.requests_seen) == 2
+    assert result["address"].endswith("Testville")
+
+
+def test_reverse_retries_transient_errors(fake_geocoder_url, tmp_path):
+    """503 responses are retried with backoff and the eventual answer is cached."""
+    FakeNominatimHandler.fail_next = 2
+    cache_path = tmp_path / "rentiq" / "geocode.sqlite3"  # Missing directories are created
+
+    with make_geocoder(fake_geocoder_url, cache_path) as geocoder:
+        result = geocoder.reverse(40.7128, -74.006)
+        assert geocoder.stats["retries"] == 2
+
+    assert result is not None
+    assert len(FakeNominatimHandler.requests_seen) == 3
+    assert cache_path.exists()
+
+
+def write_centroids(path):
+    path.write_text(
+        "zip,lat,lng,city,state\n"
+        "75201,32.7876,-96.7994,Dallas,TX\n"
+        "78701,30.2711,-97.7437,Austin,TX\n"
+        "80202,39.7525,-104.9995,Denver,CO\n"
+    )
+    return path
+
+
+@pytest.mark.parametrize("use_kdtree", [True, False])
+def test_zip_centroid_index_batch_lookup(tmp_path, use_kdtree):
+    """Offline lookups resolve a whole batch to the nearest ZIP, city and state."""
+    from app.ingest import ZipCentroidIndex
+
+    index = ZipCentroidIndex.from_csv(
+        str(write_centroids(tmp_path / "zips.csv")), max_distance_km=50, use_kdtree=use_kdtree
+    )
+    results = index.reverse_many([(32.80, -96.81), (30.30, -97.70), (47.60, -122.33)])
+
+    assert results[(32.80, -96.81)] == {"address": None, "zip_code": "75201", "city": "Dallas", "state": "TX"}
+    assert results[(30.30, -97.70)]["zip_code"] == "78701"
+    assert results[(47.60, -122.33)] is None  # Seattle is far from every centroid
+    assert index.stats == {"resolved": 2, "unmatched": 1}
@@ -0,0 +1,132 @@
+"""
+Tests for background jobs and the admin job API.
+"""
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+
+from app.config import settings
+from app.ingest import loader
+from app.jobs import JOB_HANDLERS, JobRunner
+from app.jobs.runner import utcnow
+from app.jobs.tasks import run_load
+from app.models import Job, Property, User
+from tests.conftest import TestingSessionLocal, engine
+from tests.test_loader import make_row, write_csv
+
+
+@pytest.fixture
+def admin_headers(db, monkeypatch, test_user_token):
+    db.add(User(email="test@example.com", username="testuser"))
+    db.commit()
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["test@example.com"])
+    return {"Authorization": f"Bearer {test_user_token}"}
+
+
+@pytest.fixture
+def job_loader(db, monkeypatch, tmp_path):
+    """Loader on the test database, importing from tmp_path."""
+    monkeypatch.setattr(loader, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(loader, "engine", engine)
+    monkeypatch.setattr(settings, "JOB_IMPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def run_until_idle(runner, timeout=20.0):
+    """Run the runner until no job is queued or running."""
+    async def main():
+        await runner.start()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            with TestingSessionLocal() as db:
+                if not db.query(Job).filter(Job.status.in_(("queued", "running"))).count():
+                    break
+        await runner.stop()
+
+    asyncio.run(main())
+
+
+def test_load_job_reports_progress_and_resumes_after_cancel(client, db, admin_headers, job_loader, monkeypatch):
+    """A load job runs off the request path, can be cancelled mid-file and resumed from its checkpoint."""
+    write_csv(job_loader / "homes.csv", [make_row(i) for i in range(12)])
+
+    response = client.post(
+        "/api/admin/jobs", json={"kind": "load", "params": {"path": "homes.csv", "batch_size": 5, "geocoder_mode": "off"}},
+        headers=admin_headers,
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "queued"
+
+    def load_then_cancel(context, **params):
+        """Cancel through the API as soon as the first batch is committed."""
+        report = context.report
+
+        def report_and_cancel(counters):
+            client.post(f"/api/admin/jobs/{job_id}/cancel", headers=admin_headers)
+            context.sync()  # Pick the cancellation up right away
+            return report(counters)
+
+        context.report = report_and_cancel
+        return run_load(context, **params)
+
+    monkeypatch.setitem(JOB_HANDLERS, "load", load_then_cancel)
+    run_until_idle(JobRunner(TestingSessionLocal, workers=1, poll_seconds=0.05))
+
+    job = client.get(f"/api/admin/jobs/{job_id}", headers=admin_headers).json()
+    assert job["status"] == "cancelled"
+    assert job["progress"]["loaded"] == 5
+    assert db.query(Property).count() == 5
+
+    monkeypatch.setitem(JOB_HANDLERS, "load", run_load)
+    assert client.post(f"/api/admin/jobs/{job_id}/resume", headers=admin_headers).json()["status"] == "queued"
+    run_until_idle(JobRunner(TestingSessionLocal, workers=1, poll_seconds=0.05))
+
+    job = client.get(f"/api/admin/jobs/{job_id}", headers=admin_headers).json()
+    assert (job["status"], job["attempts"], job["result"]["loaded"]) == ("succeeded", 2, 12)
+    db.expire_all()
+    assert db.query(Property).count() == 12
+
+    events = client.get(f"/api/admin/jobs/{job_id}/events", headers=admin_headers)
+    assert events.headers["content-type"].startswith("text/event-stream")
+    payloads = [json.loads(line[len("data: "):]) for line in events.text.splitlines() if line.startswith("data: ")]
+    assert payloads[-1]["status"] == "succeeded"
+
+
+def test_job_api_rejects_bad_jobs(client, admin_headers, job_loader):
+    """Unknown kinds, unknown parameters and paths outside JOB_IMPORT_DIR are refused."""
+    assert client.post("/api/admin/jobs", json={"kind": "vacuum"}, headers=admin_headers).status_code == 400
+    bad_params = {"kind": "rescore", "params": {"batch": 5}}
+    assert client.post("/api/admin/jobs", json=bad_params, headers=admin_headers).status_code == 400
+
+    outside = {"kind": "load", "params": {"path": "../../etc/passwd"}}
+    job_id = client.post("/api/admin/jobs", json=outside, headers=admin_headers).json()["id"]
+    run_until_idle(JobRunner(TestingSessionLocal, workers=1, poll_seconds=0.05))
+    job = client.get(f"/api/admin/jobs/{job_id}", headers=admin_headers).json()
+    assert job["status"] == "failed" and "outside JOB_IMPORT_DIR" in job["error"]
+    assert client.post(f"/api/admin/jobs/{job_id}/cancel", headers=admin_headers).status_code == 409
+
+
+def test_runner_requeues_stale_jobs_and_schedules_periodic_ones(db):
+    """Jobs of a runner that died are picked up again, up to max_attempts; periodic jobs are queued once per interval."""
+    stale = utcnow() - timedelta(minutes=10)
+    db.add(Job(kind="analyze", params={}, status="running", worker="gone:1", attempts=1, heartbeat_at=stale))
+    db.add(Job(kind="load", params={"path": "x.csv"}, status="running", worker="gone:2", attempts=3, heartbeat_at=stale))
+    db.commit()
+
+    runner = JobRunner(TestingSessionLocal, workers=2, poll_seconds=0.05, stale_seconds=60, max_attempts=3)
+    runner.schedule("rescore", 3600)
+    run_until_idle(runner)
+    run_until_idle(runner)  # Within the interval: not queued again
+
+    db.expire_all()
+    jobs = {job.kind: job for job in db.query(Job).all()}
+    assert db.query(Job).count() == 3
+    assert (jobs["load"].status, jobs["load"].attempts) == ("failed", 3)
+    assert (jobs["analyze"].status, jobs["analyze"].attempts, jobs["analyze"].result) == ("succeeded", 2, {"tables": 4})
+    assert (jobs["rescore"].status, jobs["rescore"].created_by) == ("succeeded", "scheduler")
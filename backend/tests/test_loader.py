@@ -0,0 +1,515 @@
+"""
+Tests for the CSV loader (app/ingest/loader.py and the load_csv_data.py CLI).
+"""
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import threading
+from pathlib import Path
+
+import pytest
+
+import load_csv_data
+from app.ingest import loader
+from app.config import settings
+from app.core.scoring import calculate_macro_points, combine_score
+from app.ingest.bulk import encode_copy_rows
+from app.ingest.city_risk import update_city_risk
+from app.ingest.macro import update_macro_indicators
+from app.ingest.rescoring import rescore_homes
+from app.ingest.staging import publish_staged
+from app.models import CityRisk, CityRiskStaging, LoadCheckpoint, LoadManifest, LoadRowOffset, MacroIndicator, Property, PropertyPriceHistory, PropertyStaging
+from tests.conftest import TestingSessionLocal, engine
+from tests.test_geocoding import fake_geocoder_url  # noqa: F401 (fixture)
+
+
+CSV_COLUMNS = [
+    "city", "state", "price", "livingArea", "num_bedrooms.x", "num_full_baths.x",
+    "num_half_baths", "num_three_quarter_baths", "property_type", "yearBuilt.x",
+    "latitude", "longitude", "zip_code", "searchStatus",
+    "lagged_CPI", "fed_rate", "lagged_unemployment", "volatility_value", "nr_weeks",
+    "violent_crime", "property_crime", "days_on_market", "isHot",
+]
+
+
+def make_row(i, **overrides):
+    row = {
+        "city": "Dallas",
+        "state": "TX",
+        "price": str(200000 + i * 1000),
+        "livingArea": "1500",
+        "num_bedrooms.x": "3",
+        "num_full_baths.x": "2",
+        "num_half_baths": "0",
+        "num_three_quarter_baths": "0",
+        "property_type": "Single Family Residential",
+        "yearBuilt.x": "2001",
+        "latitude": f"{32.7 + i * 0.001:.6f}",
+        "longitude": f"{-96.8 - i * 0.001:.6f}",
+        "zip_code": "75201",
+        "searchStatus": "ACTIVE",
+    }
+    row.update(overrides)
+    return row
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+@pytest.fixture
+def loader_db(db, monkeypatch):
+    """Point the loader (and the CLI's multi-file loads) at the test database."""
+    for module in (loader, load_csv_data):
+        monkeypatch.setattr(module, "SessionLocal", TestingSessionLocal)
+        monkeypatch.setattr(module, "engine", engine)
+    return db
+
+
+def test_load_inserts_in_batches_and_skips_duplicates(loader_db, tmp_path):
+    """Rows are bulk inserted across several batches; reruns insert nothing new."""
+    csv_path = write_csv(tmp_path / "homes.csv", [make_row(i) for i in range(12)] + [make_row(3)])
+
+    loader.load_csv_into_db(csv_path, batch_size=5, geocoder_mode="off")
+    assert loader_db.query(Property).count() == 12
+
+    loader.load_csv_into_db(csv_path, batch_size=5, geocoder_mode="off")
+    assert loader_db.query(Property).count() == 12
+
+    home = loader_db.query(Property).filter(Property.price == 203000).one()
+    assert home.address == "Dallas, TX"
+    assert home.created_at is not None
+    assert home.profitability_score > 0
+
+
+def test_unreadable_input_raises_load_error(loader_db, tmp_path):
+    """The loader core raises instead of exiting; only the CLI prints and exits."""
+    with pytest.raises(loader.LoadError, match="not found"):
+        loader.load_csv_into_db(str(tmp_path / "missing.csv"), geocoder_mode="off")
+    (tmp_path / "empty.csv").write_text("")
+    with pytest.raises(loader.LoadError, match="no headers"):
+        loader.load_csv_into_db(str(tmp_path / "empty.csv"), geocoder_mode="off")
+
+
+def test_existing_rows_are_backfilled_and_deduped_in_db(loader_db, tmp_path):
+    """Rows stored without hashes get them on the next load and block re-inserts."""
+    row = make_row(0)
+    loader_db.add(Property(
+        address="Dallas, TX", city="Dallas", state="TX", zip_code="75201",
+        price=200000, size_sqft=1500, bedrooms=3, bathrooms=2.0,
+        property_type="single_family", profitability_score=50.0,
+        lat=float(row["latitude"]), lng=float(row["longitude"]),
+    ))
+    loader_db.commit()
+
+    # Same coordinates at a different price is still the same home.
+    csv_path = write_csv(tmp_path / "homes.csv", [make_row(0, price="250000"), make_row(1)])
+    loader.load_csv_into_db(csv_path, geocoder_mode="off")
+
+    loader_db.expire_all()
+    homes = loader_db.query(Property).order_by(Property.id).all()
+    assert len(homes) == 2
+    assert all(home.dedupe_hash and home.location_hash for home in homes)
+
+
+def test_interrupted_load_resumes_from_checkpoint(loader_db, tmp_path, monkeypatch):
+    """A crash keeps the last committed checkpoint; --resume seeks past it."""
+    csv_path = write_csv(tmp_path / "homes.csv", [make_row(i) for i in range(30)])
+    real_insert = loader.bulk_insert_properties
+    calls = []
+
+    def failing_insert(connection, rows, **kwargs):
+        calls.append(len(rows))
+        if len(calls) == 3:
+            raise RuntimeError("connection lost")
+        return real_insert(connection, rows, **kwargs)
+
+    monkeypatch.setattr(loader, "bulk_insert_properties", failing_insert)
+    with pytest.raises(RuntimeError, match="connection lost"):
+        loader.load_csv_into_db(csv_path, batch_size=10, geocoder_mode="off")
+
+    checkpoint = loader_db.query(LoadCheckpoint).one()
+    assert (checkpoint.row_num, checkpoint.loaded_count, checkpoint.status) == (21, 20, "running")
+    assert loader_db.query(Property).count() == 20
+
+    monkeypatch.setattr(loader, "bulk_insert_properties", real_insert)
+    calls.clear()
+    loader.load_csv_into_db(csv_path, batch_size=10, geocoder_mode="off", resume=True)
+
+    loader_db.expire_all()
+    assert loader_db.query(Property).count() == 30
+    assert (checkpoint.row_num, checkpoint.loaded_count, checkpoint.duplicate_count) == (31, 30, 0)
+    assert checkpoint.status == "complete"
+
+
+def test_start_row_seeks_through_sparse_offset_index(loader_db, tmp_path, monkeypatch):
+    """Offsets recorded on one pass let a later start_row seek next to its row."""
+    monkeypatch.setattr(loader, "ROW_INDEX_INTERVAL", 5)
+    # Multiline quoted values must not throw offsets off.
+    rows = [make_row(i, city='Dallas "Uptown"\nNorth') for i in range(20)]
+    csv_path = write_csv(tmp_path / "homes.csv", rows)
+
+    loader.load_csv_into_db(csv_path, geocoder_mode="off", max_rows=12)
+    marks = dict(loader_db.query(LoadRowOffset.row_num, LoadRowOffset.byte_offset))
+    assert {5, 10} <= set(marks)
+    with open(csv_path, "rb") as f:
+        f.seek(marks[10])
+        assert b"208000" in f.read(120)  # Row 10 is the 9th data row
+
+    skip_starts = []
+    real_skip_to = loader.OffsetCSVReader.skip_to
+
+    def recording_skip_to(reader, row_num):
+        skip_starts.append(reader.next_row_num)
+        real_skip_to(reader, row_num)
+
+    monkeypatch.setattr(loader.OffsetCSVReader, "skip_to", recording_skip_to)
+    loader.load_csv_into_db(csv_path, geocoder_mode="off", start_row=12, max_rows=3)
+
+    assert skip_starts == [10]
+    prices = sorted(int(home.price) for home in loader_db.query(Property))
+    assert prices == [200000 + i * 1000 for i in range(14)]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "bzip2", "xz", "zstd"])
+def test_load_streams_compressed_input(loader_db, tmp_path, compression):
+    """Compressed feeds are detected by content and loaded without unpacking to disk."""
+    plain = tmp_path / "homes.csv"
+    write_csv(plain, [make_row(i) for i in range(8)])
+    data = plain.read_bytes()
+    if compression == "zstd":
+        zstandard = pytest.importorskip("zstandard")
+        packed = zstandard.ZstdCompressor().compress(data)
+    else:
+        packed = {"gzip": gzip.compress, "bzip2": bz2.compress, "xz": lzma.compress}[compression](data)
+    packed_path = tmp_path / "homes.csv.packed"
+    packed_path.write_bytes(packed)
+
+    loader.load_csv_into_db(str(packed_path), geocoder_mode="off", start_row=3)
+
+    prices = sorted(int(home.price) for home in loader_db.query(Property))
+    assert prices == [200000 + i * 1000 for i in range(2, 8)]
+
+
+def test_directory_load_skips_files_already_in_manifest(loader_db, tmp_path):
+    """Each file's content hash is recorded; renamed copies and reruns are skipped."""
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    write_csv(drop / "tx.csv", [make_row(i) for i in range(5)])
+    write_csv(drop / "ok.csv", [make_row(i, state="OK") for i in range(3, 8)])  # Overlaps tx.csv on location
+    (drop / "tx_resent.csv").write_bytes((drop / "tx.csv").read_bytes())
+    (drop / "notes.txt").write_text("not a feed")
+
+    results = load_csv_data.load_files([str(drop)], geocoder_mode="off")
+
+    assert {Path(r["path"]).name: r["status"] for r in results} == {
+        "ok.csv": "loaded", "tx.csv": "loaded", "tx_resent.csv": "skipped",
+    }
+    assert loader_db.query(Property).count() == 8
+    assert loader_db.query(LoadManifest).filter(LoadManifest.status == "complete").count() == 2
+
+    rerun = load_csv_data.load_files([str(drop / "*.csv")], geocoder_mode="off")
+    assert [r["status"] for r in rerun] == ["skipped"] * 3
+
+
+def test_relisted_home_updates_price_and_appends_history(loader_db, tmp_path):
+    """A known home at a new price is updated in place instead of inserted again."""
+    first = write_csv(tmp_path / "day1.csv", [make_row(0), make_row(1)])
+    loader.load_csv_into_db(first, geocoder_mode="off")
+    home = loader_db.query(Property).filter(Property.price == 200000).one()
+    original_rent = home.estimated_rent
+
+    second = write_csv(tmp_path / "day2.csv", [
+        make_row(0, price="180000", searchStatus="PENDING"),
+        make_row(1),  # Unchanged
+        make_row(0, price="175000", searchStatus="PENDING"),  # Dropped again in the same file
+    ])
+    counts = loader.load_csv_into_db(second, geocoder_mode="off")
+
+    assert counts == {"loaded": 0, "updated": 2, "duplicate": 1, "skipped": 0}
+    loader_db.expire_all()
+    assert loader_db.query(Property).count() == 2
+    assert home.price == 175000
+    assert home.estimated_rent < original_rent  # Rent and score are re-derived from the new price
+    history = (
+        loader_db.query(PropertyPriceHistory.price, PropertyPriceHistory.status)
+        .filter(PropertyPriceHistory.property_id == home.id)
+        .order_by(PropertyPriceHistory.id)
+        .all()
+    )
+    assert [(int(price), status) for price, status in history] == [
+        (200000, "ACTIVE"), (180000, "PENDING"), (175000, "PENDING"),
+    ]
+
+    # Reloading the old file is a price change back, not a new home.
+    loader.load_csv_into_db(first, geocoder_mode="off")
+    assert loader_db.query(Property).count() == 2
+    assert loader_db.query(PropertyPriceHistory).count() == 5
+
+
+class StreetGeocoder:
+    """Stands in for Nominatim: every coordinate resolves to the same street address."""
+
+    stats = {}
+
+    def reverse_many(self, coordinates):
+        return {coords: {"address": "100 Elm St, Dallas, TX", "zip_code": "75201"} for coords in coordinates}
+
+    def close(self):
+        pass
+
+
+def test_online_loads_run_on_any_thread(loader_db, tmp_path, monkeypatch, fake_geocoder_url):
+    """Each load opens its own geocoder, so loads on different threads (jobs) never share one."""
+    monkeypatch.setattr(settings, "GEOCODER_URL", fake_geocoder_url)
+    monkeypatch.setattr(settings, "GEOCODER_RATE_LIMIT_PER_SEC", 0)
+    errors = []
+
+    def load(path):
+        try:
+            loader.load_csv_into_db(path, geocoder_mode="online")
+        except BaseException as e:
+            errors.append(e)
+
+    for day in range(2):
+        thread = threading.Thread(target=load, args=(write_csv(tmp_path / f"day{day}.csv", [make_row(day)]),))
+        thread.start()
+        thread.join()
+    assert errors == []
+    assert loader_db.query(Property).count() == 2
+
+
+def test_nearby_relisting_matches_known_home(loader_db, tmp_path, monkeypatch):
+    """A listing a few meters off a stored home's coordinates is the same home, not a new one."""
+    monkeypatch.setattr(loader, "BlockingGeocoder", StreetGeocoder)
+    loader.load_csv_into_db(write_csv(tmp_path / "day1.csv", [make_row(0), make_row(1)]), geocoder_mode="online")
+    home = loader_db.query(Property).filter(Property.price == 200000).one()
+    assert home.geo_cell is not None
+
+    moved = write_csv(tmp_path / "day2.csv", [
+        make_row(0, price="190000", latitude="32.700030", longitude="-96.800040"),  # ~5 m away
+        make_row(1, latitude="32.701030", **{"num_bedrooms.x": "4"}),  # Close, but a different unit
+    ])
+    counts = loader.load_csv_into_db(moved, geocoder_mode="online")
+
+    assert counts == {"loaded": 1, "updated": 1, "duplicate": 0, "skipped": 0}
+    loader_db.expire_all()
+    assert home.price == 190000
+    assert loader_db.query(Property).count() == 3
+
+    counts = loader.load_csv_into_db(
+        write_csv(tmp_path / "day3.csv", [make_row(0, latitude="32.700020")]),
+        geocoder_mode="online",
+        near_duplicate_meters=0,
+    )
+    assert counts["loaded"] == 1
+
+    # Without a street address ("Dallas, TX" for every home) nearby listings stay separate homes.
+    counts = loader.load_csv_into_db(
+        write_csv(tmp_path / "day4.csv", [make_row(0, price="185000", latitude="32.700010")]), geocoder_mode="off"
+    )
+    assert counts["loaded"] == 1
+
+
+def test_load_writes_stage_metrics_jsonl(loader_db, tmp_path):
+    """--metrics-jsonl gets a summary with per-stage timings and the run's counters."""
+    csv_path = write_csv(tmp_path / "homes.csv", [make_row(i) for i in range(12)] + [make_row(3)])
+    metrics_path = tmp_path / "metrics.jsonl"
+
+    loader.load_csv_into_db(
+        csv_path, batch_size=5, geocoder_mode="off", metrics_jsonl=str(metrics_path), metrics_interval=0
+    )
+
+    records = [json.loads(line) for line in metrics_path.read_text().splitlines()]
+    assert [r["event"] for r in records[:-1]] == ["progress"] * (len(records) - 1)
+    summary = records[-1]
+    assert summary["event"] == "summary"
+    assert summary["counters"]["loaded"] == 12
+    assert summary["counters"]["processed"] == 13
+    stages = summary["stages"]
+    assert {"read", "parse", "dedupe", "route", "insert", "price_tracking", "commit"} <= set(stages)
+    assert stages["insert"]["rows"] == 12
+    assert stages["read"]["row_us_p50"] <= stages["read"]["row_us_p95"]
+    assert stages["commit"]["calls"] == len(records) - 1  # A progress record after every committed batch
+    # Nested stages are not double counted.
+    assert sum(stage["seconds"] for stage in stages.values()) <= summary["elapsed_seconds"]
+
+
+def test_staged_load_publishes_in_one_step(loader_db, tmp_path):
+    """A staged import leaves live tables alone until it is published."""
+    loader.load_csv_into_db(write_csv(tmp_path / "day1.csv", [make_row(0), make_row(1)]), geocoder_mode="off")
+    home = loader_db.query(Property).filter(Property.price == 200000).one()
+
+    second = write_csv(tmp_path / "day2.csv", [
+        make_row(0, price="180000"),
+        make_row(1),  # Unchanged
+        make_row(2),
+        make_row(3),
+        make_row(3, price="150000"),  # New home relisted within the import
+    ])
+    counts = loader.load_csv_into_db(second, batch_size=2, geocoder_mode="off", staged=True, publish=False)
+
+    assert counts == {"loaded": 2, "updated": 2, "duplicate": 1, "skipped": 0}
+    loader_db.expire_all()
+    assert loader_db.query(Property).count() == 2
+    assert home.price == 200000
+    assert loader_db.query(PropertyPriceHistory).count() == 2
+    assert loader_db.query(LoadCheckpoint).filter(LoadCheckpoint.status == "staged").count() == 1
+
+    with engine.begin() as connection:
+        published = publish_staged(connection)
+
+    assert published == {"inserted": 2, "updated": 1, "history": 4, "rescored": 0}
+    loader_db.expire_all()
+    assert loader_db.query(Property).count() == 4
+    assert home.price == 180000
+    relisted = loader_db.query(Property).filter(Property.price == 150000).one()
+    assert [int(entry.price) for entry in relisted.price_history] == [203000, 150000]
+    assert loader_db.query(PropertyStaging).count() == 0
+    assert loader_db.query(LoadCheckpoint).filter(LoadCheckpoint.status == "staged").count() == 0
+
+
+def test_staged_load_stages_crime_figures_until_publish(loader_db, tmp_path):
+    """New crime figures in a staged import leave live rows and scores alone until it is published."""
+    crime = {"violent_crime": "600", "property_crime": "3000", "yearBuilt.x": "1950"}
+    loader.load_csv_into_db(
+        write_csv(tmp_path / "day1.csv", [make_row(i, price=str(600000 + i * 1000), **crime) for i in range(2)]),
+        geocoder_mode="off",
+    )
+    homes = loader_db.query(Property).order_by(Property.id).all()
+    before = [home.profitability_score for home in homes]
+
+    safer = {**crime, "violent_crime": "100"}
+    second = write_csv(tmp_path / "day2.csv", [make_row(0, price="600000", **safer), make_row(2, price="602000", **safer)])
+    loader.load_csv_into_db(second, geocoder_mode="off", staged=True, publish=False)
+
+    loader_db.expire_all()
+    dallas = loader_db.query(CityRisk).one()
+    assert dallas.violent_crime == 600
+    assert [home.profitability_score for home in homes] == before
+    assert loader_db.query(CityRiskStaging).one().violent_crime == 100
+
+    with engine.begin() as connection:
+        published = publish_staged(connection)
+
+    assert (published["inserted"], published["rescored"]) == (1, 2)
+    loader_db.expire_all()
+    assert dallas.violent_crime == 100
+    assert all(home.profitability_score > score for home, score in zip(homes, before))
+    new_home = loader_db.query(Property).filter(Property.price == 602000).one()
+    assert new_home.profitability_score == combine_score(new_home.score_base, dallas.crime_points)
+    assert loader_db.query(CityRiskStaging).count() == 0
+
+
+def test_macro_indicators_are_stored_once_and_rescore_homes(loader_db, tmp_path):
+    """Homes link to one indicator row per state; a rate move rescores only the homes it affects."""
+    macro = {"lagged_CPI": "3.1", "fed_rate": "3.5", "lagged_unemployment": "4.0", "volatility_value": "20", "nr_weeks": "4"}
+    macro["yearBuilt.x"] = "1950"  # Keeps scores clear of the 100 cap
+    rows = [make_row(i, price=str(600000 + i * 1000), **macro) for i in range(4)]
+    rows.append(make_row(9, price="600000", state="OK", city="Tulsa", **macro))
+    loader.load_csv_into_db(write_csv(tmp_path / "homes.csv", rows), geocoder_mode="off")
+
+    indicators = loader_db.query(MacroIndicator).order_by(MacroIndicator.region).all()
+    assert [indicator.region for indicator in indicators] == ["OK", "TX"]
+    texas = indicators[1]
+    homes = loader_db.query(Property).filter(Property.state == "TX").all()
+    assert len(homes) == 4 and all(home.macro_indicator_id == texas.id for home in homes)
+    before = {home.id: home.profitability_score for home in homes}
+    points = calculate_macro_points(3.1, 3.5, 4.0, 20, 4)
+    assert all(abs(home.profitability_score - combine_score(home.score_base, points)) < 0.01 for home in homes)
+
+    with engine.begin() as connection:
+        # Same fed-rate bucket: indicator values change, no home is rewritten.
+        assert update_macro_indicators(connection, {"fed_rate": 3.9}, region="tx")["rescored"] == 0
+        result = update_macro_indicators(connection, {"fed_rate": 7.0}, region="TX")
+    assert result == {"indicators": 1, "rescored": 4}
+
+    loader_db.expire_all()
+    drop = points - calculate_macro_points(3.1, 7.0, 4.0, 20, 4)
+    for home in homes:
+        assert abs(home.profitability_score - (before[home.id] - drop)) < 0.01
+    tulsa = loader_db.query(Property).filter(Property.state == "OK").one()
+    assert tulsa.profitability_score == combine_score(tulsa.score_base, points)
+
+    with pytest.raises(ValueError):
+        with engine.begin() as connection:
+            update_macro_indicators(connection, {"mortgage_rate": 6.0})
+
+
+def test_city_risk_is_stored_per_city_and_rescores_one_city(loader_db, tmp_path):
+    """Crime metrics land in city_risk once per city; updating a city rescores only its homes."""
+    crime = {"violent_crime": "600", "property_crime": "3000", "yearBuilt.x": "1950"}
+    rows = [make_row(i, price=str(600000 + i * 1000), **crime) for i in range(3)]
+    rows.append(make_row(3, price="603000", violent_crime="900", property_crime="3000"))  # Disagrees with Dallas
+    rows.append(make_row(9, price="600000", city="Tulsa", state="OK", **crime))
+    loader.load_csv_into_db(write_csv(tmp_path / "homes.csv", rows), geocoder_mode="off")
+
+    cities = loader_db.query(CityRisk).order_by(CityRisk.city).all()
+    assert [(risk.city, risk.state) for risk in cities] == [("Dallas", "TX"), ("Tulsa", "OK")]
+    dallas = cities[0]
+    assert 0 < dallas.risk <= 100 and dallas.crime_points < 0
+    homes = loader_db.query(Property).order_by(Property.id).all()
+    # The home whose figures disagree is scored with its city's row, like the others.
+    assert [home.city_risk_id for home in homes] == [dallas.id] * 4 + [cities[1].id]
+    assert homes[3].profitability_score == combine_score(homes[3].score_base, dallas.crime_points)
+    before = [home.profitability_score for home in homes]
+    with engine.begin() as connection:
+        # Stored scores already equal score_base + linked points.
+        assert rescore_homes(connection) == 0
+        result = update_city_risk(connection, "dallas", "tx", {"violent_crime": 100.0})
+    assert result == {"cities": 1, "rescored": 4}
+
+    loader_db.expire_all()
+    assert all(home.profitability_score > score for home, score in zip(homes[:4], before))
+    assert homes[4].profitability_score == before[4]
+    assert loader_db.query(CityRisk).filter(CityRisk.city == "Dallas").one().violent_crime == 100.0
+    with engine.begin() as connection:
+        assert update_city_risk(connection, "Austin", "TX", {"violent_crime": 1.0}) == {"cities": 0, "rescored": 0}
+
+
+def test_recalculate_keeps_score_base_and_linked_points(loader_db, tmp_path):
+    """--recalculate recombines stored bases with linked points; it only computes missing bases."""
+    macro = {"lagged_CPI": "3.1", "fed_rate": "3.5", "lagged_unemployment": "4.0", "volatility_value": "20", "nr_weeks": "4"}
+    rows = [make_row(i, price=str(600000 + i * 1000), days_on_market="3", isHot="true", **macro) for i in range(3)]
+    loader.load_csv_into_db(write_csv(tmp_path / "homes.csv", rows), geocoder_mode="off")
+    homes = loader_db.query(Property).order_by(Property.id).all()
+    bases = [home.score_base for home in homes]
+    scores = [home.profitability_score for home in homes]
+    loader_db.query(Property).filter(Property.id == homes[0].id).update({"profitability_score": 1.0})
+    loader_db.query(Property).filter(Property.id == homes[2].id).update({"score_base": None})
+    loader_db.commit()
+
+    result = loader.recalculate_scores_in_db(session_factory=TestingSessionLocal)
+
+    assert result == {"rescored": 3, "total": 3, "changed": 2}
+    loader_db.expire_all()
+    assert [home.score_base for home in homes[:2]] == bases[:2]  # Days on market and hot flag stay in
+    assert abs(homes[0].profitability_score - scores[0]) < 0.01
+    assert homes[2].score_base is not None and homes[2].score_base < bases[2]
+
+
+def test_copy_encoding_escapes_text_format():
+    """COPY text rows escape separators and use \\N for NULL."""
+    buffer = encode_copy_rows([{"a": "x\ty\\z", "b": None}], ["a", "b"])
+    assert buffer.getvalue() == "x\\ty\\\\z\t\\N\n"
+
+
+def test_parallel_parsing_preserves_row_order():
+    """Parsed chunks come back in file order regardless of worker count."""
+    from app.ingest import parse_chunks
+
+    chunks = [
+        [(n, make_row(n, price=str(100000 + n)), None) for n in range(start, start + 5)]
+        for start in range(2, 42, 5)
+    ]
+    serial = [item for chunk in parse_chunks(chunks, workers=1) for item in chunk]
+    parallel = [item for chunk in parse_chunks(chunks, workers=2, max_pending=2) for item in chunk]
+
+    assert parallel == serial
+    assert [row_num for row_num, _ in parallel] == list(range(2, 42))
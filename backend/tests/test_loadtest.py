@@ -0,0 +1,61 @@
+"""
+Tests for the load-testing harness: the synthetic CSV loads, percentiles are
+right, and the driver reports every route of the mix.
+"""
+import argparse
+import asyncio
+
+import httpx
+import pytest
+
+from app.ingest import loader
+from app.main import app
+from app.models import Property
+from benchmarks import synthetic
+from benchmarks.driver import Sample, drive, percentile, summarize
+from benchmarks.loadtest import parse_mix, parse_stages
+from tests.conftest import TestingSessionLocal, engine
+
+
+@pytest.fixture
+def loaded_db(db, monkeypatch, tmp_path):
+    """The test database with a small synthetic dataset loaded by the real loader."""
+    monkeypatch.setattr(loader, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(loader, "engine", engine)
+    path = synthetic.write_csv(tmp_path / "listings.csv.gz", 80)
+    loader.load_csv_into_db(str(path), batch_size=25, geocoder_mode="off")
+    return db
+
+
+def test_synthetic_csv_loads(loaded_db):
+    """Every generated row is a listing the loader accepts."""
+    assert loaded_db.query(Property).count() == 80
+    assert {home.city for home in loaded_db.query(Property)} <= {market[0] for market in synthetic.MARKETS}
+
+
+def test_percentiles_and_summary():
+    latencies = [float(ms) for ms in range(1, 101)]
+    assert (percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99)) == (50.0, 95.0, 99.0)
+    assert percentile([], 50) == 0.0
+
+    samples = [Sample("GET /a", 0.010, True)] * 3 + [Sample("GET /b", 0.030, False)]
+    [a, b, total] = summarize(samples, seconds=2.0)
+    assert (a.route, a.requests, a.errors, a.throughput, a.p50_ms) == ("GET /a", 3, 0, 1.5, 10.0)
+    assert (b.errors, total.route, total.requests, total.max_ms) == (1, "all", 4, 30.0)
+
+    assert parse_stages("1,8,32") == [1, 8, 32]
+    assert parse_mix("search=70,detail=30") == {"search": 70.0, "detail": 30.0}
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("checkout=5")
+
+
+def test_drive_reports_each_route(loaded_db, client):
+    """Two short stages against the app in process, with no failed calls."""
+    reports = asyncio.run(drive(
+        "http://testserver", [1, 2], duration=0.5, seed=3, transport=httpx.ASGITransport(app=app)
+    ))
+    assert [stage.concurrency for stage in reports] == [1, 2]
+    routes = {row.route: row for stage in reports for row in stage.routes}
+    assert {"GET /api/properties", "all"} <= set(routes)
+    assert all(row.errors == 0 for stage in reports for row in stage.routes)
+    assert all(row.p50_ms <= row.p95_ms <= row.p99_ms <= row.max_ms for row in routes.values())
@@ -0,0 +1,103 @@
+"""
+Tests for the Prometheus metrics endpoint.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi import status
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.config import settings
+from app.models import CityRisk, LoadCheckpoint
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _samples(text):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+def _key(name, **labels):
+    return (name, tuple(sorted(labels.items())))
+
+
+def test_metrics_report_routes_pool_and_jobs(client, db, monkeypatch):
+    """Requests are counted and timed per route template; pool and loader state are exposed."""
+    db.add(LoadCheckpoint(source="/data/homes.csv", source_fingerprint="1:1", loaded_count=1200, status="running"))
+    db.add(CityRisk(city="Austin", state="TX", crime_rate=3.1, risk=40.0, crime_points=-2.0))
+    db.commit()
+    assert client.get("/metrics").status_code == status.HTTP_404_NOT_FOUND  # Never public without a token
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    scraper = {"Authorization": "Bearer scrape-secret"}
+    before = _samples(client.get("/metrics", headers=scraper).text)
+    route = {"method": "GET", "route": "/api/properties/{property_id}"}
+    count_key = _key("rentiq_http_requests_total", status="404", **route)
+    for property_id in (999998, 999999):
+        assert client.get(f"/api/properties/{property_id}").status_code == status.HTTP_404_NOT_FOUND
+    client.get("/no/such/page")
+
+    response = client.get("/metrics", headers=scraper)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    samples = _samples(response.text)
+
+    # One series per route template, not per URL
+    assert samples[count_key] - before.get(count_key, 0) == 2
+    bucket = _key("rentiq_http_request_duration_seconds_bucket", le="+Inf", **route)
+    assert samples[bucket] - before.get(bucket, 0) == 2
+    unmatched = _key("rentiq_http_requests_total", method="GET", route="<unmatched>", status="404")
+    assert samples[unmatched] >= 1
+    assert samples[("rentiq_http_requests_in_flight", ())] == 1  # The scrape itself
+
+    assert samples[("rentiq_db_pool_size", (("engine", "primary"),))] == 10
+    assert ("rentiq_db_pool_checked_out", (("engine", "primary"),)) in samples
+    assert ("rentiq_db_pool_overflow", (("engine", "primary"),)) in samples
+
+    assert samples[("rentiq_load_jobs", (("status", "running"),))] == 1
+    assert samples[("rentiq_load_rows", (("status", "running"),))] == 1200
+    assert ("rentiq_load_last_progress_timestamp_seconds", ()) in samples
+    assert samples[("rentiq_score_component_rows", (("component", "city_risk"),))] == 1
+
+    assert client.get("/metrics").status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_metrics_merge_worker_processes(tmp_path):
+    """With PROMETHEUS_MULTIPROC_DIR, any worker's scrape shows the counters of all workers."""
+    metrics_dir = tmp_path / "metrics"
+    metrics_dir.mkdir()
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(metrics_dir),
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'app.db'}",
+    }
+    worker = (
+        "from app.core.telemetry import REQUESTS, record_cache_lookup\n"
+        "REQUESTS.labels('GET', '/api/properties', '200').inc(3)\n"
+        "record_cache_lookup('geocode', True)\n"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], cwd=BACKEND_DIR, env=env, check=True)
+
+    scrape = (
+        "from app.core.telemetry import render_metrics\n"
+        "from app.database import Base, SessionLocal, engine\n"
+        "Base.metadata.create_all(bind=engine)\n"
+        "body, _ = render_metrics(SessionLocal())\n"
+        "print(body.decode())\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", scrape], cwd=BACKEND_DIR, env=env, check=True, capture_output=True, text=True
+    ).stdout
+    samples = _samples(output)
+    requests = _key("rentiq_http_requests_total", method="GET", route="/api/properties", status="200")
+    assert samples[requests] == 6
+    assert samples[_key("rentiq_cache_lookups_total", cache="geocode", result="hit")] == 2
@@ -0,0 +1,112 @@
+"""
+Tests for opt-in request profiling.
+"""
+import pstats
+import time
+from decimal import Decimal
+
+import pytest
+from fastapi import status
+from starlette.middleware import Middleware
+
+from app.api.v1 import properties
+from app.config import settings
+from app.core import investment
+from app.core.profiling import ProfileStore, ProfilingMiddleware, RequestProfile, profile_store
+from app.main import app
+from app.models import Property, User
+
+
+@pytest.fixture
+def profiling(db, monkeypatch, test_user_token):
+    """The app with the profiling middleware where PROFILING_ENABLED puts it; an admin's headers."""
+    monkeypatch.setattr(app, "user_middleware", [*app.user_middleware, Middleware(ProfilingMiddleware)])
+    monkeypatch.setattr(app, "middleware_stack", None)
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["test@example.com"])
+    db.add(User(email="test@example.com", username="testuser"))
+    db.add(Property(
+        address="1 Main St", city="TestCity", state="CA", zip_code="90210", price=Decimal("300000"),
+        size_sqft=1500, bedrooms=3, bathrooms=2.0, property_type="single_family", profitability_score=50.0,
+        estimated_rent=Decimal("2500"),
+    ))
+    db.commit()
+    profile_store.clear()
+    return {"Authorization": f"Bearer {test_user_token}"}
+
+
+def test_admin_header_profiles_request_with_breakdown(client, profiling, monkeypatch):
+    """X-Profile from an admin records a sampled profile with its time split by category."""
+    def slow_analysis(*args, **kwargs):
+        deadline = time.perf_counter() + 0.06
+        while time.perf_counter() < deadline:
+            result = investment.analyze_investment(*args, **kwargs)
+        return result
+
+    monkeypatch.setattr(properties, "analyze_investment", slow_analysis)
+
+    assert "x-profile-id" not in client.get("/api/properties/1/analysis", headers={"X-Profile": "1"}).headers
+    response = client.get("/api/properties/1/analysis", headers={**profiling, "X-Profile": "1"})
+    assert response.status_code == status.HTTP_200_OK
+    profile_id = int(response.headers["x-profile-id"])
+
+    [summary] = client.get("/api/admin/profiles", headers=profiling).json()
+    assert (summary["id"], summary["route"], summary["mode"]) == (profile_id, "/api/properties/{property_id}/analysis", "sampling")
+    assert summary["breakdown"]["analysis"] >= 30
+    assert max(summary["breakdown"], key=summary["breakdown"].get) == "analysis"
+    assert sum(summary["breakdown"].values()) <= summary["duration_ms"] + 1
+    assert summary["sql"]["queries"] >= 1
+    assert summary["memory"]["allocated_kb"] >= 0 and summary["memory"]["top"]
+
+    detail = client.get(f"/api/admin/profiles/{profile_id}", headers=profiling).json()
+    assert any("analyze_investment" in row["function"] for row in detail["functions"])
+
+    speedscope = client.get(f"/api/admin/profiles/{profile_id}/download?format=speedscope", headers=profiling).json()
+    [sampled] = speedscope["profiles"]
+    assert sampled["type"] == "sampled" and len(sampled["samples"]) == len(sampled["weights"])
+    names = {frame["name"] for frame in speedscope["shared"]["frames"]}
+    assert "analyze_investment" in names
+
+
+def test_deterministic_profile_downloads_as_pstats(client, profiling, tmp_path):
+    """A deterministic profile counts calls exactly and loads with pstats."""
+    response = client.get("/api/properties/1/analysis", headers={**profiling, "X-Profile": "deterministic"})
+    profile_id = int(response.headers["x-profile-id"])
+
+    detail = client.get(f"/api/admin/profiles/{profile_id}", headers=profiling).json()
+    assert detail["mode"] == "deterministic"
+    assert detail["breakdown"]["sql"] > 0 and detail["breakdown"]["analysis"] > 0
+
+    download = client.get(f"/api/admin/profiles/{profile_id}/download", headers=profiling)
+    assert download.headers["content-disposition"] == f'attachment; filename="profile-{profile_id}.pstats"'
+    path = tmp_path / "request.pstats"
+    path.write_bytes(download.content)
+    stats = pstats.Stats(str(path))
+    [(calls, _)] = [
+        (nc, ct) for (file, _, name), (_, nc, _, ct, _) in stats.stats.items()
+        if name == "analyze_investment" and file.endswith("investment.py")
+    ]
+    assert calls == 1
+
+    speedscope = client.get(f"/api/admin/profiles/{profile_id}/download?format=speedscope", headers=profiling)
+    assert speedscope.status_code == status.HTTP_409_CONFLICT
+
+
+def test_sample_rate_profiles_anonymous_requests(client, profiling, monkeypatch):
+    """PROFILE_SAMPLE_RATE profiles requests without any header, into a bounded buffer."""
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(settings, "PROFILE_TRACEMALLOC", False)
+    for _ in range(3):
+        assert "x-profile-id" in client.get("/api/properties/1").headers
+    monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 0.0)
+
+    profiles = client.get("/api/admin/profiles", headers=profiling).json()
+    assert [profile["path"] for profile in profiles] == ["/api/properties/1"] * 3
+    assert profiles[0]["memory"] is None
+    assert client.delete("/api/admin/profiles", headers=profiling).status_code == status.HTTP_204_NO_CONTENT
+    assert client.get("/api/admin/profiles", headers=profiling).json() == []
+
+    store = ProfileStore(2)
+    for _ in range(3):
+        store.add(RequestProfile(store.next_id(), "GET", "/", "sampling"))
+    assert [profile.id for profile in store.snapshot()] == [3, 2]
+    assert store.get(1) is None
@@ -1,10 +1,18 @@
 """
 Tests for property search and scoring.
 """
+import logging
+import re
 import pytest
 from decimal import Decimal
 from fastapi import status
-from app.models import Property
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import database
+from app.database import LAST_WRITE_HEADER, Base, ReadReplicaRouter
+from app.config import settings
+from app.core.request_metrics import route_stats
+from app.models import Favorite, Property, PropertyPriceHistory, User
 from app.core.scoring import calculate_profitability_score, estimate_monthly_rent
 
 
@@ -164,3 +172,110 @@ def test_get_property_detail(client, db):
     data = response.json()
     assert data["address"] == "123 Test St"
     assert "profitability_score" in data
+
+
+def test_get_property_price_history(client, db):
+    """Price history comes back oldest first; unknown properties are 404."""
+    prop = Property(
+        address="123 Test St",
+        city="TestCity",
+        state="CA",
+        zip_code="90210",
+        price=Decimal("290000"),
+        size_sqft=1500,
+        bedrooms=3,
+        bathrooms=2.0,
+        property_type="single_family",
+        profitability_score=50.0,
+    )
+    db.add(prop)
+    db.commit()
+    db.add_all([
+        PropertyPriceHistory(property_id=prop.id, price=Decimal("310000"), status="ACTIVE"),
+        PropertyPriceHistory(property_id=prop.id, price=Decimal("290000"), status="PENDING"),
+    ])
+    db.commit()
+    
+    response = client.get(f"/api/properties/{prop.id}/price-history")
+    
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [(Decimal(entry["price"]), entry["status"]) for entry in data] == [
+        (Decimal("310000"), "ACTIVE"), (Decimal("290000"), "PENDING"),
+    ]
+    assert client.get(f"/api/properties/{prop.id + 1}/price-history").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_reads_use_replica_until_own_write(client, db, tmp_path, monkeypatch, test_user_token):
+    """Detail reads go to the replica, except for a client that just wrote (read-your-writes)."""
+    replica_engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=replica_engine)
+    ReplicaSession = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+    monkeypatch.setattr(database, "read_router", ReadReplicaRouter([ReplicaSession], sticky_seconds=60))
+
+    replica = ReplicaSession()
+    for session, price in ((db, Decimal("300000")), (replica, Decimal("250000"))):  # The replica lags behind
+        session.add(User(id=1, email="test@example.com", username="testuser"))
+        session.add(Property(
+            id=1, address="1 Main St", city="TestCity", state="CA", zip_code="90210", price=price,
+            size_sqft=1500, bedrooms=3, bathrooms=2.0, property_type="single_family", profitability_score=50.0,
+        ))
+        session.commit()
+    replica.close()
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+
+    detail = client.get("/api/properties/1", headers=headers).json()
+    assert (Decimal(detail["price"]), detail["is_favorited"]) == (Decimal("250000"), False)
+
+    response = client.post("/api/favorites", json={"property_id": 1}, headers=headers)
+    assert response.status_code == status.HTTP_201_CREATED
+    # The client echoes the write time back; no server keeps it, so any worker routes it the same way.
+    monkeypatch.setattr(database, "read_router", ReadReplicaRouter([ReplicaSession], sticky_seconds=60))
+    wrote = {**headers, LAST_WRITE_HEADER: response.headers[LAST_WRITE_HEADER]}
+    detail = client.get("/api/properties/1", headers=wrote).json()
+    assert (Decimal(detail["price"]), detail["is_favorited"]) == (Decimal("300000"), True)
+    # Requests without it, or with a write older than the window, keep reading from the replica.
+    assert Decimal(client.get("/api/properties/1").json()["price"]) == Decimal("250000")
+    stale = {**headers, LAST_WRITE_HEADER: str(float(response.headers[LAST_WRITE_HEADER]) - 61)}
+    assert Decimal(client.get("/api/properties/1", headers=stale).json()["price"]) == Decimal("250000")
+
+
+def test_requests_report_sql_stats_per_route(client, db, monkeypatch, caplog, test_user_token):
+    """Server-Timing carries each request's query count; per-route totals expose N+1 listings."""
+    user = User(email="test@example.com", username="testuser")
+    db.add(user)
+    for i in range(4):
+        db.add(Property(
+            address=f"{i} Main St", city="TestCity", state="CA", zip_code="90210", price=Decimal("300000"),
+            size_sqft=1500, bedrooms=3, bathrooms=2.0, property_type="single_family", profitability_score=50.0,
+        ))
+    db.commit()
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    route_stats.reset()
+
+    def favorites_query_count():
+        response = client.get("/api/favorites", headers=headers)
+        assert response.status_code == status.HTTP_200_OK
+        return int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers["Server-Timing"]).group(1))
+
+    db.add(Favorite(user_id=user.id, property_id=1))
+    db.commit()
+    one_favorite = favorites_query_count()
+    db.add_all([Favorite(user_id=user.id, property_id=i) for i in (2, 3, 4)])
+    db.commit()
+    assert favorites_query_count() == one_favorite  # Not one query per favorite
+
+    stats = route_stats.get("GET /api/favorites")
+    assert (stats["requests"], stats["max_queries"]) == (2, one_favorite)
+
+    assert client.get("/api/admin/sql-stats", headers=headers).status_code == status.HTTP_403_FORBIDDEN
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["test@example.com"])
+    routes = {row["route"]: row for row in client.get("/api/admin/sql-stats", headers=headers).json()}
+    assert routes["GET /api/favorites"]["avg_queries"] == one_favorite
+
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.0)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN", True)
+    with caplog.at_level(logging.WARNING, logger="app.database"):
+        client.get("/api/properties/1")
+    slow = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert slow and any("FROM properties" in message and "SEARCH" in message for message in slow)
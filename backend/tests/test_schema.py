@@ -0,0 +1,66 @@
+"""
+Tests for the schema upgrade step on a database created before the loader's columns existed.
+"""
+from sqlalchemy import create_engine, inspect, select
+
+from app.models import Property
+from app.schema import upgrade_schema
+
+
+OLD_PROPERTIES_DDL = """
+CREATE TABLE properties (
+    id INTEGER PRIMARY KEY,
+    address VARCHAR NOT NULL,
+    city VARCHAR NOT NULL,
+    state VARCHAR(2) NOT NULL,
+    zip_code VARCHAR(10) NOT NULL,
+    price NUMERIC(12, 2) NOT NULL,
+    size_sqft INTEGER NOT NULL,
+    bedrooms INTEGER NOT NULL,
+    bathrooms FLOAT NOT NULL,
+    property_type VARCHAR NOT NULL,
+    year_built INTEGER,
+    image_url VARCHAR,
+    lat FLOAT,
+    lng FLOAT,
+    profitability_score FLOAT NOT NULL,
+    estimated_rent NUMERIC(10, 2),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def test_upgrade_adds_columns_backfills_and_indexes_older_databases(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(OLD_PROPERTIES_DDL)
+        for lat in (32.7767, 32.7767, None):  # Two copies of one listing, and one without coordinates
+            connection.exec_driver_sql(
+                "INSERT INTO properties (address, city, state, zip_code, price, size_sqft, bedrooms, bathrooms, "
+                "property_type, lat, lng, profitability_score) "
+                "VALUES ('1 Elm St', 'Dallas', 'TX', '75201', 300000, 1500, 3, 2.0, 'condo', ?, ?, 55.0)",
+                (lat, None if lat is None else -96.797),
+            )
+
+    assert upgrade_schema(engine) == {"hashed": 3, "celled": 2}
+
+    inspector = inspect(engine)
+    assert {column.name for column in Property.__table__.columns} <= {
+        column["name"] for column in inspector.get_columns("properties")
+    }
+    indexes = {index["name"]: index for index in inspector.get_indexes("properties")}
+    assert indexes["ix_properties_dedupe_hash"]["unique"] and "ix_properties_geo_cell" in indexes
+    assert {key["referred_table"] for key in inspector.get_foreign_keys("properties")} == {
+        "city_risk", "macro_indicators",
+    }
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(Property.dedupe_hash, Property.location_hash, Property.geo_cell, Property.score_base)
+            .order_by(Property.id)
+        ).all()
+    assert rows[0].dedupe_hash and rows[1].dedupe_hash is None  # The copy keeps the unique index valid
+    assert all(row.location_hash for row in rows) and rows[0].geo_cell == rows[1].geo_cell
+    assert rows[2].geo_cell is None and all(row.score_base is None for row in rows)
+
+    assert upgrade_schema(engine) == {"hashed": 0, "celled": 0}  # Up to date: nothing to do
+    engine.dispose()
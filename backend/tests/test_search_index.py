@@ -0,0 +1,87 @@
+"""
+Tests for columnar search: the same pages as the SQL path for random
+filter sets (a differential test), and snapshot refreshes.
+"""
+import random
+from collections import Counter
+from decimal import Decimal
+
+import pytest
+
+from app.config import settings
+from app.core.search_index import SearchIndex, search_index
+from app.models import Property
+from benchmarks import synthetic
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def homes(db):
+    """Synthetic listings, with some scores, prices and sizes shared so ties are tested."""
+    homes = synthetic.properties(600, seed=11)
+    for number, home in enumerate(homes):
+        if number % 7 == 0:
+            home.profitability_score = 55.0
+        if number % 11 == 0:
+            home.price, home.size_sqft = Decimal("325000.00"), 1800
+    db.add_all(homes)
+    db.commit()
+    return homes
+
+
+def random_filters(rng, zips):
+    filters = {}
+    if rng.random() < 0.4:
+        filters["zip_code"] = rng.choice(zips + ["00000"])
+        if rng.random() < 0.3:
+            filters["radius_miles"] = rng.choice([1, 5, 25])
+    if rng.random() < 0.4:
+        low = rng.choice([150000, 250000, 325000, 400000])
+        filters["min_price"], filters["max_price"] = low, low + rng.choice([75000, 250000])
+    if rng.random() < 0.3:
+        filters["min_size"], filters["max_size"] = 1200, rng.choice([1800, 2600])
+    if rng.random() < 0.3:
+        filters["bedrooms"] = rng.choice([2, 3, 4])
+    if rng.random() < 0.2:
+        filters["bathrooms"] = rng.choice([1.5, 2, 2.5])
+    if rng.random() < 0.3:
+        filters["property_type"] = rng.choice(["single", "CONDO", "family", "town", "o%o", "nothing"])
+    if rng.random() < 0.3:
+        filters["min_score"] = rng.choice([40, 55, 60.5])
+    filters["sort_by"] = rng.choice(["profitability_score", "price", "size_sqft"])
+    filters["sort_order"] = rng.choice(["asc", "desc"])
+    filters["limit"] = rng.choice([1, 5, 12, 40])
+    filters["skip"] = rng.choice([0, 0, 3, 20, 400])
+    return filters
+
+
+def test_columnar_pages_match_sql(client, db, homes, monkeypatch):
+    search_index.snapshot = None
+    assert search_index.refresh(db)
+    try:
+        rng = random.Random(5)
+        zips = [code for code, _ in Counter(home.zip_code for home in homes).most_common(20)]
+        for _ in range(150):
+            filters = random_filters(rng, zips)
+            monkeypatch.setattr(settings, "SEARCH_BACKEND", "sql")
+            expected = client.get("/api/properties", params=filters).json()
+            monkeypatch.setattr(settings, "SEARCH_BACKEND", "columnar")
+            assert client.get("/api/properties", params=filters).json() == expected, filters
+    finally:
+        search_index.snapshot = None
+
+
+def test_snapshot_refreshes_only_when_the_table_changes(db, homes):
+    index = SearchIndex(session_factory=TestingSessionLocal)
+    assert index.search(limit=5) is None  # No snapshot yet: SQL serves the search
+    assert index.refresh() and not index.refresh()
+
+    top = index.search(limit=3)
+    assert top == [home.id for home in sorted(homes, key=lambda home: (-home.profitability_score, home.id))[:3]]
+
+    db.query(Property).filter(Property.id == homes[-1].id).update({"profitability_score": 100.0})
+    db.commit()
+    assert index.refresh()
+    assert index.search(limit=1) == [homes[-1].id]
+    assert index.search(property_type="o_o") is None
+    assert [home.id for home in index.hydrate(db, [homes[2].id, 10**9, homes[0].id])] == [homes[2].id, homes[0].id]
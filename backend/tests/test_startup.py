@@ -0,0 +1,72 @@
+"""
+Tests for API cold start cost (the Lambda handler imports app.main on every cold start).
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Cumulative import time allowed for app.main; generous for slow CI machines.
+IMPORT_BUDGET_SECONDS = float(os.environ.get("RENTIQ_IMPORT_BUDGET_SECONDS", "3.0"))
+
+# Only needed by a few routes, which import them on first use.
+LAZY_MODULES = ("httpx", "authlib", "passlib", "jose", "bcrypt")
+
+
+def test_app_import_is_lazy_and_within_budget(tmp_path):
+    """Importing the app runs no DDL, skips route-only dependencies and stays within the budget."""
+    database = tmp_path / "cold_start.db"
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "CREATE_TABLES_ON_STARTUP": "false",
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, module = line.split("|")
+        if total.strip().isdigit():
+            cumulative[module.strip()] = int(total) / 1_000_000
+
+    eager = sorted(
+        name for name in cumulative if name.split(".")[0] in LAZY_MODULES
+    )
+    assert eager == []
+    assert not database.exists()  # Not even a connection, let alone create_all
+    assert cumulative["app.main"] < IMPORT_BUDGET_SECONDS, (
+        f"import app.main took {cumulative['app.main']:.2f}s (budget {IMPORT_BUDGET_SECONDS}s)"
+    )
+
+
+def test_optional_features_are_imported_only_when_enabled(tmp_path):
+    """With metrics, profiling and job workers off, their modules are never loaded."""
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'cold_start.db'}",
+        "METRICS_ENABLED": "false",
+        "PROFILING_ENABLED": "false",
+        "JOB_WORKERS": "0",
+    }
+    modules = ("prometheus_client", "app.core.telemetry", "app.core.profiling", "app.jobs")
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys, app.main; print([m for m in {modules!r} if m in sys.modules])"],
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert result.stdout.strip() == "[]"
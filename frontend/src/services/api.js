@@ -21,6 +21,11 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    // Time of our last write: reads stay on the primary database until replicas have it
+    const lastWrite = sessionStorage.getItem('lastWrite');
+    if (lastWrite) {
+      config.headers['X-Last-Write'] = lastWrite;
+    }
     return config;
   },
   (error) => {
@@ -28,9 +33,15 @@ api.interceptors.request.use(
   }
 );
 
-// Response interceptor for error handling
+// Response interceptor for write times and error handling
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const lastWrite = response.headers['x-last-write'];
+    if (lastWrite) {
+      sessionStorage.setItem('lastWrite', lastWrite);
+    }
+    return response;
+  },
   (error) => {
     if (error.response?.status === 401) {
       // Token expired or invalid